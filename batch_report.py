@@ -0,0 +1,151 @@
+# batch_report.py
+# Headless summaries for a whole cohort: one ledger file per student. Every file is summarised
+# for each month of a year and for the year as a whole, on all cores, and the results are
+# written as one CSV or JSON report with per-file rows and cohort-level rollups.
+#
+#     python batch_report.py ledgers/ --year 2025 --output cohort_2025.csv
+#     python batch_report.py "ledgers/*.json" --output cohort_2025.json
+
+import argparse
+import concurrent.futures
+import csv
+import datetime
+import glob
+import json
+import os
+import statistics
+
+from financial_tracker import (
+    ITEM_KINDS, STORAGE_BACKENDS, StorageError, NotALedgerError,
+    open_storage, month_period, calculate_period_summaries,
+)
+
+SUMMARY_KEYS = ("income", "recurring_expenses", "occasional_expenses", "net")
+LEDGER_EXTENSIONS = (".json", *STORAGE_BACKENDS)
+
+
+def find_ledger_files(patterns: list[str]) -> list[str]:
+    """Expands directories (their ledger files, journals excluded) and glob patterns."""
+    paths: set[str] = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern)
+        paths.update(
+            path for path in candidates
+            if os.path.isfile(path) and path.lower().endswith(LEDGER_EXTENSIONS) and not path.endswith(".journal.jsonl")
+        )
+    return sorted(paths)
+
+
+def report_periods(year: int) -> list[tuple[str, datetime.date, datetime.date]]:
+    """The twelve months of a year, then the whole year: (label, start_date, end_date)."""
+    periods = [(f"{year}-{month:02d}", *month_period(year, month)) for month in range(1, 13)]
+    periods.append((str(year), datetime.date(year, 1, 1), datetime.date(year, 12, 31)))
+    return periods
+
+
+def summarize_file(path: str, year: int) -> dict:
+    """Runs in a worker process. Returns {"file", "periods": {label: totals}}, {"file", "error"}
+    or, for a file that is not a ledger (e.g. another app's .db), {"file", "skipped"}.
+    Reads with iter_items, which never repairs, compacts or otherwise writes the student's files."""
+    periods = report_periods(year)
+    items_by_kind = {kind: [] for kind in ITEM_KINDS}
+    try:
+        for kind, item in open_storage(path).iter_items(periods[-1][1], periods[-1][2]):
+            items_by_kind[kind].append(item)
+    except NotALedgerError as e:
+        return {"file": path, "skipped": str(e)}
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError, StorageError, OSError) as e:
+        return {"file": path, "error": str(e)}
+    summaries = calculate_period_summaries(
+        *(items_by_kind[kind] for kind in ITEM_KINDS),
+        [(start_date, end_date) for _, start_date, end_date in periods],
+    )
+    return {
+        "file": path,
+        "periods": {label: {key: summary[key] for key in SUMMARY_KEYS} for (label, _, _), summary in zip(periods, summaries)},
+    }
+
+
+def cohort_rollups(results: list[dict], year: int) -> dict:
+    """Per period and summary key: total, mean, median, min and max across the readable files,
+    plus how many files ended the period with a negative net."""
+    readable = [result for result in results if "periods" in result]
+    rollups = {}
+    for label, _, _ in report_periods(year):
+        period = {}
+        for key in SUMMARY_KEYS:
+            values = [result["periods"][label][key] for result in readable]
+            period[key] = {
+                "total": sum(values),
+                "mean": statistics.fmean(values) if values else 0.0,
+                "median": statistics.median(values) if values else 0.0,
+                "min": min(values, default=0.0),
+                "max": max(values, default=0.0),
+            }
+        period["files_in_deficit"] = sum(1 for result in readable if result["periods"][label]["net"] < 0)
+        rollups[label] = period
+    return rollups
+
+
+def build_report(paths: list[str], year: int, workers: int | None = None) -> dict:
+    """Summarises every file in a process pool (one process per core by default). Files that
+    turn out not to be ledgers are listed under "skipped" and left out of the rows and rollups."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        results = list(executor.map(summarize_file, paths, [year] * len(paths), chunksize=chunksize))
+    skipped = [result for result in results if "skipped" in result]
+    results = [result for result in results if "skipped" not in result]
+    return {"year": year, "files": results, "skipped": skipped, "cohort": cohort_rollups(results, year)}
+
+
+def write_json_report(report: dict, output_path: str):
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=4)
+
+
+def write_csv_report(report: dict, output_path: str):
+    """One row per (file, period) with the totals, then cohort rows named "cohort <statistic>"."""
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "period", *SUMMARY_KEYS, "error"])
+        for result in report["files"]:
+            if "error" in result:
+                writer.writerow([result["file"], "", *[""] * len(SUMMARY_KEYS), result["error"]])
+                continue
+            for label, totals in result["periods"].items():
+                writer.writerow([result["file"], label, *(f"{totals[key]:.2f}" for key in SUMMARY_KEYS), ""])
+        for statistic in ("total", "mean", "median", "min", "max"):
+            for label, period in report["cohort"].items():
+                writer.writerow([f"cohort {statistic}", label, *(f"{period[key][statistic]:.2f}" for key in SUMMARY_KEYS), ""])
+        for label, period in report["cohort"].items():
+            writer.writerow(["cohort files in deficit", label, "", "", "", period["files_in_deficit"], ""])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise many ledger files into one cohort report.")
+    parser.add_argument("ledgers", nargs="+", help="directories or glob patterns of ledger files")
+    parser.add_argument("--year", type=int, default=datetime.date.today().year)
+    parser.add_argument("--output", default="cohort_report.csv", help="report file, .csv or .json")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    paths = find_ledger_files(args.ledgers)
+    if not paths:
+        print("No ledger files found.")
+        return
+    report = build_report(paths, args.year, args.workers)
+    if args.output.lower().endswith(".json"):
+        write_json_report(report, args.output)
+    else:
+        write_csv_report(report, args.output)
+    failed = sum(1 for result in report["files"] if "error" in result)
+    print(f"Summarised {len(report['files']) - failed} of {len(report['files'])} ledger files for {args.year} into {args.output}")
+    for result in report["skipped"]:
+        print(f"Skipped {result['file']}: {result['skipped']}")
+
+
+if __name__ == "__main__":
+    main()
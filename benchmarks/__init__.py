@@ -0,0 +1,6 @@
+# benchmarks
+# Performance measurements for the tracker: a synthetic ledger generator, the original
+# reference loops used for differential checks, and a runner that writes timings to JSON.
+#
+#     python -m benchmarks.run_benchmarks --scale medium --output results.json
+#     python -m benchmarks.run_benchmarks --scale medium --compare results.json
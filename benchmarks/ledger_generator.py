@@ -0,0 +1,82 @@
+# ledger_generator.py
+# Synthetic ledgers at configurable scale. Dates lean towards the 29th-31st now and then so the
+# month-end and leap-day handling of recurring items is exercised.
+#
+#     python -m benchmarks.ledger_generator synthetic.json --occasional 100000 --years 5
+
+import argparse
+import datetime
+import random
+
+from financial_tracker import Income, RecurringExpense, OccasionalExpense, save_data
+
+SCALES = {
+    "small": {"incomes": 50, "recurring": 30, "occasional": 2_000, "years": 2, "tags": 10},
+    "medium": {"incomes": 500, "recurring": 200, "occasional": 50_000, "years": 5, "tags": 50},
+    "large": {"incomes": 5_000, "recurring": 1_000, "occasional": 500_000, "years": 10, "tags": 200},
+}
+
+INCOME_FREQUENCIES = ("once", "once", "weekly", "monthly", "annually")
+RECURRING_FREQUENCIES = ("weekly", "monthly", "monthly", "annually")
+
+
+def _random_date(rng: random.Random, first_day: datetime.date, num_days: int) -> datetime.date:
+    date_obj = first_day + datetime.timedelta(days=rng.randrange(num_days))
+    if rng.random() < 0.1:
+        # Move to a late day of the same month (29th, 30th or 31st when it exists)
+        for day in (31, 30, 29):
+            try:
+                return date_obj.replace(day=day)
+            except ValueError:
+                continue
+    return date_obj
+
+
+def _random_tags(rng: random.Random, tag_names: list[str]) -> list[str]:
+    if not tag_names:
+        return []
+    return rng.sample(tag_names, rng.randint(0, min(3, len(tag_names))))
+
+
+def generate_ledger(incomes: int, recurring: int, occasional: int, years: int, tags: int, seed: int = 0,
+                    end_date: datetime.date = datetime.date(2025, 12, 31)) -> tuple[list[Income], list[RecurringExpense], list[OccasionalExpense]]:
+    """Returns (incomes, recurring_expenses, occasional_expenses) spread over the given number of
+    years of history ending at end_date, using tags from a pool of the given size."""
+    rng = random.Random(seed)
+    num_days = 365 * years
+    first_day = end_date - datetime.timedelta(days=num_days - 1)
+    tag_names = [f"tag{number}" for number in range(tags)]
+    income_list = [
+        Income(f"Income {number}", round(rng.uniform(10, 3000), 2), _random_date(rng, first_day, num_days), rng.choice(INCOME_FREQUENCIES))
+        for number in range(incomes)
+    ]
+    recurring_list = [
+        RecurringExpense(f"Recurring {number}", round(rng.uniform(1, 500), 2), rng.choice(RECURRING_FREQUENCIES),
+                         _random_date(rng, first_day, num_days), _random_tags(rng, tag_names))
+        for number in range(recurring)
+    ]
+    occasional_list = [
+        OccasionalExpense(f"Expense {number}", round(rng.uniform(0.5, 250), 2), _random_date(rng, first_day, num_days), _random_tags(rng, tag_names))
+        for number in range(occasional)
+    ]
+    return income_list, recurring_list, occasional_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic ledger file.")
+    parser.add_argument("output", help="data file to write (.json, or .db for SQLite)")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="preset sizes, overridden by the options below")
+    parser.add_argument("--incomes", type=int)
+    parser.add_argument("--recurring", type=int)
+    parser.add_argument("--occasional", type=int)
+    parser.add_argument("--years", type=int, help="length of the history")
+    parser.add_argument("--tags", type=int, help="number of distinct tags")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = {key: getattr(args, key) if getattr(args, key) is not None else value for key, value in SCALES[args.scale].items()}
+    save_data(*generate_ledger(seed=args.seed, **sizes), data_file=args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# reference.py
+# The original day-by-day loops, kept as they were before the recurrence engine and the
+# indexes replaced them. They are slow on purpose: the benchmark runner compares every
+# optimized path against them.
+
+import calendar
+import datetime
+import re
+from collections import defaultdict
+
+from financial_tracker import Income, RecurringExpense, OccasionalExpense, count_occurrences
+
+
+def reference_total_income(income_list: list[Income], start_date: datetime.date, end_date: datetime.date) -> float:
+    total = 0.0
+    for item in income_list:
+        if not all([isinstance(d, datetime.date) for d in [item.date, start_date, end_date]]):
+            # print(f"Warning: Skipping income item '{item.source}' due to None date in calculation period.")
+            continue
+
+        if item.frequency == "once":
+            if start_date <= item.date <= end_date:
+                total += item.amount
+        elif item.frequency == "weekly":
+            if item.date <= end_date: # Ensure the income starts before or during the period end
+                current_date = item.date
+                while current_date <= end_date:
+                    if current_date >= start_date:
+                        total += item.amount
+                    current_date += datetime.timedelta(days=7)
+        elif item.frequency == "monthly":
+            if item.date <= end_date: # Ensure the income starts before or during the period end
+                current_month_date = item.date
+                while current_month_date <= end_date:
+                    if current_month_date >= start_date:
+                        total += item.amount
+                    # Move to next month
+                    next_m, next_y = (current_month_date.month % 12) + 1, current_month_date.year + (current_month_date.month // 12)
+                    try:
+                        current_month_date = current_month_date.replace(year=next_y, month=next_m)
+                    except ValueError: # Handles day not in next month e.g. Jan 31 to Feb
+                        import calendar
+                        last_day_of_next_month = calendar.monthrange(next_y, next_m)[1]
+                        current_month_date = current_month_date.replace(year=next_y, month=next_m, day=last_day_of_next_month)
+
+    return total
+
+def reference_total_recurring_expenses(expense_list: list[RecurringExpense], start_date: datetime.date, end_date: datetime.date) -> float:
+    total = 0.0
+    for item in expense_list:
+        if not all([isinstance(d, datetime.date) for d in [item.start_date, start_date, end_date]]):
+            # print(f"Warning: Skipping recurring expense item '{item.description}' due to None date in calculation period.")
+            continue
+
+        if item.start_date > end_date: # Expense starts after the period ends
+            continue
+
+        current_payment_date = item.start_date
+        while current_payment_date <= end_date:
+            if current_payment_date >= start_date: # Payment occurs within the period
+                total += item.amount
+
+            if item.frequency == "weekly":
+                current_payment_date += datetime.timedelta(days=7)
+            elif item.frequency == "monthly":
+                # Advance to the next month, keeping the day the same (or last day of month if original day is too large)
+                next_month = current_payment_date.month + 1
+                next_year = current_payment_date.year
+                if next_month > 12:
+                    next_month = 1
+                    next_year += 1
+                try:
+                    current_payment_date = current_payment_date.replace(year=next_year, month=next_month)
+                except ValueError: # Handles cases like advancing from Jan 31st to Feb
+                    import calendar
+                    last_day_of_next_month = calendar.monthrange(next_year, next_month)[1]
+                    current_payment_date = current_payment_date.replace(year=next_year, month=next_month, day=last_day_of_next_month)
+            elif item.frequency == "annually":
+                try:
+                    current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1)
+                except ValueError: # handles leap year Feb 29
+                     current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1, day=28)
+            else: # Unknown frequency
+                break # Avoid infinite loop for unknown frequencies
+    return total
+
+def reference_total_occasional_expenses(expense_list: list[OccasionalExpense], start_date: datetime.date, end_date: datetime.date) -> float:
+    total = 0.0
+    for item in expense_list:
+        if not all([isinstance(d, datetime.date) for d in [item.date, start_date, end_date]]):
+            # print(f"Warning: Skipping occasional expense item '{item.description}' due to None date in calculation period.")
+            continue
+        if start_date <= item.date <= end_date:
+            total += item.amount
+    return total
+
+
+def reference_tag_totals(recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], start_date: datetime.date, end_date: datetime.date) -> dict[str, float]:
+    """The tag aggregation loop that update_display used to run."""
+    tag_spending = defaultdict(float)
+
+    # Recurring expenses for tag aggregation
+    for item in recurring_expenses:
+        if not all([isinstance(d, datetime.date) for d in [item.start_date, start_date, end_date]]):
+            continue
+
+        current_payment_date = item.start_date
+        while current_payment_date <= end_date:
+            if current_payment_date >= start_date:
+                for tag in item.tags:
+                    tag_spending[tag] += item.amount
+
+            if item.frequency == "weekly": current_payment_date += datetime.timedelta(days=7)
+            elif item.frequency == "monthly":
+                next_m, next_y = (current_payment_date.month % 12) + 1, current_payment_date.year + (current_payment_date.month // 12)
+                try: current_payment_date = current_payment_date.replace(year=next_y, month=next_m)
+                except ValueError:
+                    last_day = calendar.monthrange(next_y, next_m)[1]
+                    current_payment_date = current_payment_date.replace(year=next_y, month=next_m, day=last_day)
+            elif item.frequency == "annually":
+                try: current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1)
+                except ValueError:
+                    current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1, day=28)
+            else: break
+            if current_payment_date > end_date and item.start_date < current_payment_date :
+                 break
+
+    # Occasional expenses for tag aggregation
+    for item in occasional_expenses:
+        if not all([isinstance(d, datetime.date) for d in [item.date, start_date, end_date]]):
+            continue
+        if start_date <= item.date <= end_date:
+            for tag in item.tags:
+                tag_spending[tag] += item.amount
+    return dict(tag_spending)
+
+
+def reference_search(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense],
+                     text: str = "", prefix: bool = False, tags: list[str] | None = None, all_tags: bool = True,
+                     min_amount: float | None = None, max_amount: float | None = None,
+                     start_date: datetime.date | None = None, end_date: datetime.date | None = None,
+                     kinds: list[str] | None = None) -> list:
+    """SearchIndex.search as a scan over every item. Returns the matching items in list order."""
+    query = " ".join(text.lower().split())
+    query_words = re.findall(r"\w+", query)
+    first, last = start_date or datetime.date.min, end_date or datetime.date.max
+    matches = []
+    for kind, item_list in (("incomes", incomes), ("recurring_expenses", recurring_expenses), ("occasional_expenses", occasional_expenses)):
+        if kinds is not None and kind not in kinds:
+            continue
+        for item in item_list:
+            label = (item.source if kind == "incomes" else item.description).lower()
+            if prefix and query_words:
+                label_words = re.findall(r"\w+", label)
+                if not all(any(word.startswith(query_word) for word in label_words) for query_word in query_words):
+                    continue
+            elif not prefix and query and query not in label:
+                continue
+            item_tags = set(getattr(item, "tags", ()))
+            if tags and (not set(tags) <= item_tags if all_tags else not set(tags) & item_tags):
+                continue
+            if (min_amount is not None and item.amount < min_amount) or (max_amount is not None and item.amount > max_amount):
+                continue
+            if start_date is not None or end_date is not None:
+                date_obj = item.start_date if kind == "recurring_expenses" else item.date
+                if not isinstance(date_obj, datetime.date):
+                    continue
+                if kind == "recurring_expenses" or (kind == "incomes" and item.frequency != "once"):
+                    if count_occurrences(date_obj, item.frequency, first, last) == 0:
+                        continue
+                elif not first <= date_obj <= last:
+                    continue
+            matches.append(item)
+    return matches
@@ -0,0 +1,225 @@
+# run_benchmarks.py
+# Times the load/save, summary and tag aggregation paths on a synthetic ledger, checks every
+# optimized path against the reference loops and writes the results as JSON, so runs of two
+# versions can be compared with --compare.
+#
+#     python -m benchmarks.run_benchmarks --scale medium --output results.json
+#     python -m benchmarks.run_benchmarks --scale medium --compare results.json
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from financial_tracker import (
+    load_data, save_data, month_period,
+    calculate_total_income, calculate_total_recurring_expenses, calculate_total_occasional_expenses,
+    calculate_period_summaries, calculate_tag_totals, compute_monthly_summary, MonthlySummaryCache,
+    SearchIndex,
+)
+from benchmarks.ledger_generator import SCALES, generate_ledger
+from benchmarks.reference import (
+    reference_total_income, reference_total_recurring_expenses, reference_total_occasional_expenses,
+    reference_tag_totals, reference_search,
+)
+
+TOLERANCE = 1e-6 # Relative difference allowed between an optimized path and its reference
+
+
+def time_call(function, repeat: int) -> dict:
+    """Runs function repeat times with its output silenced. Returns the timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+    return {"min": min(timings), "median": statistics.median(timings), "repeat": repeat}
+
+
+def _close(value: float, expected: float) -> bool:
+    return abs(value - expected) <= TOLERANCE * max(1.0, abs(expected))
+
+
+def differential_check(incomes: list, recurring_expenses: list, occasional_expenses: list, periods: list[tuple[datetime.date, datetime.date]]) -> dict:
+    """Compares each optimized path with the reference loops over the given periods, on both the
+    indexed lists from load_data and plain lists. Returns the number of comparisons and the mismatches."""
+    checked, mismatches = 0, []
+
+    def compare(name: str, period, value: float, expected: float):
+        nonlocal checked
+        checked += 1
+        if not _close(value, expected):
+            mismatches.append({"path": name, "period": [period[0].isoformat(), period[1].isoformat()], "value": value, "expected": expected})
+
+    plain = (list(incomes), list(recurring_expenses), list(occasional_expenses))
+    period_summaries = calculate_period_summaries(incomes, recurring_expenses, occasional_expenses, periods)
+    for period, period_summary in zip(periods, period_summaries):
+        start_date, end_date = period
+        expected = {
+            "income": reference_total_income(incomes, start_date, end_date),
+            "recurring_expenses": reference_total_recurring_expenses(recurring_expenses, start_date, end_date),
+            "occasional_expenses": reference_total_occasional_expenses(occasional_expenses, start_date, end_date),
+        }
+        for label, lists in (("indexed", (incomes, recurring_expenses, occasional_expenses)), ("plain", plain)):
+            compare(f"calculate_total_income[{label}]", period, calculate_total_income(lists[0], start_date, end_date), expected["income"])
+            compare(f"calculate_total_recurring_expenses[{label}]", period, calculate_total_recurring_expenses(lists[1], start_date, end_date), expected["recurring_expenses"])
+            compare(f"calculate_total_occasional_expenses[{label}]", period, calculate_total_occasional_expenses(lists[2], start_date, end_date), expected["occasional_expenses"])
+        for key, value in expected.items():
+            compare(f"calculate_period_summaries[{key}]", period, period_summary[key], value)
+
+        expected_tags = reference_tag_totals(recurring_expenses, occasional_expenses, start_date, end_date)
+        for label, lists in (("indexed", (recurring_expenses, occasional_expenses)), ("plain", plain[1:])):
+            tag_totals = calculate_tag_totals(*lists, start_date, end_date)
+            for tag in expected_tags.keys() | tag_totals.keys():
+                compare(f"calculate_tag_totals[{label}][{tag}]", period, tag_totals.get(tag, 0.0), expected_tags.get(tag, 0.0))
+
+    # Search: the same items as a scan, for each filter alone and combined with the others
+    search_index = SearchIndex(incomes, recurring_expenses, occasional_expenses)
+    sample = occasional_expenses[len(occasional_expenses) // 2] if occasional_expenses else None
+    sample_tags = list(sample.tags[:2]) if sample is not None else []
+    sample_word = sample.description.split()[0][:3] if sample is not None and sample.description.split() else ""
+    for period in periods:
+        start_date, end_date = period
+        queries = [
+            {"start_date": start_date, "end_date": end_date},
+            {"min_amount": 10, "max_amount": 20, "start_date": start_date, "end_date": end_date},
+            {"tags": sample_tags, "min_amount": 45, "max_amount": 60},
+            {"tags": sample_tags, "all_tags": False, "end_date": end_date},
+            {"text": sample_word, "tags": sample_tags[:1], "start_date": start_date},
+            {"text": sample_word, "prefix": True, "max_amount": 5, "end_date": end_date},
+            {"kinds": ["incomes"], "tags": sample_tags[:1]},
+            {"kinds": ["incomes", "recurring_expenses"], "start_date": start_date, "end_date": end_date},
+        ]
+        for query in queries:
+            found = {id(item) for _, item in search_index.search(**query)}
+            expected = {id(item) for item in reference_search(incomes, recurring_expenses, occasional_expenses, **query)}
+            checked += 1
+            if found != expected:
+                mismatches.append({"path": f"SearchIndex.search{sorted(query)}", "period": [start_date.isoformat(), end_date.isoformat()],
+                                   "value": len(found), "expected": len(expected)})
+    return {"checked": checked, "mismatches": mismatches}
+
+
+def _git_revision() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmarks(sizes: dict, repeat: int = 5, seed: int = 0, check: bool = True) -> dict:
+    """Generates a ledger with the given sizes, times every path and (optionally) runs the
+    differential check. Returns the machine-readable results."""
+    generated = generate_ledger(seed=seed, **sizes)
+    end_date = max(item.date for item in generated[2]) if generated[2] else datetime.date.today()
+    year, month = end_date.year, end_date.month
+    start_date, end_date = month_period(year, month)
+    year_months = [month_period(year, number) for number in range(1, 13)]
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "benchmark.json")
+        timings["save_data"] = time_call(lambda: save_data(*generated, data_file=data_file), repeat)
+        timings["load_data"] = time_call(lambda: load_data(data_file), repeat)
+        with contextlib.redirect_stdout(io.StringIO()):
+            incomes, recurring_expenses, occasional_expenses = load_data(data_file)
+
+    timings["calculate_total_income"] = time_call(lambda: calculate_total_income(incomes, start_date, end_date), repeat)
+    timings["calculate_total_recurring_expenses"] = time_call(lambda: calculate_total_recurring_expenses(recurring_expenses, start_date, end_date), repeat)
+    timings["calculate_total_occasional_expenses"] = time_call(lambda: calculate_total_occasional_expenses(occasional_expenses, start_date, end_date), repeat)
+    timings["calculate_tag_totals"] = time_call(lambda: calculate_tag_totals(recurring_expenses, occasional_expenses, start_date, end_date), repeat)
+    # What the GUI's update_display computes for a month, without Tk
+    timings["compute_monthly_summary"] = time_call(lambda: compute_monthly_summary(incomes, recurring_expenses, occasional_expenses, year, month), repeat)
+    summary_cache = MonthlySummaryCache(incomes, recurring_expenses, occasional_expenses)
+    summary_cache.get(year, month)
+    timings["monthly_summary_cache_hit"] = time_call(lambda: summary_cache.get(year, month), repeat)
+    timings["calculate_period_summaries_12_months"] = time_call(lambda: calculate_period_summaries(incomes, recurring_expenses, occasional_expenses, year_months), repeat)
+
+    timings["search_index_build"] = time_call(lambda: SearchIndex(incomes, recurring_expenses, occasional_expenses), 1)
+    search_index = SearchIndex(incomes, recurring_expenses, occasional_expenses)
+    timings["search_month_amount_range"] = time_call(lambda: search_index.search(min_amount=10, max_amount=20, start_date=start_date, end_date=end_date), repeat)
+
+    timings["reference_total_income"] = time_call(lambda: reference_total_income(incomes, start_date, end_date), repeat)
+    timings["reference_total_recurring_expenses"] = time_call(lambda: reference_total_recurring_expenses(recurring_expenses, start_date, end_date), repeat)
+    timings["reference_total_occasional_expenses"] = time_call(lambda: reference_total_occasional_expenses(occasional_expenses, start_date, end_date), repeat)
+    timings["reference_tag_totals"] = time_call(lambda: reference_tag_totals(recurring_expenses, occasional_expenses, start_date, end_date), repeat)
+
+    results = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "seed": seed,
+        "month": f"{year}-{month:02d}",
+        "timings": timings,
+    }
+    if check:
+        periods = [(start_date, end_date), (year_months[0][0], year_months[-1][1]), *year_months[::4]]
+        results["differential_check"] = differential_check(incomes, recurring_expenses, occasional_expenses, periods)
+    return results
+
+
+def compare_results(results: dict, baseline: dict):
+    """Prints the median timings of both runs and their ratio (above 1.0 means slower now)."""
+    print(f"{'Benchmark':<40} {'Baseline':>12} {'Current':>12} {'Ratio':>8}")
+    for name, timing in results["timings"].items():
+        before = baseline.get("timings", {}).get(name)
+        if before is None:
+            print(f"{name:<40} {'-':>12} {timing['median'] * 1000:>10.3f}ms {'-':>8}")
+        else:
+            ratio = timing["median"] / before["median"] if before["median"] else float("inf")
+            print(f"{name:<40} {before['median'] * 1000:>10.3f}ms {timing['median'] * 1000:>10.3f}ms {ratio:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the financial tracker on a synthetic ledger.")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="preset sizes, overridden by the options below")
+    parser.add_argument("--incomes", type=int)
+    parser.add_argument("--recurring", type=int)
+    parser.add_argument("--occasional", type=int)
+    parser.add_argument("--years", type=int, help="length of the history")
+    parser.add_argument("--tags", type=int, help="number of distinct tags")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--skip-check", action="store_true", help="skip the differential check")
+    args = parser.parse_args()
+
+    sizes = {key: getattr(args, key) if getattr(args, key) is not None else value for key, value in SCALES[args.scale].items()}
+    results = run_benchmarks(sizes, args.repeat, args.seed, check=not args.skip_check)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare_results(results, json.load(f))
+    else:
+        for name, timing in results["timings"].items():
+            print(f"{name:<40} {timing['median'] * 1000:>10.3f}ms")
+
+    check = results.get("differential_check")
+    if check is not None:
+        print(f"Differential check: {check['checked']} comparisons, {len(check['mismatches'])} mismatches")
+        for mismatch in check["mismatches"][:20]:
+            print(f"  {mismatch['path']} {mismatch['period']}: {mismatch['value']} != {mismatch['expected']}")
+        if check["mismatches"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
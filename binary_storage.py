@@ -0,0 +1,355 @@
+# binary_storage.py
+# Compact binary snapshot backend, used for data files ending in .sftb and for any existing data
+# file that starts with the SFTB signature. New items still go to the JSON lines journal next
+# to the snapshot, exactly as for JSON data files; compaction rewrites the binary snapshot.
+#
+# The snapshot is read through mmap. Records are fixed width, text lives in one string table
+# and one-off items have a date index, so iter_items (and with it summarize_ledger) for one
+# month touches the header, the recurring items and the index pages of that month instead of
+# decoding the whole ledger.
+#
+# Convert a ledger (either way, losslessly) with:
+#     python binary_storage.py financial_data.json financial_data.sftb
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   header          _HEADER: signature, version, journal id, counts and section offsets
+#   incomes         _INCOME records: date ordinal, amount, source, frequency
+#   recurring       _RECURRING records: start ordinal, amount, description, frequency, tags
+#   occasional      _OCCASIONAL records: date ordinal, amount, description, tags
+#   tag refs        u32 string ids; a record's tags are (first ref, count), shared by equal tags
+#   income index    one-off incomes: date ordinals (sorted) then their record numbers,
+#                   followed by the record numbers of the recurring incomes
+#   occasional idx  date ordinals (sorted) then their record numbers
+#   strings         u64 offsets (count + 1) into the UTF-8 data that follows them
+
+import bisect
+import datetime
+import mmap
+import os
+import struct
+import sys
+
+from financial_tracker import (
+    Income, RecurringExpense, OccasionalExpense,
+    ITEM_KINDS, JsonStorage, StorageError,
+    convert_ledger, intern_tags, _item_affects_range, _write_atomically,
+)
+
+SIGNATURE = b"SFTB"
+VERSION = 1
+NO_JOURNAL_ID = b"\0" * 32
+
+# signature, version, reserved, journal id, counts (incomes, recurring, occasional, tag refs,
+# one-off incomes, strings), offsets (incomes, recurring, occasional, tag refs, income index,
+# occasional index, strings)
+_HEADER = struct.Struct("<4sHH32s6I7Q")
+_INCOME = struct.Struct("<idII")
+_RECURRING = struct.Struct("<idIIII")
+_OCCASIONAL = struct.Struct("<idIII")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+_U64 = struct.Struct("<Q")
+READ_PROGRESS_RECORDS = 1 << 14 # Records decoded between progress reports while loading
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _PackedArray:
+    """Read-only sequence view of fixed-width numbers in a buffer, for bisect without copying."""
+
+    def __init__(self, buffer, offset: int, count: int, layout: struct.Struct):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.layout = layout
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.layout.unpack_from(self.buffer, self.offset + index * self.layout.size)[0]
+
+
+class _Snapshot:
+    """An open binary snapshot. Strings are decoded on first use and kept for the snapshot's
+    lifetime, so repeated descriptions and tags share one object."""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e: # Empty file
+            self._file.close()
+            raise StorageError(f"{path} is not a binary ledger: {e}") from e
+        if len(self.buffer) < _HEADER.size:
+            self.close()
+            raise StorageError(f"{path} is truncated")
+        (signature, version, _, journal_id, self.num_incomes, self.num_recurring, self.num_occasional, self.num_tag_refs,
+         self.num_one_off_incomes, self.num_strings, self.incomes_at, self.recurring_at, self.occasional_at,
+         self.tag_refs_at, self.income_index_at, self.occasional_index_at, self.strings_at) = _HEADER.unpack_from(self.buffer, 0)
+        if signature != SIGNATURE or version != VERSION:
+            self.close()
+            raise StorageError(f"{path} is not a version {VERSION} binary ledger")
+        self.journal_id = None if journal_id == NO_JOURNAL_ID else journal_id.decode("ascii")
+        self._strings: dict[int, str] = {}
+        self._string_data_at = self.strings_at + (self.num_strings + 1) * _U64.size
+        try:
+            self._check_sections()
+        except StorageError as e:
+            self.close()
+            raise StorageError(f"{path} is truncated or corrupt: {e}") from e
+
+    def _check_sections(self):
+        """Checks that every section the header describes lies inside the file, so a truncated
+        snapshot fails here with StorageError instead of with struct.error while decoding."""
+        if self.num_one_off_incomes > self.num_incomes:
+            raise StorageError(f"{self.num_one_off_incomes} one-off incomes of {self.num_incomes}")
+        sections = {
+            "incomes": (self.incomes_at, self.num_incomes * _INCOME.size),
+            "recurring expenses": (self.recurring_at, self.num_recurring * _RECURRING.size),
+            "occasional expenses": (self.occasional_at, self.num_occasional * _OCCASIONAL.size),
+            "tag refs": (self.tag_refs_at, self.num_tag_refs * _U32.size),
+            "income index": (self.income_index_at, self.num_one_off_incomes * _I32.size + self.num_incomes * _U32.size),
+            "occasional index": (self.occasional_index_at, self.num_occasional * (_I32.size + _U32.size)),
+            "string offsets": (self.strings_at, (self.num_strings + 1) * _U64.size),
+        }
+        for name, (offset, size) in sections.items():
+            if offset < _HEADER.size or offset + size > len(self.buffer):
+                raise StorageError(f"{name} section at {offset} ({size} bytes) is outside the {len(self.buffer)} byte file")
+        string_data_size = _U64.unpack_from(self.buffer, self.strings_at + self.num_strings * _U64.size)[0]
+        if self._string_data_at + string_data_size > len(self.buffer):
+            raise StorageError(f"string data ({string_data_size} bytes) runs past the {len(self.buffer)} byte file")
+
+    def close(self):
+        self.buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # --- Decoding ---
+    def string(self, string_id: int) -> str:
+        text = self._strings.get(string_id)
+        if text is None:
+            start, end = struct.unpack_from("<2Q", self.buffer, self.strings_at + string_id * _U64.size)
+            text = self._strings[string_id] = self.buffer[self._string_data_at + start:self._string_data_at + end].decode("utf-8")
+        return text
+
+    def all_strings(self) -> list[str]:
+        """Decodes the whole string table at once (for full loads)."""
+        offsets = struct.unpack_from(f"<{self.num_strings + 1}Q", self.buffer, self.strings_at)
+        data = self.buffer[self._string_data_at:self._string_data_at + offsets[-1]]
+        return [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def tags(self, first_ref: int, count: int) -> tuple[str, ...]:
+        if not count:
+            return ()
+        refs = struct.unpack_from(f"<{count}I", self.buffer, self.tag_refs_at + first_ref * _U32.size)
+        return intern_tags([self.string(ref) for ref in refs])
+
+    def income(self, number: int) -> Income:
+        ordinal, amount, source, frequency = _INCOME.unpack_from(self.buffer, self.incomes_at + number * _INCOME.size)
+        return Income(self.string(source), amount, datetime.date.fromordinal(ordinal), self.string(frequency))
+
+    def recurring_expense(self, number: int) -> RecurringExpense:
+        ordinal, amount, description, frequency, first_ref, num_tags = _RECURRING.unpack_from(self.buffer, self.recurring_at + number * _RECURRING.size)
+        return RecurringExpense(self.string(description), amount, self.string(frequency), datetime.date.fromordinal(ordinal), self.tags(first_ref, num_tags))
+
+    def occasional_expense(self, number: int) -> OccasionalExpense:
+        ordinal, amount, description, first_ref, num_tags = _OCCASIONAL.unpack_from(self.buffer, self.occasional_at + number * _OCCASIONAL.size)
+        return OccasionalExpense(self.string(description), amount, datetime.date.fromordinal(ordinal), self.tags(first_ref, num_tags))
+
+    # --- Date index ---
+    def _indexed_between(self, index_at: int, count: int, start_date: datetime.date | None, end_date: datetime.date | None) -> range:
+        """Positions in a date index whose dates fall in [start_date, end_date]."""
+        dates = _PackedArray(self.buffer, index_at, count, _I32)
+        low = bisect.bisect_left(dates, start_date.toordinal()) if start_date is not None else 0
+        high = bisect.bisect_right(dates, end_date.toordinal()) if end_date is not None else count
+        return range(low, max(low, high))
+
+    def one_off_incomes_between(self, start_date, end_date) -> list[int]:
+        """Record numbers of the one-off incomes dated in the range, in date order."""
+        numbers_at = self.income_index_at + self.num_one_off_incomes * _I32.size
+        return [_U32.unpack_from(self.buffer, numbers_at + position * _U32.size)[0]
+                for position in self._indexed_between(self.income_index_at, self.num_one_off_incomes, start_date, end_date)]
+
+    def recurring_income_numbers(self) -> tuple[int, ...]:
+        """Record numbers of the incomes that are not one-off, in file order."""
+        numbers_at = self.income_index_at + self.num_one_off_incomes * (_I32.size + _U32.size)
+        return struct.unpack_from(f"<{self.num_incomes - self.num_one_off_incomes}I", self.buffer, numbers_at)
+
+    def occasional_expenses_between(self, start_date, end_date) -> list[int]:
+        """Record numbers of the occasional expenses dated in the range, in date order."""
+        numbers_at = self.occasional_index_at + self.num_occasional * _I32.size
+        return [_U32.unpack_from(self.buffer, numbers_at + position * _U32.size)[0]
+                for position in self._indexed_between(self.occasional_index_at, self.num_occasional, start_date, end_date)]
+
+
+def encode_snapshot(items_by_kind: dict[str, list], journal_id: str | None) -> bytes:
+    """Returns the binary snapshot of the given items."""
+    strings: dict[str, int] = {}
+
+    def string_id(text: str) -> int:
+        number = strings.get(text)
+        if number is None:
+            number = strings[text] = len(strings)
+        return number
+
+    tag_refs: list[int] = []
+    tag_spans: dict[tuple[str, ...], tuple[int, int]] = {} # Records with the same tags share their refs
+
+    def tag_span(tags) -> tuple[int, int]:
+        span = tag_spans.get(tags)
+        if span is None:
+            span = tag_spans[tags] = (len(tag_refs), len(tags))
+            tag_refs.extend(string_id(tag) for tag in tags)
+        return span
+
+    incomes = items_by_kind.get("incomes", [])
+    recurring_expenses = items_by_kind.get("recurring_expenses", [])
+    occasional_expenses = items_by_kind.get("occasional_expenses", [])
+    income_records = b"".join(
+        _INCOME.pack(item.date.toordinal(), item.amount, string_id(item.source), string_id(item.frequency)) for item in incomes
+    )
+    recurring_records = b"".join(
+        _RECURRING.pack(item.start_date.toordinal(), item.amount, string_id(item.description), string_id(item.frequency), *tag_span(item.tags))
+        for item in recurring_expenses
+    )
+    occasional_records = b"".join(
+        _OCCASIONAL.pack(item.date.toordinal(), item.amount, string_id(item.description), *tag_span(item.tags)) for item in occasional_expenses
+    )
+
+    # sorted() is stable, so items on the same day keep their order in the index
+    one_off = sorted((number for number, item in enumerate(incomes) if item.frequency == "once"), key=lambda number: incomes[number].date)
+    recurring_income_numbers = [number for number, item in enumerate(incomes) if item.frequency != "once"]
+    income_index = (
+        struct.pack(f"<{len(one_off)}i", *(incomes[number].date.toordinal() for number in one_off))
+        + struct.pack(f"<{len(one_off) + len(recurring_income_numbers)}I", *one_off, *recurring_income_numbers)
+    )
+    by_date = sorted(range(len(occasional_expenses)), key=lambda number: occasional_expenses[number].date)
+    occasional_index = (
+        struct.pack(f"<{len(by_date)}i", *(occasional_expenses[number].date.toordinal() for number in by_date))
+        + struct.pack(f"<{len(by_date)}I", *by_date)
+    )
+
+    encoded = [text.encode("utf-8") for text in strings]
+    string_offsets = [0]
+    for text in encoded:
+        string_offsets.append(string_offsets[-1] + len(text))
+    string_section = struct.pack(f"<{len(string_offsets)}Q", *string_offsets) + b"".join(encoded)
+
+    sections = [income_records, recurring_records, occasional_records, struct.pack(f"<{len(tag_refs)}I", *tag_refs),
+                income_index, occasional_index, string_section]
+    offsets, position = [], _align(_HEADER.size)
+    for section in sections:
+        offsets.append(position)
+        position = _align(position + len(section))
+    header = _HEADER.pack(
+        SIGNATURE, VERSION, 0, journal_id.encode("ascii") if journal_id else NO_JOURNAL_ID,
+        len(incomes), len(recurring_expenses), len(occasional_expenses), len(tag_refs), len(one_off), len(strings),
+        *offsets,
+    )
+    output = bytearray(position) # Zero-filled, which pads every section to its alignment
+    output[:len(header)] = header
+    for offset, section in zip(offsets, sections):
+        output[offset:offset + len(section)] = section
+    return bytes(output)
+
+
+class BinaryStorage(JsonStorage):
+    """Binary snapshot plus the JSON lines journal of JsonStorage."""
+
+    def _open(self) -> _Snapshot:
+        return _Snapshot(self.path)
+
+    def _read_snapshot(self, on_read=None) -> tuple[dict[str, list], str | None]:
+        """Decodes the whole snapshot: strings, tag refs and each section in bulk, with date
+        objects shared between records of the same day."""
+        items_by_kind = {kind: [] for kind in ITEM_KINDS}
+        if not os.path.exists(self.path):
+            return items_by_kind, None
+        with self._open() as snapshot, memoryview(snapshot.buffer) as view:
+            strings = snapshot.all_strings()
+            tag_refs = struct.unpack_from(f"<{snapshot.num_tag_refs}I", view, snapshot.tag_refs_at)
+            tag_tuples: dict[tuple[int, int], tuple[str, ...]] = {}
+            dates: dict[int, datetime.date] = {}
+
+            def date(ordinal: int) -> datetime.date:
+                value = dates.get(ordinal)
+                if value is None:
+                    value = dates[ordinal] = datetime.date.fromordinal(ordinal)
+                return value
+
+            def tags(first_ref: int, count: int) -> tuple[str, ...]:
+                value = tag_tuples.get((first_ref, count))
+                if value is None:
+                    value = tag_tuples[(first_ref, count)] = intern_tags([strings[ref] for ref in tag_refs[first_ref:first_ref + count]])
+                return value
+
+            def records(layout: struct.Struct, offset: int, count: int):
+                for first in range(0, count, READ_PROGRESS_RECORDS):
+                    chunk = min(READ_PROGRESS_RECORDS, count - first)
+                    chunk_at = offset + first * layout.size
+                    yield from layout.iter_unpack(view[chunk_at:chunk_at + chunk * layout.size])
+                    if on_read is not None:
+                        on_read(chunk * layout.size)
+
+            items_by_kind["incomes"] = [
+                Income(strings[source], amount, date(ordinal), strings[frequency])
+                for ordinal, amount, source, frequency in records(_INCOME, snapshot.incomes_at, snapshot.num_incomes)
+            ]
+            items_by_kind["recurring_expenses"] = [
+                RecurringExpense(strings[description], amount, strings[frequency], date(ordinal), tags(first_ref, num_tags))
+                for ordinal, amount, description, frequency, first_ref, num_tags in records(_RECURRING, snapshot.recurring_at, snapshot.num_recurring)
+            ]
+            items_by_kind["occasional_expenses"] = [
+                OccasionalExpense(strings[description], amount, date(ordinal), tags(first_ref, num_tags))
+                for ordinal, amount, description, first_ref, num_tags in records(_OCCASIONAL, snapshot.occasional_at, snapshot.num_occasional)
+            ]
+            if on_read is not None:
+                # Header, tag refs, indexes and strings, so the total adds up to the file size
+                on_read(len(view) - snapshot.num_incomes * _INCOME.size
+                        - snapshot.num_recurring * _RECURRING.size - snapshot.num_occasional * _OCCASIONAL.size)
+            return items_by_kind, snapshot.journal_id
+
+    def _snapshot_journal_id(self) -> str | None:
+        with self._open() as snapshot:
+            return snapshot.journal_id
+
+    def _write_snapshot_file(self, items_by_kind: dict[str, list], journal_id: str):
+        _write_atomically(self.path, encode_snapshot(items_by_kind, journal_id))
+
+    def iter_items(self, start_date: datetime.date | None = None, end_date: datetime.date | None = None):
+        """Yields (kind, item) pairs that can count towards the range: one-off incomes and
+        occasional expenses come from the date indexes, so only the range's records are read."""
+        journal_id = None
+        if os.path.exists(self.path):
+            with self._open() as snapshot:
+                journal_id = snapshot.journal_id
+                for number in snapshot.one_off_incomes_between(start_date, end_date):
+                    yield "incomes", snapshot.income(number)
+                for number in snapshot.recurring_income_numbers():
+                    item = snapshot.income(number)
+                    if _item_affects_range("incomes", item, start_date, end_date):
+                        yield "incomes", item
+                for number in range(snapshot.num_recurring):
+                    item = snapshot.recurring_expense(number)
+                    if _item_affects_range("recurring_expenses", item, start_date, end_date):
+                        yield "recurring_expenses", item
+                for number in snapshot.occasional_expenses_between(start_date, end_date):
+                    yield "occasional_expenses", snapshot.occasional_expense(number)
+        yield from self._iter_journal_items(journal_id, start_date, end_date)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python binary_storage.py <source data file> <target data file>")
+        sys.exit(1)
+    convert_ledger(sys.argv[1], sys.argv[2])
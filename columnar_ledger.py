@@ -0,0 +1,71 @@
+# columnar_ledger.py
+# Optional column-oriented view of the ledger for very large occasional expense lists.
+# Requires NumPy, which is not needed by the rest of the tracker.
+
+import datetime
+
+import numpy as np
+
+from financial_tracker import (
+    load_data,
+    RecurringExpense, OccasionalExpense,
+    count_occurrences,
+)
+
+
+class ColumnarLedger:
+    """Occasional expenses stored as columns: float64 amounts, int64 date ordinals and
+    dictionary-encoded tags (one entry per (row, tag) pair pointing into tag_names).
+
+    Recurring expenses are few, so they are kept as objects and counted with the
+    recurrence engine when tag totals are requested.
+    """
+
+    def __init__(self, occasional_expenses: list[OccasionalExpense], recurring_expenses: list[RecurringExpense] | None = None):
+        rows = [item for item in occasional_expenses if isinstance(item.date, datetime.date)]
+        self.amounts = np.fromiter((item.amount for item in rows), dtype=np.float64, count=len(rows))
+        self.ordinals = np.fromiter((item.date.toordinal() for item in rows), dtype=np.int64, count=len(rows))
+
+        tag_codes_by_name: dict[str, int] = {}
+        tag_rows, tag_codes = [], []
+        for row, item in enumerate(rows):
+            for tag in item.tags:
+                tag_rows.append(row)
+                tag_codes.append(tag_codes_by_name.setdefault(tag, len(tag_codes_by_name)))
+        self.tag_names: list[str] = list(tag_codes_by_name)
+        self.tag_rows = np.array(tag_rows, dtype=np.int64)
+        self.tag_codes = np.array(tag_codes, dtype=np.int64)
+
+        self.recurring_expenses = recurring_expenses if recurring_expenses is not None else []
+
+    @classmethod
+    def from_data_file(cls, data_file: str | None = None) -> "ColumnarLedger":
+        """Builds the columns from load_data() for a data file (DATA_FILE by default)."""
+        _, recurring_expenses, occasional_expenses = load_data(data_file)
+        return cls(occasional_expenses, recurring_expenses)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def _range_mask(self, start_date: datetime.date, end_date: datetime.date) -> np.ndarray:
+        return (self.ordinals >= start_date.toordinal()) & (self.ordinals <= end_date.toordinal())
+
+    def total_occasional_expenses(self, start_date: datetime.date, end_date: datetime.date) -> float:
+        """Same result as calculate_total_occasional_expenses over the source list."""
+        return float(self.amounts[self._range_mask(start_date, end_date)].sum())
+
+    def tag_totals(self, start_date: datetime.date, end_date: datetime.date) -> dict[str, float]:
+        """Spend per tag in [start_date, end_date], occasional and recurring expenses combined."""
+        in_range = self._range_mask(start_date, end_date)[self.tag_rows]
+        sums = np.bincount(self.tag_codes[in_range], weights=self.amounts[self.tag_rows[in_range]], minlength=len(self.tag_names))
+        hits = np.bincount(self.tag_codes[in_range], minlength=len(self.tag_names))
+
+        totals = {self.tag_names[code]: float(sums[code]) for code in np.flatnonzero(hits)}
+        for item in self.recurring_expenses:
+            if not isinstance(item.start_date, datetime.date) or not item.tags:
+                continue
+            occurrences = count_occurrences(item.start_date, item.frequency, start_date, end_date)
+            if occurrences:
+                for tag in item.tags:
+                    totals[tag] = totals.get(tag, 0.0) + item.amount * occurrences
+        return totals
@@ -0,0 +1,170 @@
+# csv_import.py
+# Bulk import of bank statement CSV exports. Rows are read and converted in chunks, negative
+# amounts become occasional expenses and positive amounts one-off incomes, tags come from
+# description rules, and the whole batch is journaled with a single append. The ledger itself is
+# never read or rewritten, so an import cannot lose items already in it.
+#
+# Import a statement with:
+#     python csv_import.py statement.csv --date-format %d/%m/%Y --decimal-comma --rules rules.json
+# where rules.json is a list such as [{"pattern": "supermarket", "tags": ["food"]}].
+
+import argparse
+import csv
+import datetime
+import json
+import re
+import sys
+
+import financial_tracker
+from financial_tracker import Income, OccasionalExpense, StorageError, append_items
+
+IMPORT_CHUNK_SIZE = 5000
+
+
+class CsvMapping:
+    """Where to find each field in a statement and how to read it. Columns are header names.
+    Statements either have one signed amount column or separate debit and credit columns."""
+
+    def __init__(self, date_column: str = "Date", description_column: str = "Description", amount_column: str | None = "Amount",
+                 debit_column: str | None = None, credit_column: str | None = None, date_format: str = "%Y-%m-%d",
+                 decimal_separator: str = ".", thousands_separator: str = "", delimiter: str = ",", encoding: str = "utf-8-sig"):
+        if amount_column is None and debit_column is None and credit_column is None:
+            raise ValueError("Map an amount column or debit/credit columns.")
+        self.date_column = date_column
+        self.description_column = description_column
+        self.amount_column = amount_column if debit_column is None and credit_column is None else None
+        self.debit_column = debit_column
+        self.credit_column = credit_column
+        self.date_format = date_format
+        self.decimal_separator = decimal_separator
+        self.thousands_separator = thousands_separator
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    def parse_date(self, text: str) -> datetime.date:
+        return datetime.datetime.strptime(text.strip(), self.date_format).date()
+
+    def parse_amount(self, text: str) -> float:
+        """Reads amounts such as "-1.234,50", "€ 12.00" or "(12.00)" (negative)."""
+        text = text.strip()
+        if not text:
+            return 0.0
+        negative = text.startswith("(") and text.endswith(")")
+        text = re.sub(r"[^\d\-+.,]", "", text)
+        if self.thousands_separator:
+            text = text.replace(self.thousands_separator, "")
+        if self.decimal_separator != ".":
+            text = text.replace(self.decimal_separator, ".")
+        amount = float(text)
+        return -amount if negative else amount
+
+    def signed_amount(self, row: dict) -> float:
+        """Negative for money going out, positive for money coming in."""
+        if self.amount_column is not None:
+            return self.parse_amount(row[self.amount_column])
+        debit = abs(self.parse_amount(row[self.debit_column])) if self.debit_column else 0.0
+        credit = abs(self.parse_amount(row[self.credit_column])) if self.credit_column else 0.0
+        return credit - debit
+
+
+class TagRule:
+    """Adds tags to every row whose description matches a (case-insensitive) regex."""
+
+    def __init__(self, pattern: str, tags: list[str]):
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.tags = tags
+
+
+def load_tag_rules(path: str) -> list[TagRule]:
+    """Reads tag rules from a JSON list of {"pattern": ..., "tags": [...]} objects."""
+    with open(path, 'r') as f:
+        return [TagRule(rule["pattern"], rule["tags"]) for rule in json.load(f)]
+
+
+def tags_for(description: str, rules: list[TagRule]) -> list[str]:
+    tags: list[str] = []
+    for rule in rules:
+        if rule.pattern.search(description):
+            tags.extend(tag for tag in rule.tags if tag not in tags)
+    return tags
+
+
+def iter_statement_chunks(path: str, mapping: CsvMapping, rules: list[TagRule], chunk_size: int = IMPORT_CHUNK_SIZE):
+    """Yields (incomes, occasional_expenses, errors) per chunk of rows. errors lists
+    (line number, message) for rows that could not be read; rows with a zero amount are skipped."""
+    with open(path, 'r', newline='', encoding=mapping.encoding) as f:
+        reader = csv.DictReader(f, delimiter=mapping.delimiter)
+        incomes, expenses, errors = [], [], []
+        for row in reader:
+            try:
+                date_obj = mapping.parse_date(row[mapping.date_column])
+                amount = mapping.signed_amount(row)
+                description = (row[mapping.description_column] or "").strip()
+            except (KeyError, ValueError, AttributeError) as e:
+                errors.append((reader.line_num, str(e) or type(e).__name__))
+            else:
+                if amount < 0:
+                    expenses.append(OccasionalExpense(description, -amount, date_obj, tags_for(description, rules)))
+                elif amount > 0:
+                    incomes.append(Income(description, amount, date_obj, "once"))
+            if len(incomes) + len(expenses) + len(errors) >= chunk_size:
+                yield incomes, expenses, errors
+                incomes, expenses, errors = [], [], []
+        if incomes or expenses or errors:
+            yield incomes, expenses, errors
+
+
+def import_statement(path: str, mapping: CsvMapping, rules: list[TagRule] | None = None, chunk_size: int = IMPORT_CHUNK_SIZE, dry_run: bool = False, data_file: str | None = None) -> dict:
+    """Imports a statement into the data file (DATA_FILE by default) with one journal append at
+    the end. Returns the number of incomes and expenses added and the rows that were skipped."""
+    new_items = []
+    added_incomes = added_expenses = 0
+    skipped: list[tuple[int, str]] = []
+    for chunk_incomes, chunk_expenses, errors in iter_statement_chunks(path, mapping, rules or [], chunk_size):
+        new_items.extend(chunk_incomes)
+        new_items.extend(chunk_expenses)
+        added_incomes += len(chunk_incomes)
+        added_expenses += len(chunk_expenses)
+        skipped.extend(errors)
+    if not dry_run and new_items:
+        append_items(new_items, data_file)
+    return {"incomes": added_incomes, "occasional_expenses": added_expenses, "skipped": skipped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a bank statement CSV into the financial tracker.")
+    parser.add_argument("csv_file")
+    parser.add_argument("--data-file", default=financial_tracker.DATA_FILE, help="ledger to import into")
+    parser.add_argument("--date-column", default="Date")
+    parser.add_argument("--description-column", default="Description")
+    parser.add_argument("--amount-column", default="Amount", help="signed amount, negative for expenses")
+    parser.add_argument("--debit-column", help="use with --credit-column instead of --amount-column")
+    parser.add_argument("--credit-column")
+    parser.add_argument("--date-format", default="%Y-%m-%d", help="strptime format, e.g. %%d/%%m/%%Y")
+    parser.add_argument("--decimal-comma", action="store_true", help="amounts look like 1.234,56")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument("--rules", help="JSON file of tag rules")
+    parser.add_argument("--dry-run", action="store_true", help="parse and report without saving")
+    args = parser.parse_args()
+
+    mapping = CsvMapping(
+        date_column=args.date_column, description_column=args.description_column, amount_column=args.amount_column,
+        debit_column=args.debit_column, credit_column=args.credit_column, date_format=args.date_format,
+        decimal_separator="," if args.decimal_comma else ".", thousands_separator="." if args.decimal_comma else ",",
+        delimiter=args.delimiter, encoding=args.encoding,
+    )
+    try:
+        result = import_statement(args.csv_file, mapping, load_tag_rules(args.rules) if args.rules else [], dry_run=args.dry_run, data_file=args.data_file)
+    except (OSError, ValueError, StorageError) as e:
+        print(f"Import failed, nothing was saved: {e}")
+        sys.exit(1)
+    print(f"Imported {result['incomes']} incomes and {result['occasional_expenses']} occasional expenses from {args.csv_file}")
+    for line_number, message in result["skipped"][:20]:
+        print(f"Skipped line {line_number}: {message}")
+    if len(result["skipped"]) > 20:
+        print(f"... and {len(result['skipped']) - 20} more skipped lines")
+
+
+if __name__ == "__main__":
+    main()
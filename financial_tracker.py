@@ -1,12 +1,52 @@
 # financial_tracker.py
 
+import array
+import atexit
+import bisect
+import calendar
+import contextlib
+import csv
 import datetime
+import hashlib
+import heapq
+import importlib
+import itertools
 import json
+import math
 import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import instrumentation
 
 DATA_FILE = "financial_data.json"
 
+# --- Data Models ---
+# Records use __slots__, so a ledger of millions of items carries no per-instance __dict__.
+# Tags are stored as tuples of interned strings, and equal tag tuples are shared between
+# records. to_dict()/from_dict() are the codecs used by every storage backend; neither touches
+# the live object or the dict it was given. The Frozen* variants refuse changes once built.
+_tag_tuples: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+def intern_tags(tags) -> tuple[str, ...]:
+    """Returns the shared tuple for a sequence of tags (an empty tuple for None)."""
+    if type(tags) is tuple:
+        shared = _tag_tuples.get(tags)
+        if shared is not None:
+            return shared
+    key = tuple(sys.intern(tag) for tag in tags) if tags else ()
+    return _tag_tuples.setdefault(key, key)
+
+def _date_to_json(value):
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
 class Income:
+    __slots__ = ("source", "amount", "date", "frequency")
+
     def __init__(self, source: str, amount: float, date: datetime.date, frequency: str = "once"):
         self.source = source
         self.amount = amount
@@ -16,26 +56,74 @@ class Income:
     def __str__(self):
         return f"Income: {self.source}, Amount: €{self.amount:.2f}, Date: {self.date}, Frequency: {self.frequency}"
 
+    def to_dict(self) -> dict:
+        return {"source": self.source, "amount": self.amount, "date": _date_to_json(self.date), "frequency": self.frequency}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Income":
+        return cls(data["source"], data["amount"], datetime.date.fromisoformat(data["date"]), data.get("frequency", "once"))
+
 class RecurringExpense:
-    def __init__(self, description: str, amount: float, frequency: str, start_date: datetime.date, tags: list[str] | None = None):
+    __slots__ = ("description", "amount", "frequency", "start_date", "tags")
+
+    def __init__(self, description: str, amount: float, frequency: str, start_date: datetime.date, tags: list[str] | tuple[str, ...] | None = None):
         self.description = description
         self.amount = amount
         self.frequency = frequency # e.g., "weekly", "monthly", "annually"
         self.start_date = start_date
-        self.tags: list[str] = tags if tags is not None else []
+        self.tags: tuple[str, ...] = intern_tags(tags)
 
     def __str__(self):
-        return f"Recurring Expense: {self.description}, Amount: €{self.amount:.2f}, Frequency: {self.frequency}, Starts: {self.start_date}, Tags: {self.tags}"
+        return f"Recurring Expense: {self.description}, Amount: €{self.amount:.2f}, Frequency: {self.frequency}, Starts: {self.start_date}, Tags: {list(self.tags)}"
+
+    def to_dict(self) -> dict:
+        return {"description": self.description, "amount": self.amount, "frequency": self.frequency, "start_date": _date_to_json(self.start_date), "tags": list(self.tags)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RecurringExpense":
+        # Older files have no 'tags' key
+        return cls(data["description"], data["amount"], data["frequency"], datetime.date.fromisoformat(data["start_date"]), data.get("tags"))
 
 class OccasionalExpense:
-    def __init__(self, description: str, amount: float, date: datetime.date, tags: list[str] = None):
+    __slots__ = ("description", "amount", "date", "tags")
+
+    def __init__(self, description: str, amount: float, date: datetime.date, tags: list[str] | tuple[str, ...] | None = None):
         self.description = description
         self.amount = amount
         self.date = date
-        self.tags: list[str] = tags if tags is not None else []
+        self.tags: tuple[str, ...] = intern_tags(tags)
 
     def __str__(self):
-        return f"Occasional Expense: {self.description}, Amount: €{self.amount:.2f}, Date: {self.date}, Tags: {self.tags}"
+        return f"Occasional Expense: {self.description}, Amount: €{self.amount:.2f}, Date: {self.date}, Tags: {list(self.tags)}"
+
+    def to_dict(self) -> dict:
+        return {"description": self.description, "amount": self.amount, "date": _date_to_json(self.date), "tags": list(self.tags)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OccasionalExpense":
+        # Older files have no 'tags' key
+        return cls(data["description"], data["amount"], datetime.date.fromisoformat(data["date"]), data.get("tags"))
+
+class _FrozenRecord:
+    """Mixin that lets each field be set once (by __init__) and never changed afterwards."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"{type(self).__name__} is read-only")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+class FrozenIncome(_FrozenRecord, Income):
+    __slots__ = ()
+
+class FrozenRecurringExpense(_FrozenRecord, RecurringExpense):
+    __slots__ = ()
+
+class FrozenOccasionalExpense(_FrozenRecord, OccasionalExpense):
+    __slots__ = ()
 
 def main():
     # This main function will eventually be replaced by the GUI application setup
@@ -85,6 +173,8 @@ def main():
 
     # Load data at startup
     incomes, recurring_expenses, occasional_expenses = load_data()
+    summary_cache = MonthlySummaryCache(incomes, recurring_expenses, occasional_expenses)
+    search_index = None # Built on the first search
 
 
     # --- CLI Loop ---
@@ -94,22 +184,36 @@ def main():
         print("2. Add Recurring Expense")
         print("3. Add Occasional Expense")
         print("4. View Monthly Summary")
-        print("5. Exit")
+        print("5. View Yearly Summary")
+        print("6. Project Cash Flow")
+        print("7. Search Items")
+        print("8. Exit")
 
-        choice = input("Enter your choice (1-5): ")
+        choice = input("Enter your choice (1-8): ")
 
         if choice == '1':
-            add_income_cli(incomes)
-            save_data(incomes, recurring_expenses, occasional_expenses)
+            new_item = add_income_cli(incomes)
+            if new_item:
+                append_item(new_item)
         elif choice == '2':
-            add_recurring_expense_cli(recurring_expenses)
-            save_data(incomes, recurring_expenses, occasional_expenses)
+            new_item = add_recurring_expense_cli(recurring_expenses)
+            if new_item:
+                append_item(new_item)
         elif choice == '3':
-            add_occasional_expense_cli(occasional_expenses)
-            save_data(incomes, recurring_expenses, occasional_expenses)
+            new_item = add_occasional_expense_cli(occasional_expenses)
+            if new_item:
+                append_item(new_item)
         elif choice == '4':
-            view_monthly_summary_cli(incomes, recurring_expenses, occasional_expenses)
+            view_monthly_summary_cli(incomes, recurring_expenses, occasional_expenses, summary_cache)
         elif choice == '5':
+            view_yearly_summary_cli(incomes, recurring_expenses, occasional_expenses)
+        elif choice == '6':
+            project_cash_flow_cli(incomes, recurring_expenses, occasional_expenses)
+        elif choice == '7':
+            if search_index is None:
+                search_index = SearchIndex(incomes, recurring_expenses, occasional_expenses)
+            search_items_cli(search_index)
+        elif choice == '8':
             print("Exiting tracker. Goodbye!")
             break
         else:
@@ -124,11 +228,11 @@ def get_date_input(prompt: str) -> datetime.date | None:
         print("Invalid date format. Please use YYYY-MM-DD.")
         return None
 
-def add_income_cli(income_list: list[Income]):
+def add_income_cli(income_list: list[Income]) -> Income | None:
     print("\n--- Add Income ---")
     source = input("Enter income source: ")
     try:
-        amount = float(input("Enter amount: "))
+        amount = check_amount(float(input("Enter amount: ")))
     except ValueError:
         print("Invalid amount.")
         return
@@ -142,16 +246,14 @@ def add_income_cli(income_list: list[Income]):
     income_item = Income(source, amount, date_obj, frequency)
     income_list.append(income_item)
     print(f"Added: {income_item}")
-    # Save after adding
-    # For simplicity, passing all lists to save_data. Could be optimized.
-    # Need to define incomes, recurring_expenses, occasional_expenses in the scope or pass them.
-    # This will be handled by where add_income_cli is called from (main)
+    # Saving is handled by the caller (main), which journals the returned item
+    return income_item
 
-def add_recurring_expense_cli(expense_list: list[RecurringExpense]):
+def add_recurring_expense_cli(expense_list: list[RecurringExpense]) -> RecurringExpense | None:
     print("\n--- Add Recurring Expense ---")
     description = input("Enter expense description: ")
     try:
-        amount = float(input("Enter amount: "))
+        amount = check_amount(float(input("Enter amount: ")))
     except ValueError:
         print("Invalid amount.")
         return
@@ -172,12 +274,13 @@ def add_recurring_expense_cli(expense_list: list[RecurringExpense]):
     expense_item = RecurringExpense(description, amount, frequency, start_date_obj, tags=tags)
     expense_list.append(expense_item) # Appending is technically done in add_recurring_expense_item, but good to be explicit if that changes
     print(f"Added: {expense_item}")
+    return expense_item
 
-def add_occasional_expense_cli(expense_list: list[OccasionalExpense]):
+def add_occasional_expense_cli(expense_list: list[OccasionalExpense]) -> OccasionalExpense | None:
     print("\n--- Add Occasional Expense ---")
     description = input("Enter expense description: ")
     try:
-        amount = float(input("Enter amount: "))
+        amount = check_amount(float(input("Enter amount: ")))
     except ValueError:
         print("Invalid amount.")
         return
@@ -193,8 +296,9 @@ def add_occasional_expense_cli(expense_list: list[OccasionalExpense]):
     expense_item = OccasionalExpense(description, amount, date_obj, tags=tags)
     expense_list.append(expense_item) # Appending is technically done in add_occasional_expense_item
     print(f"Added: {expense_item}")
+    return expense_item
 
-def view_monthly_summary_cli(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense]):
+def view_monthly_summary_cli(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], summary_cache: "MonthlySummaryCache | None" = None):
     print("\n--- View Monthly Summary ---")
     try:
         year = int(input("Enter year (e.g., 2023): "))
@@ -206,31 +310,111 @@ def view_monthly_summary_cli(incomes: list[Income], recurring_expenses: list[Rec
         print("Invalid year or month format.")
         return
 
-    import calendar
-    _, num_days = calendar.monthrange(year, month)
-    start_period = datetime.date(year, month, 1)
-    end_period = datetime.date(year, month, num_days)
+    if summary_cache is not None:
+        summary = summary_cache.get(year, month)
+    else:
+        summary = compute_monthly_summary(incomes, recurring_expenses, occasional_expenses, year, month)
+
+    print(f"\n--- Financial Summary for {summary['start_date'].strftime('%B %Y')} ---")
+    print(f"Total Income: €{summary['income']:.2f}")
+    print(f"Total Recurring Expenses: €{summary['recurring_expenses']:.2f}")
+    print(f"Total Occasional Expenses: €{summary['occasional_expenses']:.2f}")
+    print(f"Net Balance: €{summary['net']:.2f}")
+    if summary["tags"]:
+        print("Spending by Tag:")
+        for tag, total in sorted(summary["tags"].items()):
+            print(f"  {tag:<20} €{total:>10.2f}")
+
+def view_yearly_summary_cli(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense]):
+    print("\n--- View Yearly Summary ---")
+    try:
+        year = int(input("Enter year (e.g., 2023): "))
+    except ValueError:
+        print("Invalid year format.")
+        return
 
-    print(f"\n--- Financial Summary for {start_period.strftime('%B %Y')} ---")
+    periods = [month_period(year, month) for month in range(1, 13)]
+    summaries = calculate_period_summaries(incomes, recurring_expenses, occasional_expenses, periods)
 
-    total_inc = calculate_total_income(incomes, start_period, end_period)
-    total_rec_exp = calculate_total_recurring_expenses(recurring_expenses, start_period, end_period)
-    total_occ_exp = calculate_total_occasional_expenses(occasional_expenses, start_period, end_period)
-    net_balance = total_inc - total_rec_exp - total_occ_exp
+    print(f"\n--- Financial Summary for {year} ---")
+    print(f"{'Month':<10} {'Income':>12} {'Recurring':>12} {'Occasional':>12} {'Net':>12}")
+    for summary in summaries:
+        print(f"{summary['start_date'].strftime('%B'):<10} {summary['income']:>12.2f} {summary['recurring_expenses']:>12.2f} {summary['occasional_expenses']:>12.2f} {summary['net']:>12.2f}")
+    print(f"{'Total':<10} {sum(s['income'] for s in summaries):>12.2f} {sum(s['recurring_expenses'] for s in summaries):>12.2f} {sum(s['occasional_expenses'] for s in summaries):>12.2f} {sum(s['net'] for s in summaries):>12.2f}")
 
-    print(f"Total Income: €{total_inc:.2f}")
-    print(f"Total Recurring Expenses: €{total_rec_exp:.2f}")
-    print(f"Total Occasional Expenses: €{total_occ_exp:.2f}")
-    print(f"Net Balance: €{net_balance:.2f}")
+def project_cash_flow_cli(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense]):
+    print("\n--- Project Cash Flow ---")
+    try:
+        starting_balance = float(input("Current balance (€): ") or 0)
+        years = int(input("Years to project (1-10) [1]: ") or 1)
+        spend_str = input(f"Occasional spend per day (€, leave blank for the last {OCCASIONAL_BASELINE_DAYS} days' average): ")
+        daily_spend = float(spend_str) if spend_str else None
+    except ValueError:
+        print("Invalid number.")
+        return
+    if not 1 <= years <= 10:
+        print("Invalid number of years. Please enter a number between 1 and 10.")
+        return
+    if daily_spend is not None and daily_spend < 0:
+        print("Occasional spend per day cannot be negative.")
+        return
+
+    projection = project_cash_flow(incomes, recurring_expenses, occasional_expenses, years=years, starting_balance=starting_balance, daily_occasional_spend=daily_spend)
+    print(f"\n--- Projection {projection['start_date']} to {projection['end_date']} ---")
+    print(f"Occasional spend per day: €{projection['daily_occasional_spend']:.2f}")
+    print(f"{'Month end':<12} {'Balance':>12}")
+    month_start = projection["start_date"].replace(day=1)
+    while month_start <= projection["end_date"]:
+        month_end = min(month_period(month_start.year, month_start.month)[1], projection["end_date"])
+        print(f"{str(month_end):<12} {projected_balance(projection, month_end):>12.2f}")
+        month_start = month_end + datetime.timedelta(days=1)
+    print(f"Lowest balance: €{projection['lowest_balance']:.2f} on {projection['lowest_date']}")
+    if projection["first_negative_date"] is not None:
+        print(f"Balance first goes negative on {projection['first_negative_date']}")
+    else:
+        print("Balance stays positive for the whole projection.")
+    print(f"End balance: €{projection['end_balance']:.2f}")
+
+
+def search_items_cli(search_index: "SearchIndex", shown: int = 50):
+    print("\n--- Search Items ---")
+    print("Leave a field blank to not filter on it.")
+    text = input("Description or source contains: ").strip()
+    prefix = input("Match word beginnings instead (y/N): ").strip().lower() == "y"
+    tags = [tag.strip() for tag in input("Tags (comma-separated, all required): ").split(",") if tag.strip()]
+    try:
+        min_str, max_str = input("Minimum amount (€): ").strip(), input("Maximum amount (€): ").strip()
+        min_amount = float(min_str) if min_str else None
+        max_amount = float(max_str) if max_str else None
+        start_str, end_str = input("From date (YYYY-MM-DD): ").strip(), input("To date (YYYY-MM-DD): ").strip()
+        start_date = parse_date(start_str) if start_str else None
+        end_date = parse_date(end_str) if end_str else None
+    except ValueError:
+        print("Invalid amount or date. Please use numbers and YYYY-MM-DD.")
+        return
 
+    results = search_index.search(text, prefix, tags, min_amount=min_amount, max_amount=max_amount, start_date=start_date, end_date=end_date)
+    print(f"\n{len(results)} matching items")
+    for _, item in results[:shown]:
+        print(item)
+    if len(results) > shown:
+        print(f"... and {len(results) - shown} more")
 
 # --- Functions to add items (kept for potential direct use/testing, CLI functions wrap them) ---
 def parse_date(date_str: str) -> datetime.date:
     """Helper function to parse date strings."""
     return datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
 
+def check_amount(amount: float) -> float:
+    """Returns the amount, or raises ValueError for NaN and infinities, which would poison the
+    running totals of the date indexes and the sorted amounts of the search index."""
+    if not math.isfinite(amount):
+        raise ValueError(f"Invalid amount: {amount}")
+    return amount
+
 def add_income_item(income_list: list, source: str, amount: float, date_obj: datetime.date, frequency: str = "once") -> Income:
     """Adds an income item to the provided list."""
+    check_amount(amount)
     # date_obj = parse_date(date_str) # Date parsing now happens in CLI or directly
     income_item = Income(source, amount, date_obj, frequency)
     income_list.append(income_item)
@@ -239,6 +423,7 @@ def add_income_item(income_list: list, source: str, amount: float, date_obj: dat
 
 def add_recurring_expense_item(expense_list: list, description: str, amount: float, frequency: str, start_date_obj: datetime.date, tags: list[str] | None = None) -> RecurringExpense:
     """Adds a recurring expense item to the provided list."""
+    check_amount(amount)
     expense_item = RecurringExpense(description, amount, frequency, start_date_obj, tags=tags)
     expense_list.append(expense_item)
     # print(f"Added: {expense_item}")
@@ -246,149 +431,1791 @@ def add_recurring_expense_item(expense_list: list, description: str, amount: flo
 
 def add_occasional_expense_item(expense_list: list, description: str, amount: float, date_obj: datetime.date, tags: list[str] | None = None) -> OccasionalExpense:
     """Adds an occasional expense item to the provided list."""
+    check_amount(amount)
     expense_item = OccasionalExpense(description, amount, date_obj, tags=tags)
     expense_list.append(expense_item)
     # print(f"Added: {expense_item}")
     return expense_item
 
 # --- Data Persistence Functions ---
-def save_data(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense]):
-    data_to_save = {
-        "incomes": [item.__dict__ for item in incomes],
-        "recurring_expenses": [item.__dict__ for item in recurring_expenses],
-        "occasional_expenses": [item.__dict__ for item in occasional_expenses],
-    }
-    # Convert datetime.date objects to ISO format strings
-    for item_list_key in data_to_save:
-        for item_dict in data_to_save[item_list_key]:
-            for key, value in item_dict.items():
-                if isinstance(value, datetime.date):
-                    item_dict[key] = value.isoformat()
-
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data_to_save, f, indent=4)
-    print(f"Data saved to {DATA_FILE}")
-
-def load_data() -> tuple[list[Income], list[RecurringExpense], list[OccasionalExpense]]:
-    incomes = []
-    recurring_expenses = []
-    occasional_expenses = []
-
-    if not os.path.exists(DATA_FILE):
-        return incomes, recurring_expenses, occasional_expenses
+# The data file is a snapshot. Items added since the snapshot was written are appended to a
+# journal next to it (one JSON record per line), so an add costs one short append instead of a
+# rewrite of the whole ledger. load_data replays the journal on top of the snapshot, and once
+# the journal grows past JOURNAL_COMPACTION_THRESHOLD records a background thread folds it
+# back into a fresh snapshot.
+#
+# The snapshot stores a "journal_id" and the journal's first line names the id it belongs to.
+# Writing a snapshot gives it a new id before the journal is reset, so if the process dies in
+# between, the old journal no longer matches and is not replayed twice.
+JOURNAL_COMPACTION_THRESHOLD = 500
+
+ITEM_KINDS = {
+    "incomes": Income,
+    "recurring_expenses": RecurringExpense,
+    "occasional_expenses": OccasionalExpense,
+}
+
+_journal_lock = threading.RLock() # Serialises journal appends, snapshot writes and compaction
+_journal_records: dict[str, int] = {} # Records in each data file's journal, for the compaction threshold
+_compaction_thread: threading.Thread | None = None
+
+def journal_path(data_file: str) -> str:
+    """Returns the path of the journal that belongs to a data file. Binary snapshots keep their
+    extension in it, so financial_data.json and financial_data.sftb never share a journal."""
+    base, extension = os.path.splitext(data_file)
+    if extension.lower() == ".sftb":
+        base = data_file
+    return base + ".journal.jsonl"
+
+def _item_kind(item) -> str:
+    for kind, item_class in ITEM_KINDS.items():
+        if isinstance(item, item_class):
+            return kind
+    raise TypeError(f"Not a ledger item: {item!r}")
+
+def _item_to_dict(item) -> dict:
+    """Returns a JSON-ready copy of an item's fields, leaving the item itself untouched."""
+    return item.to_dict()
+
+def _item_from_dict(kind: str, item_data: dict):
+    return ITEM_KINDS[kind].from_dict(item_data)
+
+def _write_atomically(path: str, text: str | bytes):
+    """Replaces path with text (or bytes) so that readers see either the old or the new file, never a mix."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb' if isinstance(text, bytes) else 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    instrumentation.count("bytes_written", len(text))
+
+def _journal_header(journal_id: str | None) -> str:
+    return json.dumps({"journal_id": journal_id}) + "\n"
+
+def _write_snapshot(storage: "JsonStorage", items_by_kind: dict[str, list]):
+    """Writes a full snapshot in the storage's format and starts an empty journal for it."""
+    journal_id = uuid.uuid4().hex
+    storage._write_snapshot_file(items_by_kind, journal_id)
+    _write_atomically(journal_path(storage.path), _journal_header(journal_id))
+    _journal_records[storage.path] = 0
+
+# Snapshots are parsed incrementally, one item at a time, so loading never holds the whole
+# decoded document next to the objects built from it.
+SNAPSHOT_CHUNK_SIZE = 1 << 16
+
+class _JsonStreamReader:
+    """Decodes JSON values one at a time from a text file read in chunks. on_read(length) is
+    called with the length of every chunk read."""
+
+    def __init__(self, f, chunk_size: int = SNAPSHOT_CHUNK_SIZE, on_read=None):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.on_read = on_read
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        self.eof = not chunk
+        if self.on_read is not None:
+            self.on_read(len(chunk))
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return
+            self._fill()
+
+    def expect(self, *chars: str) -> str:
+        """Consumes one of the given punctuation characters and returns it."""
+        self._skip_whitespace()
+        char = self.buffer[self.pos:self.pos + 1]
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expecting {' or '.join(map(repr, chars))}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def expect_end(self):
+        if self.peek():
+            raise json.JSONDecodeError("Extra data", self.buffer, self.pos)
+
+    def peek(self) -> str:
+        self._skip_whitespace()
+        return self.buffer[self.pos:self.pos + 1]
+
+    def value(self):
+        """Decodes the next complete value, reading more of the file until it fits in the buffer."""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            if end == len(self.buffer) and not self.eof:
+                self._fill() # A number may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+def _iter_snapshot(f, on_read=None):
+    """Yields (key, value) for the top-level entries of a snapshot file. The item lists are not
+    decoded whole: each of their items is yielded as its own (kind, item_data) pair."""
+    reader = _JsonStreamReader(f, on_read=on_read)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        reader.expect_end()
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key in ITEM_KINDS and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield key, reader.value()
+                    if reader.expect(",", "]") == "]":
+                        break
+        else:
+            yield key, reader.value()
+        if reader.expect(",", "}") == "}":
+            reader.expect_end()
+            return
 
+def _journal_header_matches(header: bytes, journal_id: str | None) -> bool:
     try:
-        with open(DATA_FILE, 'r') as f:
-            data_loaded = json.load(f)
-
-        for item_data in data_loaded.get("incomes", []):
-            item_data['date'] = datetime.date.fromisoformat(item_data['date'])
-            incomes.append(Income(**item_data))
-
-        for item_data in data_loaded.get("recurring_expenses", []):
-            item_data['start_date'] = datetime.date.fromisoformat(item_data['start_date'])
-            # Ensure 'tags' key exists, defaulting to empty list if not (for backward compatibility)
-            item_data.setdefault('tags', [])
-            recurring_expenses.append(RecurringExpense(**item_data))
-
-        for item_data in data_loaded.get("occasional_expenses", []):
-            item_data['date'] = datetime.date.fromisoformat(item_data['date'])
-            # Ensure 'tags' key exists, defaulting to empty list if not
-            item_data.setdefault('tags', [])
-            occasional_expenses.append(OccasionalExpense(**item_data))
-
-        print(f"Data loaded from {DATA_FILE}")
-
-    except (json.JSONDecodeError, KeyError, TypeError) as e:
-        print(f"Error loading data from {DATA_FILE}: {e}. Starting with empty data.")
+        return json.loads(header).get("journal_id") == journal_id
+    except (ValueError, AttributeError):
+        return False
+
+def _iter_journal(f):
+    """Yields (kind, item, record_length) for the records of an open journal, after its header.
+    Stops at the first torn or unreadable record."""
+    for number, line in enumerate(f, 1):
+        try:
+            if not line.endswith(b"\n"):
+                raise ValueError("incomplete record")
+            record = json.loads(line)
+            item = _item_from_dict(record["kind"], record["item"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Dropping journal from record {number} on: {e}.")
+            return
+        yield record["kind"], item, len(line)
+
+def _read_ledger(storage: "JsonStorage", progress=None) -> tuple[dict[str, list], int]:
+    """Reads the snapshot (if any) and replays its journal. Returns the items by kind and the
+    number of journal records replayed. A stale journal is reset and a torn last record is cut
+    off, so later appends start on a clean line. progress(bytes_read, total_bytes) is called
+    as the files are read."""
+    path = journal_path(storage.path)
+    on_read = None
+    if progress is not None:
+        # JSON snapshots and journals are written with ASCII-only JSON, so characters are bytes
+        total = sum(os.path.getsize(file_path) for file_path in (storage.path, path) if os.path.exists(file_path))
+        bytes_read = 0
+
+        def on_read(length: int):
+            nonlocal bytes_read
+            bytes_read = min(bytes_read + length, total)
+            progress(bytes_read, total)
+
+    items_by_kind, journal_id = storage._read_snapshot(on_read)
+    if not os.path.exists(path):
+        return items_by_kind, 0
+    with open(path, 'rb') as f:
+        header = f.readline()
+        if on_read is not None:
+            on_read(len(header))
+        if not _journal_header_matches(header, journal_id):
+            print(f"Ignoring stale journal {path}.")
+            _write_atomically(path, _journal_header(journal_id))
+            return items_by_kind, 0
+
+        replayed, good_length = 0, len(header)
+        for kind, item, record_length in _iter_journal(f):
+            items_by_kind[kind].append(item)
+            replayed += 1
+            good_length += record_length
+            if on_read is not None:
+                on_read(record_length)
+        if good_length == os.fstat(f.fileno()).st_size:
+            return items_by_kind, replayed
+    with open(path, 'rb+') as f:
+        f.truncate(good_length)
+    return items_by_kind, replayed
+
+def compact_journal(data_file: str | None = None):
+    """Folds the journal into a fresh snapshot of the data file, in the snapshot's own format."""
+    storage = open_storage(data_file)
+    with _journal_lock:
+        items_by_kind, _ = _read_ledger(storage)
+        _write_snapshot(storage, items_by_kind)
+
+def wait_for_compaction():
+    """Returns once the background compaction in progress, if any, has finished."""
+    thread = _compaction_thread
+    if thread is not None and thread is not threading.current_thread():
+        thread.join()
+
+def _start_compaction(data_file: str):
+    global _compaction_thread
+    if _compaction_thread is not None and _compaction_thread.is_alive():
+        return
+    # Not a daemon thread, so an exiting program still finishes a compaction it started
+    _compaction_thread = threading.Thread(target=compact_journal, args=(data_file,), name="journal-compaction")
+    _compaction_thread.start()
+
+# --- Storage Backends ---
+# A backend stores the three item lists at a path. It offers load(progress=None) -> {kind: items}
+# (calling progress(done, total) as it reads, in whatever units suit it), iter_items(start_date,
+# end_date) to stream (kind, item) pairs, save(items_by_kind) for a full rewrite, append(item)
+# for a single new item and append_many(items) for a batch in one write. The backend is picked
+# from the first bytes of an existing data file (SNAPSHOT_SIGNATURES), else from its extension;
+# anything not listed in STORAGE_BACKENDS is JSON.
+# Entries are "module:ClassName" strings so optional backends are only imported when used.
+class StorageError(Exception):
+    """Raised by storage backends when the stored data cannot be read."""
+
+class NotALedgerError(StorageError):
+    """Raised when a data file is readable but holds something other than a ledger."""
+
+class JsonStorage:
+    """JSON snapshot plus append-only journal (see Data Persistence Functions). Subclasses can
+    keep the journal and store the snapshot in another format by overriding _read_snapshot,
+    _snapshot_journal_id, _write_snapshot_file and iter_items."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read_snapshot(self, on_read=None) -> tuple[dict[str, list], str | None]:
+        """Returns the snapshot's items by kind and its journal id (None without a snapshot)."""
+        items_by_kind = {kind: [] for kind in ITEM_KINDS}
+        journal_id = None
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for key, value in _iter_snapshot(f, on_read):
+                    if key in ITEM_KINDS:
+                        items_by_kind[key].append(_item_from_dict(key, value))
+                    elif key == "journal_id":
+                        journal_id = value
+        return items_by_kind, journal_id
+
+    def _snapshot_journal_id(self) -> str | None:
+        journal_id = None
+        with open(self.path, 'r') as f:
+            for key, value in _iter_snapshot(f):
+                if key == "journal_id":
+                    journal_id = value
+        return journal_id
+
+    def _write_snapshot_file(self, items_by_kind: dict[str, list], journal_id: str):
+        data_to_save = {kind: [_item_to_dict(item) for item in items] for kind, items in items_by_kind.items()}
+        data_to_save["journal_id"] = journal_id
+        _write_atomically(self.path, json.dumps(data_to_save, indent=4))
+
+    def load(self, progress=None) -> dict[str, list]:
+        if not os.path.exists(self.path) and not os.path.exists(journal_path(self.path)):
+            return {kind: [] for kind in ITEM_KINDS}
+        with _journal_lock:
+            items_by_kind, replayed = _read_ledger(self, progress)
+            _journal_records[self.path] = replayed
+        if replayed:
+            print(f"Replayed {replayed} journal records from {journal_path(self.path)}")
+        if replayed >= JOURNAL_COMPACTION_THRESHOLD:
+            _start_compaction(self.path)
+        return items_by_kind
+
+    def iter_items(self, start_date: datetime.date | None = None, end_date: datetime.date | None = None):
+        """Yields (kind, item) pairs straight from the files, without keeping them. Read-only:
+        a stale journal is skipped and a torn record ends the journal, but neither is repaired."""
+        journal_id = None
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for key, value in _iter_snapshot(f):
+                    if key in ITEM_KINDS:
+                        item = _item_from_dict(key, value)
+                        if _item_affects_range(key, item, start_date, end_date):
+                            yield key, item
+                    elif key == "journal_id":
+                        journal_id = value
+        yield from self._iter_journal_items(journal_id, start_date, end_date)
+
+    def _iter_journal_items(self, journal_id: str | None, start_date: datetime.date | None, end_date: datetime.date | None):
+        """Yields the journal's (kind, item) pairs that can count towards the range, if the
+        journal belongs to the snapshot with the given id."""
+        path = journal_path(self.path)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            if not _journal_header_matches(f.readline(), journal_id):
+                return
+            for kind, item, _ in _iter_journal(f):
+                if _item_affects_range(kind, item, start_date, end_date):
+                    yield kind, item
+
+    def save(self, items_by_kind: dict[str, list]):
+        with _journal_lock:
+            _write_snapshot(self, items_by_kind)
+
+    def append(self, item):
+        self.append_many([item])
+
+    def append_many(self, items: list):
+        """Journals several items with one write and one fsync."""
+        path = journal_path(self.path)
+        record = "".join(json.dumps({"kind": _item_kind(item), "item": _item_to_dict(item)}) + "\n" for item in items)
+        with _journal_lock:
+            if not os.path.exists(path):
+                # No journal yet: it belongs to whatever snapshot is on disk (if any)
+                journal_id = self._snapshot_journal_id() if os.path.exists(self.path) else None
+                _write_atomically(path, _journal_header(journal_id))
+            with open(path, 'a') as f:
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+            instrumentation.count("bytes_written", len(record))
+            _journal_records[self.path] = _journal_records.get(self.path, 0) + len(items)
+            if _journal_records[self.path] >= JOURNAL_COMPACTION_THRESHOLD:
+                _start_compaction(self.path)
+
+STORAGE_BACKENDS: dict[str, str] = {
+    ".db": "sqlite_storage:SqliteStorage",
+    ".sqlite": "sqlite_storage:SqliteStorage",
+    ".sqlite3": "sqlite_storage:SqliteStorage",
+    ".sftb": "binary_storage:BinaryStorage",
+    ".ledger": "partitioned_storage:PartitionedStorage",
+}
+
+# Leading bytes of non-JSON data files. An existing file is opened with the backend its content
+# names, whatever its extension, so e.g. a converted ledger can keep its old file name.
+SNAPSHOT_SIGNATURES: dict[bytes, str] = {
+    b"SQLite format 3\x00": "sqlite_storage:SqliteStorage",
+    b"SFTB": "binary_storage:BinaryStorage",
+    b'{"partitioned_ledger"': "partitioned_storage:PartitionedStorage",
+}
+
+def _sniff_backend(path: str) -> str | None:
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(max(map(len, SNAPSHOT_SIGNATURES)))
+    except OSError:
+        return None
+    for signature, backend in SNAPSHOT_SIGNATURES.items():
+        if head.startswith(signature):
+            return backend
+    return None
+
+def open_storage(path: str | None = None):
+    """Returns the storage backend for a data file (DATA_FILE by default)."""
+    path = path or DATA_FILE
+    backend = _sniff_backend(path) or STORAGE_BACKENDS.get(os.path.splitext(path)[1].lower())
+    if backend is None:
+        return JsonStorage(path)
+    module_name, class_name = backend.split(":")
+    return getattr(importlib.import_module(module_name), class_name)(path)
+
+def convert_ledger(source_path: str, target_path: str):
+    """Copies a ledger (snapshot and journal) into another data file, in the format its name or
+    content selects, replacing what is stored there."""
+    items_by_kind = open_storage(source_path).load()
+    open_storage(target_path).save(items_by_kind)
+    counts = ", ".join(f"{len(items)} {kind.replace('_', ' ')}" for kind, items in items_by_kind.items())
+    print(f"Converted {counts} from {source_path} to {target_path}")
+
+@instrumentation.timed
+def save_data(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], data_file: str | None = None):
+    """Writes all items to the data file (DATA_FILE by default), replacing what is stored there."""
+    data_file = data_file or DATA_FILE
+    open_storage(data_file).save({
+        "incomes": incomes,
+        "recurring_expenses": recurring_expenses,
+        "occasional_expenses": occasional_expenses,
+    })
+    print(f"Data saved to {data_file}")
+
+@instrumentation.timed
+def append_item(item, data_file: str | None = None):
+    """Saves one newly added item without rewriting the rest of the data file."""
+    data_file = data_file or DATA_FILE
+    open_storage(data_file).append(item)
+    print(f"Data saved to {data_file}")
+
+@instrumentation.timed
+def append_items(items: list, data_file: str | None = None):
+    """Saves several newly added items in one write."""
+    data_file = data_file or DATA_FILE
+    open_storage(data_file).append_many(items)
+    print(f"Data saved to {data_file}")
+
+# --- Background Saving ---
+# The GUI hands new items to a BackgroundSaver instead of writing them itself. Items added in
+# quick succession are written together once no new item has arrived for SAVE_DEBOUNCE_SECONDS
+# (or SAVE_MAX_DELAY_SECONDS after the first one at the latest), on the saver's own thread.
+# Journal appends and snapshots are fsynced and snapshots are replaced atomically, so a crash
+# loses at most the items still waiting, never the ledger already on disk.
+SAVE_DEBOUNCE_SECONDS = 0.5
+SAVE_MAX_DELAY_SECONDS = 5.0
+SAVE_CLOSE_TIMEOUT_SECONDS = 10.0
+
+class BackgroundSaver:
+    """Coalesces appended items into batched writes on a background thread. on_saved(items) is
+    called on that thread after each successful write. A failed write is retried after the
+    debounce delay and its error is kept in last_error until a write succeeds. Writes go
+    through watcher.own_write() when a DataFileWatcher is given. Pending items are flushed by
+    close(), which also runs at interpreter exit."""
+
+    def __init__(self, data_file: str | None = None, delay: float = SAVE_DEBOUNCE_SECONDS, max_delay: float = SAVE_MAX_DELAY_SECONDS, on_saved=None,
+                 watcher: "DataFileWatcher | None" = None):
+        self.data_file = data_file
+        self.watcher = watcher
+        self.delay = delay
+        self.max_delay = max_delay
+        self.on_saved = on_saved
+        self._condition = threading.Condition()
+        self._pending: list = []
+        self._in_flight = 0
+        self._first_pending_at: float | None = None
+        self._last_pending_at: float | None = None
+        self._flush_requested = False
+        self._closed = False
+        self.last_error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, name="background-save", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, item):
+        """Queues an item for the next write."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("BackgroundSaver is closed")
+            now = time.monotonic()
+            self._pending.append(item)
+            if self._first_pending_at is None:
+                self._first_pending_at = now
+            self._last_pending_at = now
+            self._condition.notify_all()
+
+    def busy(self) -> bool:
+        """True while items are waiting or being written."""
+        with self._condition:
+            return bool(self._pending) or self._in_flight > 0
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Writes pending items now and waits for them. Returns False if they are still not
+        written when the timeout runs out."""
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def close(self, timeout: float = SAVE_CLOSE_TIMEOUT_SECONDS):
+        """Flushes and stops the saver thread. Safe to call more than once."""
+        with self._condition:
+            if self._closed:
+                return
+        if not self.flush(timeout):
+            with self._condition:
+                print(f"Warning: {len(self._pending) + self._in_flight} items could not be saved.")
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def _next_batch(self) -> list | None:
+        """Waits until a batch is due and takes it, or returns None once closed."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+                if self._pending:
+                    now = time.monotonic()
+                    due = min(self._last_pending_at + self.delay, self._first_pending_at + self.max_delay)
+                    if self._flush_requested or now >= due:
+                        break
+                    self._condition.wait(due - now)
+                else:
+                    self._condition.wait()
+            batch, self._pending = self._pending, []
+            self._in_flight = len(batch)
+            self._first_pending_at = self._last_pending_at = None
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                with self.watcher.own_write() if self.watcher is not None else contextlib.nullcontext():
+                    append_items(batch, self.data_file)
+            except Exception as e: # Whatever went wrong, the thread must live on to retry
+                print(f"Error saving data to {self.data_file or DATA_FILE}: {e!r}. Retrying.")
+                with self._condition:
+                    self.last_error = e
+                    # Back in front of anything added meanwhile, tried again after the delay
+                    self._pending[:0] = batch
+                    self._in_flight = 0
+                    self._first_pending_at = self._last_pending_at = time.monotonic()
+                    self._flush_requested = False
+                    self._condition.notify_all()
+                continue
+            if self.on_saved is not None:
+                try:
+                    self.on_saved(batch)
+                except Exception as e:
+                    print(f"Error after saving data: {e}")
+            with self._condition:
+                self.last_error = None
+                self._in_flight = 0
+                if not self._pending:
+                    self._flush_requested = False
+                self._condition.notify_all()
+
+@instrumentation.timed
+def load_data(data_file: str | None = None, progress=None) -> tuple[list[Income], list[RecurringExpense], list[OccasionalExpense]]:
+    """Loads every item of the data file (DATA_FILE by default). progress(done, total) is
+    called from the loading thread as the file is read."""
+    data_file = data_file or DATA_FILE
+    try:
+        items_by_kind = open_storage(data_file).load(progress)
+    except (json.JSONDecodeError, KeyError, TypeError, StorageError) as e:
+        print(f"Error loading data from {data_file}: {e}. Starting with empty data.")
         # Return empty lists in case of file corruption or format issues
-        return [], [], []
+        return IndexedItemList(), IndexedItemList(), IndexedItemList()
+
+    if any(items_by_kind.values()):
+        print(f"Data loaded from {data_file}")
+    # Indexed lists keep one-off items in a date index and tell caches about every change
+    return tuple(IndexedItemList(items_by_kind[kind]) for kind in ITEM_KINDS)
+
+# --- Streaming Loader ---
+# For ledgers too large to hold in memory: items are read one at a time from the storage
+# backend and dropped once used, so a summary-only run stays at flat memory.
+def _item_affects_range(kind: str, item, start_date: datetime.date | None, end_date: datetime.date | None) -> bool:
+    """False for items that cannot count towards [start_date, end_date]. Either bound may be None."""
+    date_obj = item.start_date if kind == "recurring_expenses" else item.date
+    if end_date is not None and date_obj > end_date:
+        return False
+    if kind == "recurring_expenses" or (kind == "incomes" and item.frequency != "once"):
+        return True # Recurring items started before the range may still fall into it
+    return start_date is None or date_obj >= start_date
+
+def iter_ledger(data_file: str | None = None, start_date: datetime.date | None = None, end_date: datetime.date | None = None):
+    """Yields (kind, item) for every stored item as it is read, optionally only the items that
+    can count towards [start_date, end_date]. Nothing is kept after it has been yielded."""
+    yield from open_storage(data_file).iter_items(start_date, end_date)
+
+def summarize_ledger(start_date: datetime.date, end_date: datetime.date, data_file: str | None = None) -> dict:
+    """Same totals as calculate_period_summaries for one period, streamed from the data file."""
+    totals = {"income": 0.0, "recurring_expenses": 0.0, "occasional_expenses": 0.0}
+    for kind, item in iter_ledger(data_file, start_date, end_date):
+        if kind == "incomes":
+            if item.frequency in INCOME_FREQUENCIES:
+                totals["income"] += item.amount * count_occurrences(item.date, item.frequency, start_date, end_date)
+        elif kind == "recurring_expenses":
+            totals["recurring_expenses"] += item.amount * count_occurrences(item.start_date, item.frequency, start_date, end_date)
+        else:
+            totals["occasional_expenses"] += item.amount
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        **totals,
+        "net": totals["income"] - totals["recurring_expenses"] - totals["occasional_expenses"],
+    }
 
-    return incomes, recurring_expenses, occasional_expenses
+# --- Data File Change Detection ---
+class DataFileWatcher:
+    """Tells whether the data file changed since we last loaded or wrote it.
+
+    Watches the data file together with its JSON journal or SQLite write-ahead log. A file
+    counts as unchanged while its size and modification time match what was recorded; when
+    they differ its content hash is compared, so touching a file without changing it does not
+    force a reload. Hashes are only recomputed for files whose size or time changed. Our own
+    writes go through own_write(), so they are not mistaken for another writer's.
+    """
+
+    def __init__(self, data_file: str | None = None):
+        self.data_file = data_file or DATA_FILE
+        self._seen: dict[str, tuple[tuple[int, int] | None, str | None]] = {} # path -> (mtime/size, hash)
+        self._lock = threading.Lock() # Checks and writes may come from different threads
+
+    def _watched_paths(self) -> list[str]:
+        return [self.data_file, journal_path(self.data_file), self.data_file + "-wal"]
+
+    @staticmethod
+    def _stat(path: str) -> tuple[int, int] | None:
+        try:
+            stat_result = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat_result.st_mtime_ns, stat_result.st_size
+
+    @staticmethod
+    def _hash(path: str) -> str | None:
+        digest = hashlib.blake2b()
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            return None
+        return digest.hexdigest()
+
+    def signature(self) -> dict[str, tuple[tuple[int, int] | None, str | None]]:
+        """The files as they are now. Taken before a load and passed to acknowledge() after it,
+        a change made while loading is still reported by has_changed()."""
+        with self._lock:
+            return self._signature()
+
+    def _signature(self) -> dict[str, tuple[tuple[int, int] | None, str | None]]:
+        signatures = {}
+        for path in self._watched_paths():
+            signature = self._stat(path)
+            seen = self._seen.get(path)
+            signatures[path] = seen if seen is not None and seen[0] == signature else (signature, self._hash(path) if signature else None)
+        return signatures
+
+    def acknowledge(self, signature: dict | None = None):
+        """Records the files as given by signature(), or as they are now."""
+        with self._lock:
+            if signature is None:
+                self._acknowledge()
+            else:
+                self._seen.update(signature)
+
+    def _acknowledge(self):
+        self._seen.update(self._signature())
+
+    def has_changed(self) -> bool:
+        """True if another writer changed any watched file since the last acknowledge()."""
+        with self._lock:
+            return self._has_changed()
+
+    def _has_changed(self) -> bool:
+        for path in self._watched_paths():
+            signature = self._stat(path)
+            seen_signature, seen_hash = self._seen.get(path, (None, None))
+            if signature == seen_signature:
+                continue
+            if signature is None or seen_hash is None or self._hash(path) != seen_hash:
+                return True
+            self._seen[path] = (signature, seen_hash) # Touched, same content
+        return False
+
+    @contextlib.contextmanager
+    def own_write(self):
+        """Wraps a write of ours to the watched files. Afterwards the files count as seen, unless
+        another writer had already changed them before it: then has_changed() stays True, so
+        their changes are still loaded instead of being taken for ours."""
+        with self._lock:
+            unchanged = not self._has_changed()
+        yield
+        # A compaction the write started rewrites the files on its own thread; it is part of
+        # our write, so wait for it before recording the files
+        wait_for_compaction()
+        if unchanged:
+            with self._lock:
+                self._acknowledge()
+
+# --- Recurrence Engine ---
+# Every dated item is a stream of payments: index 0 is the item's own date, index k is the
+# k-th payment after it. The helpers below locate payments by arithmetic instead of walking
+# the stream, so the cost of a summary no longer depends on how long ago an item started.
+# Frequencies other than "weekly", "monthly" and "annually" have a single payment at index 0.
+RECURRING_FREQUENCIES = ("weekly", "monthly", "annually")
+
+def _month_index(date_obj: datetime.date) -> int:
+    return date_obj.year * 12 + date_obj.month - 1
+
+def _monthly_day(anchor: datetime.date, index: int) -> int:
+    """Day of month of the index-th monthly payment.
+
+    A payment that does not fit in a short month is moved to that month's last day and keeps
+    that day from then on (Jan 31 -> Feb 28 -> Mar 28). Any 24 consecutive months contain a
+    non-leap February, so looking past that window can never lower the day further.
+    """
+    day = anchor.day
+    if day <= 28:
+        return day
+    first_month = _month_index(anchor)
+    for offset in range(1, min(index, 24) + 1):
+        year, month = divmod(first_month + offset, 12)
+        day = min(day, calendar.monthrange(year, month + 1)[1])
+    return day
+
+def occurrence_date(anchor: datetime.date, frequency: str, index: int) -> datetime.date:
+    """Returns the date of the index-th payment of an item starting on anchor."""
+    if frequency == "weekly":
+        return anchor + datetime.timedelta(days=7 * index)
+    if frequency == "monthly":
+        year, month = divmod(_month_index(anchor) + index, 12)
+        return datetime.date(year, month + 1, _monthly_day(anchor, index))
+    if frequency == "annually":
+        if index > 0 and anchor.month == 2 and anchor.day == 29:
+            return datetime.date(anchor.year + index, 2, 28) # Feb 29 falls back to Feb 28 for good
+        return anchor.replace(year=anchor.year + index)
+    return anchor
+
+def first_occurrence_index(anchor: datetime.date, frequency: str, start_date: datetime.date) -> int:
+    """Returns the index of the first payment on or after start_date."""
+    if start_date <= anchor:
+        return 0
+    if frequency == "weekly":
+        return -(-(start_date - anchor).days // 7)
+    if frequency == "monthly":
+        index = _month_index(start_date) - _month_index(anchor)
+    elif frequency == "annually":
+        index = start_date.year - anchor.year
+    else:
+        return 1
+    # index now points at the payment in the same month/year as start_date
+    return index if occurrence_date(anchor, frequency, index) >= start_date else index + 1
+
+def last_occurrence_index(anchor: datetime.date, frequency: str, end_date: datetime.date) -> int:
+    """Returns the index of the last payment on or before end_date (-1 if there is none)."""
+    if end_date < anchor:
+        return -1
+    if frequency == "weekly":
+        return (end_date - anchor).days // 7
+    if frequency == "monthly":
+        index = _month_index(end_date) - _month_index(anchor)
+    elif frequency == "annually":
+        index = end_date.year - anchor.year
+    else:
+        return 0
+    return index if occurrence_date(anchor, frequency, index) <= end_date else index - 1
+
+def iter_occurrences(anchor: datetime.date, frequency: str, start_date: datetime.date, end_date: datetime.date):
+    """Yields the payment dates of an item starting on anchor that fall within [start_date, end_date], in order."""
+    if anchor > end_date or start_date > end_date:
+        return
+    for index in range(first_occurrence_index(anchor, frequency, start_date), last_occurrence_index(anchor, frequency, end_date) + 1):
+        yield occurrence_date(anchor, frequency, index)
+
+def count_occurrences(anchor: datetime.date, frequency: str, start_date: datetime.date, end_date: datetime.date) -> int:
+    """Returns how many payments of an item starting on anchor fall within [start_date, end_date]."""
+    if anchor > end_date or start_date > end_date:
+        return 0
+    first = first_occurrence_index(anchor, frequency, start_date)
+    last = last_occurrence_index(anchor, frequency, end_date)
+    return max(0, last - first + 1)
+
+# --- Date Index ---
+class _FenwickTree:
+    """Prefix sums over positions 1..capacity. The capacity is a power of two and doubles on
+    demand: the nodes of the new half cover only (empty) new positions, except the last one,
+    which covers everything, so growing never rebuilds the existing nodes."""
+
+    def __init__(self):
+        self._tree = [0.0, 0.0] # 1-based, capacity 1
+        self.total = 0.0
+
+    def add(self, position: int, amount: float):
+        capacity = len(self._tree) - 1
+        while position > capacity:
+            self._tree.extend([0.0] * capacity)
+            capacity *= 2
+            self._tree[capacity] = self.total
+        self.total += amount
+        while position <= capacity:
+            self._tree[position] += amount
+            position += position & -position
+
+    def prefix_sum(self, position: int) -> float:
+        position = min(position, len(self._tree) - 1)
+        result = 0.0
+        while position > 0:
+            result += self._tree[position]
+            position -= position & -position
+        return result
+
+class DateIndex:
+    """Dated items and their amounts, answering range totals in O(log days).
+
+    Amounts are summed per day in two Fenwick trees around the first date ever indexed (the
+    base): one counting days forward from it and one counting days backward, so dates on
+    either side can be added without re-basing. A sorted list of distinct dates with per-day
+    buckets lists the items of a range in date order.
+    """
+
+    def __init__(self):
+        self._base: int | None = None
+        self._after = _FenwickTree() # position = ordinal - base + 1
+        self._before = _FenwickTree() # position = base - ordinal
+        self._ordinals: list[int] = []
+        self._items_by_ordinal: dict[int, list] = {}
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._items_by_ordinal.values())
+
+    def _add_amount(self, ordinal: int, amount: float):
+        if self._base is None:
+            self._base = ordinal
+        if ordinal >= self._base:
+            self._after.add(ordinal - self._base + 1, amount)
+        else:
+            self._before.add(self._base - ordinal, amount)
+
+    def add(self, date_obj: datetime.date, amount: float, item):
+        ordinal = date_obj.toordinal()
+        self._add_amount(ordinal, amount)
+        bucket = self._items_by_ordinal.get(ordinal)
+        if bucket is None:
+            bucket = self._items_by_ordinal[ordinal] = []
+            bisect.insort(self._ordinals, ordinal)
+        bucket.append(item)
+
+    def remove(self, date_obj: datetime.date, amount: float, item):
+        ordinal = date_obj.toordinal()
+        bucket = self._items_by_ordinal[ordinal]
+        bucket.remove(item)
+        self._add_amount(ordinal, -amount)
+        if not bucket:
+            del self._items_by_ordinal[ordinal]
+            del self._ordinals[bisect.bisect_left(self._ordinals, ordinal)]
+
+    def total(self, start_date: datetime.date, end_date: datetime.date) -> float:
+        """Sum of the amounts dated within [start_date, end_date]."""
+        if self._base is None or start_date > end_date:
+            return 0.0
+        first, last, base = start_date.toordinal(), end_date.toordinal(), self._base
+        total = 0.0
+        if last >= base:
+            total += self._after.prefix_sum(last - base + 1) - self._after.prefix_sum(max(first, base) - base)
+        if first < base:
+            total += self._before.prefix_sum(base - first) - self._before.prefix_sum(base - min(last, base - 1) - 1)
+        return total
+
+    def items_between(self, start_date: datetime.date, end_date: datetime.date):
+        """Yields the items dated within [start_date, end_date] in date order."""
+        low = bisect.bisect_left(self._ordinals, start_date.toordinal())
+        high = bisect.bisect_right(self._ordinals, end_date.toordinal())
+        for ordinal in self._ordinals[low:high]:
+            yield from self._items_by_ordinal[ordinal]
+
+# --- Tag Index ---
+class TagIndex:
+    """Inverted index from tag to the expenses carrying it, with per-tag range totals.
+
+    Recurring expenses are listed per tag and counted with the recurrence engine. One-off
+    expenses are bucketed per tag and month with a running sum per bucket, so whole months of
+    a range are read from the sums and only items in a partially covered first or last month
+    are looked at one by one. An item carrying a tag twice counts twice, like it always has.
+    """
+
+    def __init__(self):
+        self._recurring: dict[str, list] = {}
+        self._one_off: dict[str, dict[int, list]] = {} # tag -> month index -> items
+        self._one_off_sums: dict[str, dict[int, float]] = {}
+
+    @staticmethod
+    def _date(item) -> datetime.date | None:
+        date_obj = item.start_date if isinstance(item, RecurringExpense) else getattr(item, "date", None)
+        return date_obj if isinstance(date_obj, datetime.date) else None
+
+    def add(self, item):
+        date_obj = self._date(item)
+        if date_obj is None or not getattr(item, "tags", None):
+            return
+        for tag in item.tags:
+            if isinstance(item, RecurringExpense):
+                self._recurring.setdefault(tag, []).append(item)
+            else:
+                month = _month_index(date_obj)
+                self._one_off.setdefault(tag, {}).setdefault(month, []).append(item)
+                sums = self._one_off_sums.setdefault(tag, {})
+                sums[month] = sums.get(month, 0.0) + item.amount
+
+    def remove(self, item):
+        date_obj = self._date(item)
+        if date_obj is None or not getattr(item, "tags", None):
+            return
+        for tag in item.tags:
+            if isinstance(item, RecurringExpense):
+                self._recurring[tag].remove(item)
+                if not self._recurring[tag]:
+                    del self._recurring[tag]
+                continue
+            month = _month_index(date_obj)
+            months, sums = self._one_off[tag], self._one_off_sums[tag]
+            months[month].remove(item)
+            sums[month] -= item.amount
+            if not months[month]:
+                del months[month], sums[month]
+            if not months:
+                del self._one_off[tag], self._one_off_sums[tag]
+
+    def tags(self) -> list[str]:
+        return sorted(self._recurring.keys() | self._one_off.keys())
+
+    def items_with_tag(self, tag: str) -> list:
+        items = list(self._recurring.get(tag, []))
+        for month_items in self._one_off.get(tag, {}).values():
+            items.extend(month_items)
+        return items
+
+    def totals(self, start_date: datetime.date, end_date: datetime.date, tags: list[str] | None = None) -> dict[str, float]:
+        """Spend per tag in [start_date, end_date] for the given tags (all tags by default).
+        Only tags with at least one payment in the range are returned."""
+        if start_date > end_date:
+            return {}
+        first_month, last_month = _month_index(start_date), _month_index(end_date)
+        first_full = first_month if start_date.day == 1 else first_month + 1
+        last_full = last_month if end_date == month_period(end_date.year, end_date.month)[1] else last_month - 1
+        partial_months = {month for month in (first_month, last_month) if not first_full <= month <= last_full}
+
+        totals: dict[str, float] = {}
+        for tag in (self.tags() if tags is None else tags):
+            total, hit = 0.0, False
+            months = self._one_off.get(tag)
+            if months:
+                sums = self._one_off_sums[tag]
+                if last_full - first_full + 1 <= len(months):
+                    full_months = (month for month in range(first_full, last_full + 1) if month in months)
+                else:
+                    full_months = (month for month in months if first_full <= month <= last_full)
+                for month in full_months:
+                    total += sums[month]
+                    hit = True
+                for month in partial_months:
+                    for item in months.get(month, ()):
+                        if start_date <= item.date <= end_date:
+                            total += item.amount
+                            hit = True
+            for item in self._recurring.get(tag, ()):
+                occurrences = count_occurrences(item.start_date, item.frequency, start_date, end_date)
+                if occurrences:
+                    total += item.amount * occurrences
+                    hit = True
+            if hit:
+                totals[tag] = total
+        return totals
+
+def _index_date(item) -> datetime.date | None:
+    """Date under which a DateIndex keeps an item, or None for items it does not cover."""
+    if isinstance(item, OccasionalExpense) or (isinstance(item, Income) and item.frequency == "once"):
+        if isinstance(item.date, datetime.date):
+            return item.date
+    return None
+
+class IndexedItemList(list):
+    """A list of ledger items that keeps its one-off items in a DateIndex and its tagged
+    expenses in a TagIndex.
+
+    The indexes follow every change made through the list (append, extend, insert, remove,
+    del, ...), so items added with the add_*_item functions are indexed as they arrive. Items
+    the index does not cover (recurring items, items without a valid date) are kept in
+    `unindexed` for the calculators to handle one by one. Callbacks registered with
+    add_listener(callback) are called as callback(item, added) after every item that enters
+    (added=True) or leaves (added=False) the list. Editing an item's date or amount in place is
+    not tracked; remove and re-add it instead.
+    """
+
+    def __init__(self, iterable=()):
+        super().__init__()
+        self.date_index = DateIndex()
+        self.tag_index = TagIndex()
+        self.unindexed: list = []
+        self._listeners: list = []
+        self.extend(iterable)
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    # Copies and pickles are rebuilt from the items, so they get indexes of their own and no
+    # listeners (those follow the original list)
+    def __reduce_ex__(self, protocol):
+        return type(self), (list(self),)
+
+    def __copy__(self):
+        return type(self)(self)
+
+    def _track(self, item):
+        date_obj = _index_date(item)
+        if date_obj is None:
+            self.unindexed.append(item)
+        else:
+            self.date_index.add(date_obj, item.amount, item)
+        self.tag_index.add(item)
+        for callback in self._listeners:
+            callback(item, True)
+
+    def _untrack(self, item):
+        date_obj = _index_date(item)
+        if date_obj is None:
+            self.unindexed.remove(item)
+        else:
+            self.date_index.remove(date_obj, item.amount, item)
+        self.tag_index.remove(item)
+        for callback in self._listeners:
+            callback(item, False)
+
+    def append(self, item):
+        super().append(item)
+        self._track(item)
+
+    def extend(self, items):
+        items = list(items)
+        super().extend(items)
+        for item in items:
+            self._track(item)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __imul__(self, count):
+        copies = list(self) * (max(count, 1) - 1)
+        if count <= 0:
+            self.clear()
+        self.extend(copies)
+        return self
+
+    def insert(self, position, item):
+        super().insert(position, item)
+        self._track(item)
+
+    def remove(self, item):
+        super().remove(item)
+        self._untrack(item)
+
+    def pop(self, position=-1):
+        item = super().pop(position)
+        self._untrack(item)
+        return item
+
+    def clear(self):
+        removed = list(self)
+        super().clear()
+        self.date_index = DateIndex()
+        self.tag_index = TagIndex()
+        self.unindexed = []
+        for item in removed:
+            for callback in self._listeners:
+                callback(item, False)
+
+    def __setitem__(self, key, value):
+        removed = self[key] if isinstance(key, slice) else [self[key]]
+        added = list(value) if isinstance(key, slice) else [value]
+        super().__setitem__(key, added if isinstance(key, slice) else value)
+        for item in removed:
+            self._untrack(item)
+        for item in added:
+            self._track(item)
+
+    def __delitem__(self, key):
+        removed = self[key] if isinstance(key, slice) else [self[key]]
+        super().__delitem__(key)
+        for item in removed:
+            self._untrack(item)
+
+def _indexed_total(item_list: list, start_date: datetime.date, end_date: datetime.date) -> tuple[float, list]:
+    """Splits a total into the part answered by the list's DateIndex and the items still to scan."""
+    if isinstance(item_list, IndexedItemList) and isinstance(start_date, datetime.date) and isinstance(end_date, datetime.date):
+        return item_list.date_index.total(start_date, end_date), item_list.unindexed
+    return 0.0, item_list
 
 # --- Functions to calculate summaries ---
+INCOME_FREQUENCIES = ("once", "weekly", "monthly") # Other income frequencies are not counted yet
+
+@instrumentation.timed
 def calculate_total_income(income_list: list[Income], start_date: datetime.date, end_date: datetime.date) -> float:
-    total = 0.0
-    for item in income_list:
+    total, items = _indexed_total(income_list, start_date, end_date)
+    occurrences = 0
+    for item in items:
         if not all([isinstance(d, datetime.date) for d in [item.date, start_date, end_date]]):
             # print(f"Warning: Skipping income item '{item.source}' due to None date in calculation period.")
             continue
-
-        if item.frequency == "once":
-            if start_date <= item.date <= end_date:
-                total += item.amount
-        elif item.frequency == "weekly":
-            if item.date <= end_date: # Ensure the income starts before or during the period end
-                current_date = item.date
-                while current_date <= end_date:
-                    if current_date >= start_date:
-                        total += item.amount
-                    current_date += datetime.timedelta(days=7)
-        elif item.frequency == "monthly":
-            if item.date <= end_date: # Ensure the income starts before or during the period end
-                current_month_date = item.date
-                while current_month_date <= end_date:
-                    if current_month_date >= start_date:
-                        total += item.amount
-                    # Move to next month
-                    next_m, next_y = (current_month_date.month % 12) + 1, current_month_date.year + (current_month_date.month // 12)
-                    try:
-                        current_month_date = current_month_date.replace(year=next_y, month=next_m)
-                    except ValueError: # Handles day not in next month e.g. Jan 31 to Feb
-                        import calendar
-                        last_day_of_next_month = calendar.monthrange(next_y, next_m)[1]
-                        current_month_date = current_month_date.replace(year=next_y, month=next_m, day=last_day_of_next_month)
-
+        if item.frequency in INCOME_FREQUENCIES:
+            item_occurrences = count_occurrences(item.date, item.frequency, start_date, end_date)
+            occurrences += item_occurrences
+            total += item.amount * item_occurrences
+    instrumentation.count("items_scanned", len(items))
+    instrumentation.count("occurrences_counted", occurrences)
     return total
 
+@instrumentation.timed
 def calculate_total_recurring_expenses(expense_list: list[RecurringExpense], start_date: datetime.date, end_date: datetime.date) -> float:
     total = 0.0
+    occurrences = 0
     for item in expense_list:
         if not all([isinstance(d, datetime.date) for d in [item.start_date, start_date, end_date]]):
             # print(f"Warning: Skipping recurring expense item '{item.description}' due to None date in calculation period.")
             continue
-
-        if item.start_date > end_date: # Expense starts after the period ends
-            continue
-
-        current_payment_date = item.start_date
-        while current_payment_date <= end_date:
-            if current_payment_date >= start_date: # Payment occurs within the period
-                total += item.amount
-
-            if item.frequency == "weekly":
-                current_payment_date += datetime.timedelta(days=7)
-            elif item.frequency == "monthly":
-                # Advance to the next month, keeping the day the same (or last day of month if original day is too large)
-                next_month = current_payment_date.month + 1
-                next_year = current_payment_date.year
-                if next_month > 12:
-                    next_month = 1
-                    next_year += 1
-                try:
-                    current_payment_date = current_payment_date.replace(year=next_year, month=next_month)
-                except ValueError: # Handles cases like advancing from Jan 31st to Feb
-                    import calendar
-                    last_day_of_next_month = calendar.monthrange(next_year, next_month)[1]
-                    current_payment_date = current_payment_date.replace(year=next_year, month=next_month, day=last_day_of_next_month)
-            elif item.frequency == "annually":
-                try:
-                    current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1)
-                except ValueError: # handles leap year Feb 29
-                     current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1, day=28)
-            else: # Unknown frequency
-                break # Avoid infinite loop for unknown frequencies
+        # Unknown frequencies count their start date only
+        item_occurrences = count_occurrences(item.start_date, item.frequency, start_date, end_date)
+        occurrences += item_occurrences
+        total += item.amount * item_occurrences
+    instrumentation.count("items_scanned", len(expense_list))
+    instrumentation.count("occurrences_counted", occurrences)
     return total
 
+@instrumentation.timed
 def calculate_total_occasional_expenses(expense_list: list[OccasionalExpense], start_date: datetime.date, end_date: datetime.date) -> float:
-    total = 0.0
-    for item in expense_list:
+    total, items = _indexed_total(expense_list, start_date, end_date)
+    for item in items:
         if not all([isinstance(d, datetime.date) for d in [item.date, start_date, end_date]]):
             # print(f"Warning: Skipping occasional expense item '{item.description}' due to None date in calculation period.")
             continue
         if start_date <= item.date <= end_date:
             total += item.amount
+    instrumentation.count("items_scanned", len(items))
     return total
 
+# --- Multi-period summaries ---
+def month_period(year: int, month: int) -> tuple[datetime.date, datetime.date]:
+    """Returns the first and last day of a month."""
+    _, num_days = calendar.monthrange(year, month)
+    return datetime.date(year, month, 1), datetime.date(year, month, num_days)
+
+@instrumentation.timed
+def calculate_period_summaries(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], periods: list[tuple[datetime.date, datetime.date]]) -> list[dict]:
+    """Summarises many (start_date, end_date) periods in a single pass over the items.
+
+    Every item adds its running total at each period boundary, so a period's total is the
+    difference between the values at its end and its start. One-off items are dropped into the
+    bucket between two boundaries (one bisect each), recurring items are counted with the
+    recurrence engine. Periods may overlap and come in any order; results follow their order.
+    """
+    one_day = datetime.timedelta(days=1)
+    boundaries = sorted({start for start, _ in periods} | {end + one_day for _, end in periods})
+    num_boundaries = len(boundaries)
+    # Per category: amounts of one-off items between consecutive boundaries, plus the running
+    # total of recurring payments made before each boundary.
+    buckets = {key: [0.0] * num_boundaries for key in ("income", "recurring_expenses", "occasional_expenses")}
+    running = {key: [0.0] * num_boundaries for key in buckets}
+
+    def add_one_off(key: str, date_obj: datetime.date, amount: float):
+        position = bisect.bisect_right(boundaries, date_obj) - 1
+        if 0 <= position < num_boundaries:
+            buckets[key][position] += amount
+
+    def add_recurring(key: str, anchor: datetime.date, frequency: str, amount: float):
+        totals = running[key]
+        for position, boundary in enumerate(boundaries):
+            if boundary > anchor:
+                totals[position] += amount * (last_occurrence_index(anchor, frequency, boundary - one_day) + 1)
+
+    for item in incomes:
+        if not isinstance(item.date, datetime.date) or item.frequency not in INCOME_FREQUENCIES:
+            continue
+        if item.frequency == "once":
+            add_one_off("income", item.date, item.amount)
+        else:
+            add_recurring("income", item.date, item.frequency, item.amount)
+    for item in recurring_expenses:
+        if isinstance(item.start_date, datetime.date):
+            add_recurring("recurring_expenses", item.start_date, item.frequency, item.amount)
+    for item in occasional_expenses:
+        if isinstance(item.date, datetime.date):
+            add_one_off("occasional_expenses", item.date, item.amount)
+
+    # Running total of everything before each boundary
+    cumulative = {}
+    for key in buckets:
+        values, so_far = [], 0.0
+        for position in range(num_boundaries):
+            values.append(so_far + running[key][position])
+            so_far += buckets[key][position]
+        cumulative[key] = values
+
+    summaries = []
+    for start_date, end_date in periods:
+        summary = {"start_date": start_date, "end_date": end_date}
+        for key, values in cumulative.items():
+            if start_date > end_date:
+                summary[key] = 0.0
+            else:
+                summary[key] = values[bisect.bisect_left(boundaries, end_date + one_day)] - values[bisect.bisect_left(boundaries, start_date)]
+        summary["net"] = summary["income"] - summary["recurring_expenses"] - summary["occasional_expenses"]
+        summaries.append(summary)
+    return summaries
+
+# --- Monthly summaries ---
+@instrumentation.timed
+def calculate_tag_totals(recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], start_date: datetime.date, end_date: datetime.date, tags: list[str] | None = None) -> dict[str, float]:
+    """Returns spend per tag in [start_date, end_date], recurring and occasional expenses
+    combined, for the given tags (all tags by default). Indexed lists answer from their
+    TagIndex; plain lists are scanned."""
+    totals: dict[str, float] = {}
+    for expense_list in (recurring_expenses, occasional_expenses):
+        if isinstance(expense_list, IndexedItemList):
+            list_totals = expense_list.tag_index.totals(start_date, end_date, tags)
+        else:
+            scan = TagIndex()
+            for item in expense_list:
+                scan.add(item)
+            list_totals = scan.totals(start_date, end_date, tags)
+        for tag, total in list_totals.items():
+            totals[tag] = totals.get(tag, 0.0) + total
+    return totals
+
+@instrumentation.timed
+def compute_monthly_summary(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], year: int, month: int) -> dict:
+    """Returns the totals, net balance and spend per tag for one month."""
+    start_date, end_date = month_period(year, month)
+    total_inc = calculate_total_income(incomes, start_date, end_date)
+    total_rec_exp = calculate_total_recurring_expenses(recurring_expenses, start_date, end_date)
+    total_occ_exp = calculate_total_occasional_expenses(occasional_expenses, start_date, end_date)
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "income": total_inc,
+        "recurring_expenses": total_rec_exp,
+        "occasional_expenses": total_occ_exp,
+        "net": total_inc - total_rec_exp - total_occ_exp,
+        "tags": calculate_tag_totals(recurring_expenses, occasional_expenses, start_date, end_date),
+    }
+
+class MonthlySummaryCache:
+    """Least-recently-used cache of compute_monthly_summary results keyed by (year, month).
+
+    When the lists are IndexedItemLists (as returned by load_data) the cache listens to them
+    and drops only the months a changed item can affect: its own month for a one-off item,
+    that month and every later one for a recurring item. Plain lists are not watched; call
+    invalidate_item() or clear() after changing them.
+    """
+
+    def __init__(self, incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], max_months: int = 36):
+        self.incomes = incomes
+        self.recurring_expenses = recurring_expenses
+        self.occasional_expenses = occasional_expenses
+        self.max_months = max_months
+        self._summaries: OrderedDict[tuple[int, int], dict] = OrderedDict()
+        for item_list in (incomes, recurring_expenses, occasional_expenses):
+            if isinstance(item_list, IndexedItemList):
+                item_list.add_listener(self._on_item_changed)
+
+    def get(self, year: int, month: int) -> dict:
+        key = (year, month)
+        summary = self._summaries.get(key)
+        if summary is None:
+            summary = compute_monthly_summary(self.incomes, self.recurring_expenses, self.occasional_expenses, year, month)
+            self._summaries[key] = summary
+            if len(self._summaries) > self.max_months:
+                self._summaries.popitem(last=False)
+        else:
+            self._summaries.move_to_end(key)
+        return summary
+
+    def _on_item_changed(self, item, added: bool):
+        self.invalidate_item(item)
+
+    def invalidate_item(self, item):
+        """Drops the cached months that an added or removed item can affect."""
+        date_obj = item.start_date if isinstance(item, RecurringExpense) else item.date
+        if not isinstance(date_obj, datetime.date):
+            return # Undated items are not counted anywhere
+        first_key = (date_obj.year, date_obj.month)
+        if getattr(item, "frequency", "once") in RECURRING_FREQUENCIES:
+            for key in [key for key in self._summaries if key >= first_key]:
+                del self._summaries[key]
+        else:
+            self._summaries.pop(first_key, None)
+
+    def clear(self):
+        self._summaries.clear()
+
+# --- Transaction Timeline ---
+# Every payment in a range as (date, item, amount), amount positive for income and negative for
+# expenses. Each recurring item is a lazy stream of its occurrence dates and one-off items come
+# from the date index, so merging them with a heap holds one pending entry per stream: memory
+# does not grow with the length of the range.
+def _one_off_in_range(item_list: list, start_date: datetime.date, end_date: datetime.date):
+    """One-off items of a list within [start_date, end_date] in date order, and the other items."""
+    if isinstance(item_list, IndexedItemList):
+        return item_list.date_index.items_between(start_date, end_date), item_list.unindexed
+    one_off = sorted(
+        (item for item in item_list if _index_date(item) is not None and start_date <= item.date <= end_date),
+        key=lambda item: item.date,
+    )
+    return one_off, [item for item in item_list if _index_date(item) is None]
+
+def _occurrence_stream(item, anchor: datetime.date, amount: float, start_date: datetime.date, end_date: datetime.date):
+    for date_obj in iter_occurrences(anchor, item.frequency, start_date, end_date):
+        yield date_obj, item, amount
+
+def iter_timeline(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], start_date: datetime.date, end_date: datetime.date):
+    """Yields (date, item, amount) for every payment within [start_date, end_date] in date order.
+    Payments on the same day come incomes first, then recurring and occasional expenses. Counts
+    the same payments as the calculate_total_* functions."""
+    streams = []
+    one_off_incomes, other_incomes = _one_off_in_range(incomes, start_date, end_date)
+    streams.append((item.date, item, item.amount) for item in one_off_incomes)
+    for item in other_incomes:
+        if isinstance(item.date, datetime.date) and item.frequency in INCOME_FREQUENCIES:
+            streams.append(_occurrence_stream(item, item.date, item.amount, start_date, end_date))
+    for item in recurring_expenses:
+        if isinstance(item.start_date, datetime.date):
+            streams.append(_occurrence_stream(item, item.start_date, -item.amount, start_date, end_date))
+    one_off_expenses, _ = _one_off_in_range(occasional_expenses, start_date, end_date)
+    streams.append((item.date, item, -item.amount) for item in one_off_expenses)
+    return heapq.merge(*streams, key=lambda payment: payment[0])
+
+def describe_item(item) -> str:
+    """Short label of an item: the income source or the expense description."""
+    return item.source if isinstance(item, Income) else item.description
+
+TIMELINE_KINDS = {Income: "Income", RecurringExpense: "Recurring", OccasionalExpense: "Occasional"}
+
+def timeline_kind(item) -> str:
+    for item_class, label in TIMELINE_KINDS.items():
+        if isinstance(item, item_class):
+            return label
+    return type(item).__name__
+
+@instrumentation.timed
+def export_timeline_csv(f, incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense], start_date: datetime.date, end_date: datetime.date, starting_balance: float = 0.0) -> int:
+    """Writes the timeline to an open text file as CSV with a running balance, one row at a time.
+    Returns the number of payments written."""
+    writer = csv.writer(f)
+    writer.writerow(["date", "type", "description", "amount", "tags", "balance"])
+    balance, rows = starting_balance, 0
+    for date_obj, item, amount in iter_timeline(incomes, recurring_expenses, occasional_expenses, start_date, end_date):
+        balance += amount
+        writer.writerow([date_obj.isoformat(), timeline_kind(item), describe_item(item), f"{amount:.2f}", ";".join(getattr(item, "tags", ())), f"{balance:.2f}"])
+        rows += 1
+    instrumentation.count("timeline_rows", rows)
+    return rows
+
+# --- Item Search ---
+# Finds items anywhere in the history by label text, tags, amount and date without walking the
+# lists. Labels (income source or expense description) are split into lower-case words: a
+# sorted vocabulary answers word prefixes by bisection, and a fragment is found with str.find
+# over the vocabulary joined into one string, which only ever compares distinct words. Tags
+# and kinds map to the rows carrying them, and amounts and the dates of one-off items are kept
+# in sorted arrays, so a range is two bisections. A query builds the candidates of its most
+# selective filter only and checks the other filters on those.
+_WORD_PATTERN = re.compile(r"\w+")
+_LABEL_FIELDS = {"incomes": "source", "recurring_expenses": "description", "occasional_expenses": "description"}
+
+def _label_words(label: str) -> list[str]:
+    return _WORD_PATTERN.findall(label)
+
+def _sorted_position(keys: array.array, rows: array.array, key, row: int) -> int:
+    """Position of row among the entries of a sorted key array equal to key."""
+    for position in range(bisect.bisect_left(keys, key), bisect.bisect_right(keys, key)):
+        if rows[position] == row:
+            return position
+    raise ValueError(f"Row {row} is not indexed under {key!r}")
+
+class SearchIndex:
+    """Text, tag, amount and date indexes over the items of the three lists.
+
+    Every item is a row; search() returns the (kind, item) pairs matching all the filters it
+    is given. When the lists are IndexedItemLists (as returned by load_data) the index listens
+    to them and follows every change, like MonthlySummaryCache; plain lists are indexed once.
+    """
+
+    def __init__(self, incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense]):
+        self._items: list = [] # Row -> item, None once removed
+        self._kinds: list[str] = []
+        self._labels: list[str] = [] # Row -> lower-case label
+        self._dates: list[datetime.date] = [] # Row -> date or start date (date.min if invalid), for ordering results
+        self._label_rows: dict[str, list[int]] = {}
+        self._word_labels: dict[str, set[str]] = {}
+        self._vocabulary: list[str] = [] # Sorted words of all labels
+        self._vocabulary_text: str | None = None # The vocabulary joined by newlines, built when first needed
+        self._word_starts: array.array | None = None # Offset of each word in _vocabulary_text
+        self._kind_rows: dict[str, set[int]] = {}
+        self._tag_rows: dict[str, set[int]] = {}
+        self._recurring_rows: set[int] = set() # Matched against a date range by their payments
+
+        # Built a column at a time: the per-item work is kept to list appends
+        rows_by_tags: dict[tuple[str, ...], list[int]] = {}
+        date_keys = []
+        for kind, item_list in (("incomes", incomes), ("recurring_expenses", recurring_expenses), ("occasional_expenses", occasional_expenses)):
+            first_row = len(self._items)
+            self._items.extend(item_list)
+            self._kinds.extend([kind] * len(item_list))
+            self._labels.extend(str(getattr(item, _LABEL_FIELDS[kind])).lower() for item in item_list)
+            self._kind_rows[kind] = set(range(first_row, len(self._items)))
+            date_field = "start_date" if kind == "recurring_expenses" else "date"
+            for row, item in enumerate(item_list, first_row):
+                date_obj = getattr(item, date_field)
+                if not isinstance(date_obj, datetime.date):
+                    self._dates.append(datetime.date.min)
+                    continue
+                self._dates.append(date_obj)
+                if kind == "recurring_expenses" or (kind == "incomes" and item.frequency != "once"):
+                    self._recurring_rows.add(row)
+                else:
+                    date_keys.append((date_obj.toordinal(), row))
+            if kind != "incomes":
+                for row, item in enumerate(item_list, first_row):
+                    if item.tags:
+                        rows_by_tags.setdefault(item.tags, []).append(row)
+
+        for row, label in enumerate(self._labels):
+            label_rows = self._label_rows.get(label)
+            if label_rows is None:
+                self._label_rows[label] = [row]
+            else:
+                label_rows.append(row)
+        for label in self._label_rows:
+            for word in _label_words(label):
+                labels = self._word_labels.get(word)
+                if labels is None:
+                    self._word_labels[word] = {label}
+                else:
+                    labels.add(label)
+        self._vocabulary = sorted(self._word_labels)
+        for tags, rows in rows_by_tags.items(): # Equal tag tuples are shared, so this is one pass per distinct tag set
+            for tag in tags:
+                self._tag_rows.setdefault(tag, set()).update(rows)
+
+        amounts = [item.amount for item in self._items]
+        amount_order = sorted(range(len(amounts)), key=amounts.__getitem__)
+        self._amounts = array.array("d", [amounts[row] for row in amount_order]) # Sorted by amount
+        self._amount_rows = array.array("q", amount_order)
+        date_keys.sort()
+        self._ordinals = array.array("q", [ordinal for ordinal, _ in date_keys]) # One-off items, sorted by date
+        self._date_rows = array.array("q", [row for _, row in date_keys])
+        self._size = len(self._items)
+        self.follow(incomes, recurring_expenses, occasional_expenses)
+
+    def follow(self, incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense]):
+        """Starts following the IndexedItemLists among the given ones. They must be the lists the
+        index was built from or lists that have since only gained items at the end (e.g. when it
+        was built from copies taken under a lock); those new items are indexed first."""
+        for kind, item_list in (("incomes", incomes), ("recurring_expenses", recurring_expenses), ("occasional_expenses", occasional_expenses)):
+            if isinstance(item_list, IndexedItemList):
+                for item in item_list[len(self._kind_rows[kind]):]:
+                    self.add(kind, item)
+                item_list.add_listener(self._on_item_changed)
+
+    def __len__(self):
+        return self._size
+
+    def tags(self) -> list[str]:
+        return sorted(self._tag_rows)
+
+    # --- Maintenance ---
+    def add(self, kind: str, item):
+        row = len(self._items)
+        label = str(getattr(item, _LABEL_FIELDS[kind])).lower()
+        date_obj = item.start_date if kind == "recurring_expenses" else item.date
+        if not isinstance(date_obj, datetime.date):
+            date_obj = None
+        self._items.append(item)
+        self._kinds.append(kind)
+        self._labels.append(label)
+        self._dates.append(date_obj or datetime.date.min)
+        self._kind_rows[kind].add(row)
+        self._size += 1
+
+        label_rows = self._label_rows.get(label)
+        if label_rows is None:
+            label_rows = self._label_rows[label] = []
+            for word in _label_words(label):
+                labels = self._word_labels.get(word)
+                if labels is None:
+                    labels = self._word_labels[word] = set()
+                    bisect.insort(self._vocabulary, word)
+                    self._vocabulary_text = None
+                labels.add(label)
+        label_rows.append(row)
+        for tag in getattr(item, "tags", ()):
+            self._tag_rows.setdefault(tag, set()).add(row)
+
+        position = bisect.bisect_right(self._amounts, item.amount)
+        self._amounts.insert(position, item.amount)
+        self._amount_rows.insert(position, row)
+        if date_obj is None:
+            return
+        if kind == "recurring_expenses" or (kind == "incomes" and item.frequency != "once"):
+            self._recurring_rows.add(row)
+        else:
+            position = bisect.bisect_right(self._ordinals, date_obj.toordinal())
+            self._ordinals.insert(position, date_obj.toordinal())
+            self._date_rows.insert(position, row)
+
+    def remove(self, item):
+        label = str(getattr(item, _LABEL_FIELDS[_item_kind(item)])).lower()
+        label_rows = self._label_rows.get(label, [])
+        rows = [row for row in label_rows if self._items[row] is item]
+        if not rows:
+            return
+        row = rows[-1]
+        label_rows.remove(row)
+        self._items[row] = None
+        self._size -= 1
+
+        if not label_rows:
+            del self._label_rows[label]
+            for word in set(_label_words(label)):
+                labels = self._word_labels[word]
+                labels.discard(label)
+                if not labels:
+                    del self._word_labels[word]
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+                    self._vocabulary_text = None
+        self._kind_rows[self._kinds[row]].discard(row)
+        for tag in getattr(item, "tags", ()):
+            tag_rows = self._tag_rows.get(tag)
+            if tag_rows is not None:
+                tag_rows.discard(row)
+                if not tag_rows:
+                    del self._tag_rows[tag]
+        position = _sorted_position(self._amounts, self._amount_rows, item.amount, row)
+        del self._amounts[position], self._amount_rows[position]
+        if row in self._recurring_rows:
+            self._recurring_rows.discard(row)
+        elif self._dates[row] != datetime.date.min:
+            position = _sorted_position(self._ordinals, self._date_rows, self._dates[row].toordinal(), row)
+            del self._ordinals[position], self._date_rows[position]
+
+    def _on_item_changed(self, item, added: bool):
+        if added:
+            self.add(_item_kind(item), item)
+        else:
+            self.remove(item)
+
+    # --- Queries ---
+    def _words_containing(self, fragment: str):
+        """Yields the vocabulary words containing fragment, which has no newline."""
+        if self._vocabulary_text is None:
+            self._vocabulary_text = "\n".join(self._vocabulary)
+            self._word_starts = array.array("q", itertools.accumulate((len(word) + 1 for word in self._vocabulary[:-1]), initial=0))
+        text, starts = self._vocabulary_text, self._word_starts
+        position = text.find(fragment)
+        while position != -1:
+            number = bisect.bisect_right(starts, position) - 1
+            yield self._vocabulary[number]
+            # Go on from the next word: one hit per word is enough
+            position = text.find(fragment, starts[number + 1]) if number + 1 < len(starts) else -1
+
+    def _matching_labels(self, text: str, prefix: bool) -> set[str] | None:
+        """Labels containing text (prefix=False), or with a word starting with each word of text
+        (prefix=True). None when text has nothing to match on."""
+        query = " ".join(text.lower().split())
+        words = _label_words(query)
+        if prefix:
+            labels = None
+            for word in words:
+                matches = set()
+                for position in range(bisect.bisect_left(self._vocabulary, word), len(self._vocabulary)):
+                    if not self._vocabulary[position].startswith(word):
+                        break
+                    matches.update(self._word_labels[self._vocabulary[position]])
+                labels = matches if labels is None else labels & matches
+                if not labels:
+                    break
+            return labels
+        if not query:
+            return None
+        if not words: # Only punctuation: compare with every distinct label
+            return {label for label in self._label_rows if query in label}
+        # A label containing the query has a word containing the query's longest word
+        longest = max(words, key=len)
+        labels = set()
+        for word in self._words_containing(longest):
+            labels.update(self._word_labels[word])
+        if query != longest:
+            labels = {label for label in labels if query in label}
+        return labels
+
+    def _occurs_between(self, row: int, start_date: datetime.date, end_date: datetime.date) -> bool:
+        item = self._items[row]
+        if row in self._recurring_rows:
+            return count_occurrences(self._dates[row], item.frequency, start_date, end_date) > 0
+        return self._dates[row] != datetime.date.min and start_date <= self._dates[row] <= end_date
+
+    def search(self, text: str = "", prefix: bool = False, tags: list[str] | None = None, all_tags: bool = True,
+               min_amount: float | None = None, max_amount: float | None = None,
+               start_date: datetime.date | None = None, end_date: datetime.date | None = None,
+               kinds: list[str] | None = None) -> list[tuple[str, object]]:
+        """(kind, item) pairs matching every filter given, ordered by date (start date for
+        recurring items).
+
+        text matches the income source or expense description, case-insensitively: as a
+        substring, or with prefix=True as word prefixes ("gro sup" finds "Grocery Supplies").
+        tags keeps items carrying all of them (any of them with all_tags=False). Amounts and
+        dates are inclusive bounds, None for an open end; recurring items match a date range
+        they have a payment in. kinds limits the result to some of the ITEM_KINDS.
+        """
+        # Each candidate function is called after all filters are set up, so every filter
+        # keeps its bounds in names of its own
+        filters = [] # (estimated rows, candidate rows, check of a single row)
+
+        labels = self._matching_labels(text, prefix) if text else None
+        if labels is not None:
+            filters.append((
+                sum(len(self._label_rows[label]) for label in labels),
+                lambda: [row for label in labels for row in self._label_rows[label]],
+                lambda row: self._labels[row] in labels,
+            ))
+
+        if tags:
+            wanted = set(tags)
+            tag_sets = sorted((self._tag_rows.get(tag, set()) for tag in wanted), key=len)
+            if all_tags:
+                filters.append((len(tag_sets[0]), lambda: tag_sets[0].intersection(*tag_sets[1:]), lambda row: wanted.issubset(getattr(self._items[row], "tags", ()))))
+            else:
+                filters.append((sum(map(len, tag_sets)), lambda: set().union(*tag_sets), lambda row: not wanted.isdisjoint(getattr(self._items[row], "tags", ()))))
+
+        if min_amount is not None or max_amount is not None:
+            amount_low = 0 if min_amount is None else bisect.bisect_left(self._amounts, min_amount)
+            amount_high = len(self._amounts) if max_amount is None else bisect.bisect_right(self._amounts, max_amount)
+            lowest_amount = -math.inf if min_amount is None else min_amount
+            highest_amount = math.inf if max_amount is None else max_amount
+            filters.append((max(0, amount_high - amount_low), lambda: self._amount_rows[amount_low:amount_high], lambda row: lowest_amount <= self._items[row].amount <= highest_amount))
+
+        if start_date is not None or end_date is not None:
+            first, last = start_date or datetime.date.min, end_date or datetime.date.max
+            date_low = bisect.bisect_left(self._ordinals, first.toordinal())
+            date_high = bisect.bisect_right(self._ordinals, last.toordinal())
+            filters.append((
+                max(0, date_high - date_low) + len(self._recurring_rows),
+                lambda: [*self._date_rows[date_low:date_high], *(row for row in self._recurring_rows if self._occurs_between(row, first, last))],
+                lambda row: self._occurs_between(row, first, last),
+            ))
+
+        if kinds is not None:
+            wanted_kinds = set(kinds)
+            kind_sets = [self._kind_rows[kind] for kind in wanted_kinds if kind in self._kind_rows]
+            filters.append((sum(map(len, kind_sets)), lambda: set().union(*kind_sets), lambda row: self._kinds[row] in wanted_kinds))
+
+        if filters:
+            filters.sort(key=lambda entry: entry[0])
+            rows = filters[0][1]()
+            for _, _, check in filters[1:]:
+                rows = [row for row in rows if check(row)]
+        else:
+            rows = range(len(self._items))
+        rows = sorted((row for row in rows if self._items[row] is not None), key=self._dates.__getitem__)
+        instrumentation.count("search_results", len(rows))
+        return [(self._kinds[row], self._items[row]) for row in rows]
+
+# --- Cash-Flow Projection ---
+# The balance only changes by known amounts on payment days and by the daily occasional spend
+# baseline in between, so the projection walks the payment days of the income and recurring
+# expense timeline instead of every calendar day. Between two payment days the balance falls
+# in a straight line, so its lowest point and first negative day there follow by arithmetic.
+OCCASIONAL_BASELINE_DAYS = 90
+
+def average_daily_occasional_spend(occasional_expenses: list[OccasionalExpense], end_date: datetime.date, days: int = OCCASIONAL_BASELINE_DAYS) -> float:
+    """Average occasional spend per day over the given number of days up to end_date."""
+    start_date = end_date - datetime.timedelta(days=days - 1)
+    return calculate_total_occasional_expenses(occasional_expenses, start_date, end_date) / days
+
+def _add_years(date_obj: datetime.date, years: int) -> datetime.date:
+    try:
+        return date_obj.replace(year=date_obj.year + years)
+    except ValueError: # Feb 29
+        return date_obj.replace(year=date_obj.year + years, day=28)
+
+@instrumentation.timed
+def project_cash_flow(incomes: list[Income], recurring_expenses: list[RecurringExpense], occasional_expenses: list[OccasionalExpense] | None = None,
+                      start_date: datetime.date | None = None, years: int = 1, starting_balance: float = 0.0,
+                      daily_occasional_spend: float | None = None) -> dict:
+    """Projects the balance day by day from start_date (today by default) for the given number
+    of years. starting_balance is the balance at the start of start_date. Incomes and recurring
+    expenses are paid on their occurrence dates; occasional spending is a flat daily amount,
+    by default the average of the last OCCASIONAL_BASELINE_DAYS days of occasional expenses.
+
+    Returns the end-of-day balance as a curve of (date, balance) points that is linear between
+    neighbours, the lowest balance and its date, the first day the balance is negative (None if
+    it never is), the end balance and the totals of each category.
+    """
+    start_date = start_date or datetime.date.today()
+    end_date = _add_years(start_date, years) - datetime.timedelta(days=1)
+    if daily_occasional_spend is None:
+        daily_occasional_spend = average_daily_occasional_spend(occasional_expenses, start_date - datetime.timedelta(days=1)) if occasional_expenses else 0.0
+    if daily_occasional_spend < 0:
+        raise ValueError("daily_occasional_spend must not be negative")
+
+    payments = heapq.merge(
+        [(start_date, None, 0.0), (end_date, None, 0.0)], # Always have points on the first and last day
+        iter_timeline(incomes, recurring_expenses, [], start_date, end_date),
+        key=lambda payment: payment[0],
+    )
+    totals = {"income": 0.0, "recurring_expenses": 0.0}
+
+    curve: list[tuple[datetime.date, float]] = []
+    balance = starting_balance
+    previous_day = start_date - datetime.timedelta(days=1)
+    lowest_balance, lowest_date, first_negative_date = None, None, None
+
+    def record(day: datetime.date, day_balance: float):
+        nonlocal lowest_balance, lowest_date, first_negative_date
+        curve.append((day, day_balance))
+        if lowest_balance is None or day_balance < lowest_balance:
+            lowest_balance, lowest_date = day_balance, day
+        if day_balance < 0 and first_negative_date is None:
+            first_negative_date = day
+
+    def close_day(day: datetime.date, amount: float):
+        """Spends the baseline on the quiet days since the last payment day, then settles day."""
+        nonlocal balance, previous_day, first_negative_date
+        quiet_days = (day - previous_day).days - 1
+        if quiet_days > 0 and daily_occasional_spend:
+            if first_negative_date is None and 0 <= balance < daily_occasional_spend * quiet_days:
+                # The balance crosses zero on one of the quiet days
+                first_negative_date = previous_day + datetime.timedelta(days=int(balance // daily_occasional_spend) + 1)
+            balance -= daily_occasional_spend * quiet_days
+            record(day - datetime.timedelta(days=1), balance)
+        balance += amount - daily_occasional_spend
+        record(day, balance)
+        previous_day = day
+
+    day, amount = None, 0.0
+    for payment_day, _, payment in payments:
+        if payment_day != day:
+            if day is not None:
+                close_day(day, amount)
+            day, amount = payment_day, 0.0
+        amount += payment
+        if payment > 0:
+            totals["income"] += payment
+        elif payment < 0:
+            totals["recurring_expenses"] -= payment
+    close_day(day, amount)
+
+    num_days = (end_date - start_date).days + 1
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "starting_balance": starting_balance,
+        "daily_occasional_spend": daily_occasional_spend,
+        "curve": curve,
+        "lowest_balance": lowest_balance,
+        "lowest_date": lowest_date,
+        "first_negative_date": first_negative_date,
+        "end_balance": balance,
+        "income": totals["income"],
+        "recurring_expenses": totals["recurring_expenses"],
+        "occasional_expenses": daily_occasional_spend * num_days,
+    }
+
+def projected_balance(projection: dict, date_obj: datetime.date) -> float:
+    """End-of-day balance on any date within a projection, read off its curve."""
+    curve = projection["curve"]
+    position = bisect.bisect_right(curve, (date_obj, float("inf"))) - 1
+    if position < 0 or date_obj > projection["end_date"]:
+        raise ValueError(f"{date_obj} is outside the projection")
+    point_date, point_balance = curve[position]
+    return point_balance - projection["daily_occasional_spend"] * (date_obj - point_date).days
+
 if __name__ == "__main__":
-    main()
+    # Run through the importable module so storage backends that import financial_tracker
+    # share its classes and state instead of a second copy made for __main__
+    import financial_tracker
+    instrumentation.configure_from_argv(sys.argv[1:]) # --trace[=timings,profile,memory]
+    financial_tracker.main()
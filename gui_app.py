@@ -1,18 +1,233 @@
+import time
+_PROCESS_STARTED = time.perf_counter() # Time-to-first-paint is measured from here
+
 import customtkinter as ctk
 import datetime
-import calendar # For monthrange
-from collections import defaultdict
+import queue
+import sys
+import threading
+import tkinter.font as tkfont
 import traceback # For detailed error logging
+from concurrent.futures import ThreadPoolExecutor
 
+import instrumentation
 # Assuming financial_tracker.py is in the same directory
 from financial_tracker import (
-    load_data, save_data,
-    Income, RecurringExpense, OccasionalExpense, # Data classes
-    parse_date, # Utility
-    add_income_item, add_recurring_expense_item, add_occasional_expense_item, # Item adders
-    calculate_total_income, calculate_total_recurring_expenses, calculate_total_occasional_expenses # Calculators
+    load_data, BackgroundSaver, DataFileWatcher, MonthlySummaryCache, IndexedItemList,
+    iter_timeline, describe_item, timeline_kind, export_timeline_csv, month_period, # Statement
+    SearchIndex, parse_date, # Search
+    _one_off_in_range,
 )
 
+DISPLAY_POLL_MS = 30 # How often the Tk thread picks up results from the summary worker
+LOAD_POLL_MS = 50 # How often the Tk thread updates the progress bar while the ledger loads
+SEARCH_DELAY_MS = 250 # Pause in typing after which the search window runs its query
+LIST_FONT = ("Consolas", 12)
+
+def _list_header(title_line: str) -> str:
+    return title_line + "\n" + "-" * len(title_line)
+
+FIXED_COSTS_HEADER = _list_header(f"{'Description':<28} {'Amount (€)':>14} {'Frequency':>14} {'Tags':>20}")
+VARIABLE_COSTS_HEADER = _list_header(f"{'Description':<28} {'Amount (€)':>14} {'Date':>14} {'Tags':>20}")
+STATEMENT_HEADER = _list_header(f"{'Date':<12} {'Type':<12} {'Description':<28} {'Amount (€)':>12} {'Net (€)':>12}")
+SEARCH_HEADER = _list_header(f"{'Date':<12} {'Type':<12} {'Description':<28} {'Amount (€)':>12} {'Frequency':>10} {'Tags':>20}")
+SEARCH_KINDS = {"All items": None, "Incomes": ["incomes"], "Recurring expenses": ["recurring_expenses"], "Occasional expenses": ["occasional_expenses"]}
+
+
+class VirtualListView(ctk.CTkFrame):
+    """Read-only list of pre-formatted rows that only ever renders the rows in view.
+
+    Rows are (date, amount, sort_description, text) tuples. The textbox holds just the visible
+    window; scrolling moves the window and sorting reorders an index over the rows, so neither
+    rebuilds the widget nor touches rows that are out of view.
+    """
+    SORT_KEYS = {"Date": 0, "Amount": 1, "Description": 2}
+
+    def __init__(self, master, header: str, empty_text: str = "", height: int = 150, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.empty_text = empty_text
+        self._rows: list[tuple] = []
+        self._orders: dict[tuple[str, bool], list[int]] = {} # Sorted row indexes, per (sort key, descending)
+        self._order: list[int] = []
+        self._offset = 0
+        self._visible_rows = 1
+        self._line_height = None
+
+        controls = ctk.CTkFrame(self, fg_color="transparent")
+        controls.pack(fill="x", padx=5)
+        ctk.CTkLabel(controls, text="Sort by:").pack(side="left", padx=(0,5))
+        self.sort_var = ctk.StringVar(value="Date")
+        ctk.CTkOptionMenu(controls, variable=self.sort_var, values=list(self.SORT_KEYS), width=120, command=lambda _choice: self.apply_sort()).pack(side="left")
+        self.descending_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(controls, text="Descending", variable=self.descending_var, command=self.apply_sort).pack(side="left", padx=10)
+        self.count_label = ctk.CTkLabel(controls, text="")
+        self.count_label.pack(side="right", padx=5)
+
+        ctk.CTkLabel(self, text=header, font=LIST_FONT, anchor="w", justify="left").pack(fill="x", padx=10)
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+        self.textbox = ctk.CTkTextbox(body, height=height, state="disabled", font=LIST_FONT, wrap="none", activate_scrollbars=False)
+        self.textbox.pack(side="left", fill="both", expand=True, padx=(5,0), pady=5)
+        self.scrollbar = ctk.CTkScrollbar(body, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", pady=5)
+
+        self.textbox.bind("<Configure>", self._on_resize)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.textbox.bind(sequence, self._on_mouse_wheel)
+        self.render()
+
+    def set_rows(self, rows: list[tuple]):
+        self._rows = rows
+        self._orders = {}
+        self._offset = 0
+        self.count_label.configure(text=f"{len(rows)} items")
+        self.apply_sort()
+
+    def apply_sort(self):
+        key = (self.sort_var.get(), self.descending_var.get())
+        order = self._orders.get(key)
+        if order is None:
+            column = self.SORT_KEYS[key[0]]
+            order = self._orders[key] = sorted(range(len(self._rows)), key=lambda index: self._rows[index][column], reverse=key[1])
+        self._order = order
+        self.render()
+
+    def scroll_to(self, offset: int):
+        self._offset = max(0, min(offset, len(self._order) - self._visible_rows))
+        self.render()
+
+    def render(self):
+        visible = self._order[self._offset:self._offset + self._visible_rows]
+        text = "\n".join(self._rows[index][3] for index in visible) if visible else self.empty_text
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("end", text)
+        self.textbox.configure(state="disabled")
+        if self._order:
+            self.scrollbar.set(self._offset / len(self._order), min(1.0, (self._offset + self._visible_rows) / len(self._order)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_resize(self, event):
+        if self._line_height is None:
+            self._line_height = max(1, tkfont.Font(font=LIST_FONT).metrics("linespace"))
+        visible_rows = max(1, event.height // self._line_height)
+        if visible_rows != self._visible_rows:
+            self._visible_rows = visible_rows
+            self.scroll_to(self._offset)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self._order)))
+        elif action == "scroll":
+            step = self._visible_rows if unit == "pages" else 1
+            self.scroll_to(self._offset + int(value) * step)
+
+    def _on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self._offset - 3)
+        elif event.num == 5 or getattr(event, "delta", 0) < 0:
+            self.scroll_to(self._offset + 3)
+        return "break"
+
+
+class SearchWindow(ctk.CTkToplevel):
+    """Finds items across the whole history. Queries run on the app's worker thread against its
+    SearchIndex, again after every pause in typing; only the latest query's results are shown."""
+
+    def __init__(self, master_app):
+        super().__init__(master_app)
+        self.master_app = master_app
+        self.title("Search Items")
+        self.geometry("950x600")
+        self._pending_search = None # after() id of the scheduled query
+        self._search_future = None
+        self._search_generation = 0
+
+        filters_frame = ctk.CTkFrame(self)
+        filters_frame.pack(fill="x", padx=10, pady=10)
+        filters_frame.grid_columnconfigure((1, 3), weight=1)
+
+        self.text_var = ctk.StringVar()
+        self.match_var = ctk.StringVar(value="Contains")
+        self.kind_var = ctk.StringVar(value="All items")
+        self.tags_var = ctk.StringVar()
+        self.tag_match_var = ctk.StringVar(value="All tags")
+        self.min_amount_var, self.max_amount_var = ctk.StringVar(), ctk.StringVar()
+        self.start_date_var, self.end_date_var = ctk.StringVar(), ctk.StringVar()
+
+        ctk.CTkLabel(filters_frame, text="Description/Source:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        text_entry = ctk.CTkEntry(filters_frame, textvariable=self.text_var)
+        text_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        ctk.CTkOptionMenu(filters_frame, variable=self.match_var, values=["Contains", "Word prefix"], command=self.schedule_search).grid(row=0, column=2, padx=5, pady=5)
+        ctk.CTkOptionMenu(filters_frame, variable=self.kind_var, values=list(SEARCH_KINDS), command=self.schedule_search).grid(row=0, column=3, padx=5, pady=5, sticky="w")
+
+        ctk.CTkLabel(filters_frame, text="Tags (comma-separated):").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ctk.CTkEntry(filters_frame, textvariable=self.tags_var).grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+        ctk.CTkOptionMenu(filters_frame, variable=self.tag_match_var, values=["All tags", "Any tag"], command=self.schedule_search).grid(row=1, column=2, padx=5, pady=5)
+
+        range_frame = ctk.CTkFrame(filters_frame, fg_color="transparent")
+        range_frame.grid(row=2, column=0, columnspan=4, sticky="ew")
+        for label, variable in (("Amount from:", self.min_amount_var), ("to:", self.max_amount_var), ("Date from (YYYY-MM-DD):", self.start_date_var), ("to:", self.end_date_var)):
+            ctk.CTkLabel(range_frame, text=label).pack(side="left", padx=5, pady=5)
+            ctk.CTkEntry(range_frame, textvariable=variable, width=100).pack(side="left", padx=5, pady=5)
+        for variable in (self.text_var, self.tags_var, self.min_amount_var, self.max_amount_var, self.start_date_var, self.end_date_var):
+            variable.trace_add("write", lambda *_args: self.schedule_search())
+
+        self.status_label = ctk.CTkLabel(self, text="Enter a search above.", anchor="w")
+        self.status_label.pack(fill="x", padx=15)
+        self.results_list = VirtualListView(self, SEARCH_HEADER, "No matching items.", height=350)
+        self.results_list.pack(fill="both", expand=True, padx=10, pady=(0,10))
+        text_entry.focus()
+
+    def schedule_search(self, *_args):
+        if self._pending_search is not None:
+            self.after_cancel(self._pending_search)
+        self._pending_search = self.after(SEARCH_DELAY_MS, self.run_search)
+
+    def _filters(self) -> dict:
+        """The search() arguments of the filled-in fields. Raises ValueError for a bad amount or date."""
+        min_amount, max_amount = self.min_amount_var.get().strip(), self.max_amount_var.get().strip()
+        start_date, end_date = self.start_date_var.get().strip(), self.end_date_var.get().strip()
+        return {
+            "text": self.text_var.get(),
+            "prefix": self.match_var.get() == "Word prefix",
+            "tags": [tag.strip() for tag in self.tags_var.get().split(",") if tag.strip()],
+            "all_tags": self.tag_match_var.get() == "All tags",
+            "min_amount": float(min_amount) if min_amount else None,
+            "max_amount": float(max_amount) if max_amount else None,
+            "start_date": parse_date(start_date) if start_date else None,
+            "end_date": parse_date(end_date) if end_date else None,
+            "kinds": SEARCH_KINDS[self.kind_var.get()],
+        }
+
+    def run_search(self):
+        self._pending_search = None
+        try:
+            filters = self._filters()
+        except ValueError:
+            self.status_label.configure(text="Amounts must be numbers and dates YYYY-MM-DD.")
+            return
+        self._search_generation += 1
+        self._search_future = self.master_app.search_items(filters)
+        self.status_label.configure(text="Searching…")
+        self.after(DISPLAY_POLL_MS, self._poll_search, self._search_generation)
+
+    def _poll_search(self, generation: int):
+        if generation != self._search_generation:
+            return # A newer query has its own poll
+        if not self._search_future.done():
+            self.after(DISPLAY_POLL_MS, self._poll_search, generation)
+            return
+        error = self._search_future.exception()
+        if error is not None:
+            traceback.print_exception(error)
+            self.status_label.configure(text=f"Error: {error}")
+            return
+        rows, elapsed = self._search_future.result()
+        self.results_list.set_rows(rows)
+        self.status_label.configure(text=f"{len(rows)} matching items ({elapsed * 1000:.0f} ms)")
+
 
 class FinancialTrackerApp(ctk.CTk):
     def __init__(self):
@@ -21,8 +236,38 @@ class FinancialTrackerApp(ctk.CTk):
         self.title("Student Financial Tracker")
         self.geometry("1100x750") # Initial size
 
+        # Startup is one trace: the window shell is painted first, the ledger is loaded on the
+        # worker thread meanwhile and the first month is shown once it is in
+        self._startup_trace = instrumentation.start_trace("startup", _PROCESS_STARTED)
+        self._startup_trace.add_span("imports", _PROCESS_STARTED, time.perf_counter() - _PROCESS_STARTED)
+        shell_started = time.perf_counter()
+
         # --- Data ---
-        self.incomes, self.recurring_expenses, self.occasional_expenses = load_data()
+        # The lists held here are the working copy; the data file is only read again when
+        # another process changes it (see reload_if_changed). They stay empty until the
+        # background load started below has finished.
+        self.data_watcher = DataFileWatcher()
+        self.incomes, self.recurring_expenses, self.occasional_expenses = IndexedItemList(), IndexedItemList(), IndexedItemList()
+        self.summary_cache = MonthlySummaryCache(self.incomes, self.recurring_expenses, self.occasional_expenses)
+        self.search_index = None # Built by the first search, dropped whenever the lists are replaced
+        # Loading and summaries run on a single worker thread; data_lock keeps it and the Tk
+        # thread from touching the lists at the same time. The worker only holds it for quick
+        # steps: files are read and the search index is built outside it, then swapped in
+        # unless the Tk thread added an item meanwhile (counted by _items_added).
+        self.data_lock = threading.RLock()
+        self._items_added = 0
+        self._display_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="display")
+        self._load_progress = 0.0 # Fraction of the data file read, set by the worker
+        self._load_future = self._display_executor.submit(self._load_in_background)
+        self._display_future = None
+        self._display_generation = 0
+        self._display_trace = None # Timing breakdown of the refresh in progress
+        # New items are written in batches on the saver's thread, never on the Tk thread; the
+        # watcher tells those writes apart from other processes'
+        self.saver = BackgroundSaver(watcher=self.data_watcher)
+        self._display_results = queue.Queue()
+        self._polling_display_results = False
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.current_month = datetime.date.today().month
         self.current_year = datetime.date.today().year
 
@@ -42,7 +287,11 @@ class FinancialTrackerApp(ctk.CTk):
 
         self.populate_control_frame()
         self.populate_display_frame_placeholders() # Start with placeholders
-        # self.update_display() # Initial data load and display - to be called after widgets are ready
+        self._startup_trace.add_span("build_shell", shell_started, time.perf_counter() - shell_started)
+        self._first_paint_ms: float | None = None
+        # Idle callbacks run once the pending draw events are handled, i.e. after the first paint
+        self.after_idle(self._on_first_paint)
+        self.after(LOAD_POLL_MS, self._poll_loading)
 
     def populate_control_frame(self):
         self.control_frame.grid_columnconfigure(0, weight=1)
@@ -72,9 +321,15 @@ class FinancialTrackerApp(ctk.CTk):
         action_buttons_frame.grid_columnconfigure(0, weight=1)
 
 
-        ctk.CTkButton(action_buttons_frame, text="Add Income", command=self.add_income_window).grid(row=0, column=0, sticky="ew", pady=5)
-        ctk.CTkButton(action_buttons_frame, text="Add Recurring Expense", command=self.add_recurring_expense_window).grid(row=1, column=0, sticky="ew", pady=5)
-        ctk.CTkButton(action_buttons_frame, text="Add Occasional Expense", command=self.add_occasional_expense_window).grid(row=2, column=0, sticky="ew", pady=5)
+        # Disabled until the ledger has loaded, so nothing is added to lists about to be replaced
+        self.action_buttons = [
+            ctk.CTkButton(action_buttons_frame, text="Add Income", command=self.add_income_window, state="disabled"),
+            ctk.CTkButton(action_buttons_frame, text="Add Recurring Expense", command=self.add_recurring_expense_window, state="disabled"),
+            ctk.CTkButton(action_buttons_frame, text="Add Occasional Expense", command=self.add_occasional_expense_window, state="disabled"),
+            ctk.CTkButton(action_buttons_frame, text="Search Items…", command=self.search_window, state="disabled"),
+        ]
+        for row, button in enumerate(self.action_buttons):
+            button.grid(row=row, column=0, sticky="ew", pady=5)
 
         # Spacer to push action buttons to bottom if other elements are added above later
         self.control_frame.grid_rowconfigure(2, weight=1) # Spacer row
@@ -87,6 +342,7 @@ class FinancialTrackerApp(ctk.CTk):
         self.display_frame.grid_rowconfigure(1, weight=1) # Fixed Costs
         self.display_frame.grid_rowconfigure(2, weight=1) # Variable Costs
         self.display_frame.grid_rowconfigure(3, weight=1) # Tag Statistics
+        self.display_frame.grid_rowconfigure(4, weight=1) # Statement
 
         # Monthly Overview Section
         overview_frame = ctk.CTkFrame(self.display_frame)
@@ -100,28 +356,91 @@ class FinancialTrackerApp(ctk.CTk):
         self.lbl_total_expenses.pack(anchor="w", padx=10)
         self.lbl_net_balance = ctk.CTkLabel(overview_frame, text="Net Balance: €0.00", font=ctk.CTkFont(size=14, weight="bold"))
         self.lbl_net_balance.pack(anchor="w", padx=10, pady=(0,5))
+        self.lbl_status = ctk.CTkLabel(overview_frame, text="Loading data…", font=ctk.CTkFont(size=12, slant="italic"))
+        self.lbl_status.pack(anchor="w", padx=10, pady=(0,5))
+        self.load_progress_bar = ctk.CTkProgressBar(overview_frame)
+        self.load_progress_bar.set(0.0)
+        self.load_progress_bar.pack(fill="x", padx=10, pady=(0,5))
 
         # Fixed Costs (Recurring Expenses) Section
         fixed_costs_frame = ctk.CTkFrame(self.display_frame)
         fixed_costs_frame.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
         ctk.CTkLabel(fixed_costs_frame, text="Fixed Costs (Recurring)", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=5)
-        self.fixed_costs_text = ctk.CTkTextbox(fixed_costs_frame, height=150, state="disabled", font=("Consolas", 12))
-        self.fixed_costs_text.pack(fill="both", expand=True, padx=5, pady=5)
+        self.fixed_costs_list = VirtualListView(fixed_costs_frame, FIXED_COSTS_HEADER, "No recurring expenses yet.", height=150)
+        self.fixed_costs_list.pack(fill="both", expand=True, padx=5, pady=5)
 
         # Variable Costs (Occasional Expenses) Section
         variable_costs_frame = ctk.CTkFrame(self.display_frame)
         variable_costs_frame.grid(row=2, column=0, padx=5, pady=5, sticky="nsew")
         ctk.CTkLabel(variable_costs_frame, text="Variable Costs (Occasional)", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=5)
-        self.variable_costs_text = ctk.CTkTextbox(variable_costs_frame, height=150, state="disabled", font=("Consolas", 12))
-        self.variable_costs_text.pack(fill="both", expand=True, padx=5, pady=5)
+        self.variable_costs_list = VirtualListView(variable_costs_frame, VARIABLE_COSTS_HEADER, "No occasional expenses this month.", height=150)
+        self.variable_costs_list.pack(fill="both", expand=True, padx=5, pady=5)
 
         # Tag-Based Statistics Section
         tag_stats_frame = ctk.CTkFrame(self.display_frame)
         tag_stats_frame.grid(row=3, column=0, padx=5, pady=5, sticky="nsew")
         ctk.CTkLabel(tag_stats_frame, text="Spending by Tag", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=5)
-        self.tag_stats_text = ctk.CTkTextbox(tag_stats_frame, height=150, state="disabled", font=("Consolas", 12))
+        self.tag_stats_text = ctk.CTkTextbox(tag_stats_frame, height=150, state="disabled", font=LIST_FONT)
         self.tag_stats_text.pack(fill="both", expand=True, padx=5, pady=5)
 
+        # Statement Section: every payment of the month in date order, recurring occurrences included
+        statement_frame = ctk.CTkFrame(self.display_frame)
+        statement_frame.grid(row=4, column=0, padx=5, pady=5, sticky="nsew")
+        statement_title = ctk.CTkFrame(statement_frame, fg_color="transparent")
+        statement_title.pack(fill="x")
+        ctk.CTkLabel(statement_title, text="Statement", font=ctk.CTkFont(size=16, weight="bold")).pack(side="left", expand=True, pady=5)
+        ctk.CTkButton(statement_title, text="Export CSV…", width=110, command=self.export_statement).pack(side="right", padx=5)
+        self.statement_list = VirtualListView(statement_frame, STATEMENT_HEADER, "No payments this month.", height=150)
+        self.statement_list.pack(fill="both", expand=True, padx=5, pady=5)
+
+    # --- Startup ---
+    def _load_in_background(self):
+        """Runs on the worker thread: reads the ledger and swaps it in for the empty lists."""
+        def progress(done: int, total: int):
+            self._load_progress = done / total if total else 1.0
+
+        with self._startup_trace.span("background_load"):
+            signature = self.data_watcher.signature()
+            loaded = load_data(progress=progress)
+        with self.data_lock:
+            self.incomes, self.recurring_expenses, self.occasional_expenses = loaded
+            self.data_watcher.acknowledge(signature)
+            self.summary_cache = MonthlySummaryCache(self.incomes, self.recurring_expenses, self.occasional_expenses)
+            self.search_index = None
+        self._startup_trace.count("items_loaded", sum(len(items) for items in loaded))
+
+    def _on_first_paint(self):
+        self._first_paint_ms = (time.perf_counter() - self._startup_trace.started) * 1000
+        self._startup_trace.add_span("first_paint", self._startup_trace.started, self._first_paint_ms / 1000)
+
+    def _poll_loading(self):
+        """Runs on the Tk thread: moves the progress bar until the load is done, then shows the
+        selected month."""
+        if not self._load_future.done():
+            self.load_progress_bar.set(self._load_progress)
+            self.lbl_status.configure(text=f"Loading data… {self._load_progress:.0%}")
+            self.after(LOAD_POLL_MS, self._poll_loading)
+            return
+        self.load_progress_bar.pack_forget()
+        error = self._load_future.exception()
+        if error is not None:
+            traceback.print_exception(error)
+            self.lbl_status.configure(text=f"Error loading data: {error}")
+            self._startup_trace.finish()
+            return
+        for button in self.action_buttons:
+            button.configure(state="normal")
+        self.update_display()
+
+    def _report_startup(self):
+        """Called once the first month is on screen."""
+        trace = self._startup_trace
+        first_data_ms = (time.perf_counter() - trace.started) * 1000
+        trace.add_span("first_data", trace.started, first_data_ms / 1000)
+        trace.finish()
+        first_paint = f"{self._first_paint_ms:.0f} ms" if self._first_paint_ms is not None else "-"
+        print(f"Startup: window painted after {first_paint}, data shown after {first_data_ms:.0f} ms")
+
     def on_period_change(self, choice):
         # This is called when month optionmenu changes.
         # We could trigger update_display here, or rely on the "Refresh View" button
@@ -129,11 +448,10 @@ class FinancialTrackerApp(ctk.CTk):
         pass
 
     def update_display(self):
-        print("--- update_display START ---")
-        self.incomes, self.recurring_expenses, self.occasional_expenses = load_data()
+        """Starts computing the selected month on the worker thread. Results are shown section
+        by section as they arrive (see _poll_display_results); a newer request supersedes it."""
         # 1. Getting the selected month/year
         try:
-            print("Getting selected month/year...")
             selected_month_str = self.month_var.get()
             selected_year_str = self.year_var.get()
 
@@ -150,151 +468,248 @@ class FinancialTrackerApp(ctk.CTk):
             # For now, just return and don't update
             return
 
-        # 2. Calculate start and end dates for the selected period
-        _, num_days_in_month = calendar.monthrange(self.current_year, self.current_month)
-        start_date = datetime.date(self.current_year, self.current_month, 1)
-        end_date = datetime.date(self.current_year, self.current_month, num_days_in_month)
-
-        # 3. Use actual calculation functions
-        total_inc = calculate_total_income(self.incomes, start_date, end_date)
-        total_rec_exp = calculate_total_recurring_expenses(self.recurring_expenses, start_date, end_date)
-        total_occ_exp = calculate_total_occasional_expenses(self.occasional_expenses, start_date, end_date)
-        total_exp = total_rec_exp + total_occ_exp
-        net_balance = total_inc - total_exp
+        # 2. Hand the work to the worker thread, dropping a request that has not started yet
+        self._display_generation += 1
+        if self._display_future is not None:
+            self._display_future.cancel()
+        self._display_trace = instrumentation.start_trace(f"refresh {year_number}-{month_number:02d}")
+        self._display_future = self._display_executor.submit(self._compute_display, self._display_generation, year_number, month_number, self._display_trace)
+        self.lbl_status.configure(text="Computing…")
+        if not self._polling_display_results:
+            self._polling_display_results = True
+            self.after(DISPLAY_POLL_MS, self._poll_display_results)
+
+    def _compute_display(self, generation: int, year: int, month: int, trace: instrumentation.Trace):
+        """Runs on the worker thread: computes each display section and queues it for the Tk
+        thread. Stops early as soon as a newer request has been made."""
+        def superseded():
+            return generation != self._display_generation
 
-        # 4. Update overview labels
-        print("Updating overview labels...")
         try:
-            self.lbl_total_income.configure(text=f"Total Income: €{total_inc:.2f}")
-            self.lbl_total_expenses.configure(text=f"Total Expenses: €{total_exp:.2f}")
-            self.lbl_net_balance.configure(text=f"Net Balance: €{net_balance:.2f}")
-            self.lbl_total_income.configure(text=f"Total Income: €{total_inc:.2f}")
-            self.lbl_total_expenses.configure(text=f"Total Expenses: €{total_exp:.2f}")
-            self.lbl_net_balance.configure(text=f"Net Balance: €{net_balance:.2f}")
-            print("Overview labels updated.")
+            with trace.activate():
+                if superseded(): return
+                with trace.span("reload_if_changed"):
+                    self.reload_if_changed()
+
+                # 3. Monthly totals and tag breakdown (cached until an item affecting this month
+                # changes), and copies of the items the month can show. Only this step holds
+                # data_lock; the rows below are formatted from the copies.
+                with trace.span("monthly_summary"), self.data_lock:
+                    summary = self.summary_cache.get(year, month)
+                    start_date, end_date = summary["start_date"], summary["end_date"]
+                    incomes, recurring_expenses, occasional_expenses = self._period_items(start_date, end_date)
+                self._display_results.put((generation, "overview", summary))
+                if superseded(): return
+
+                # 4. Fixed Costs (Recurring Expenses) rows, formatted here in one batch
+                with trace.span("fixed_costs_rows"):
+                    fixed_costs_rows = []
+                    for item in recurring_expenses:
+                        if isinstance(item.start_date, datetime.date) and item.start_date <= end_date:
+                            formatted_tags = ", ".join(item.tags) if item.tags else "None"
+                            fixed_costs_rows.append((item.start_date, item.amount, item.description.lower(),
+                                f"{item.description:<28} {'€':>3}{item.amount:>10.2f} {item.frequency:>14} {formatted_tags:>20}"))
+                trace.count("fixed_cost_rows", len(fixed_costs_rows))
+                self._display_results.put((generation, "fixed_costs", fixed_costs_rows))
+                if superseded(): return
+
+                # 5. Variable Costs (Occasional Expenses) rows, from the month's items taken off the date index
+                with trace.span("variable_costs_rows"):
+                    variable_costs_rows = []
+                    for item in occasional_expenses:
+                        formatted_tags = ", ".join(item.tags) if item.tags else "None"
+                        variable_costs_rows.append((item.date, item.amount, item.description.lower(),
+                            f"{item.description:<28} {'€':>3}{item.amount:>10.2f} {str(item.date):>14} {formatted_tags:>20}"))
+                trace.count("variable_cost_rows", len(variable_costs_rows))
+                self._display_results.put((generation, "variable_costs", variable_costs_rows))
+                if superseded(): return
+
+                # 6. Statement rows from the merged payment timeline, with the month's running net
+                with trace.span("statement_rows"):
+                    statement_rows, running_net = [], 0.0
+                    for date_obj, item, amount in iter_timeline(incomes, recurring_expenses, occasional_expenses, start_date, end_date):
+                        running_net += amount
+                        description = describe_item(item)
+                        statement_rows.append((date_obj, amount, description.lower(),
+                            f"{str(date_obj):<12} {timeline_kind(item):<12} {description:<28} {amount:>+12.2f} {running_net:>12.2f}"))
+                trace.count("statement_rows", len(statement_rows))
+                self._display_results.put((generation, "statement", statement_rows))
         except Exception as e:
-            print(f"ERROR updating overview labels: {e}")
             traceback.print_exc()
+            self._display_results.put((generation, "error", str(e)))
+            return
+        self._display_results.put((generation, "done", None))
+
+    def _period_items(self, start_date: datetime.date, end_date: datetime.date) -> tuple[list, list, list]:
+        """Copies of the items that can have payments in the period: its one-off incomes and
+        occasional expenses (from the date indexes) and all recurring items. Called with
+        data_lock held, so the rows can then be built from the copies without it."""
+        one_off_incomes, other_incomes = _one_off_in_range(self.incomes, start_date, end_date)
+        one_off_expenses, _ = _one_off_in_range(self.occasional_expenses, start_date, end_date)
+        return [*one_off_incomes, *other_incomes], list(self.recurring_expenses), list(one_off_expenses)
+
+    def _poll_display_results(self):
+        """Runs on the Tk thread: shows whatever sections the worker has finished so far."""
+        while True:
+            try:
+                generation, section, payload = self._display_results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._display_generation:
+                continue # Result of a superseded request
+            trace = self._display_trace
+            if section == "overview":
+                with trace.span("show_overview"):
+                    self.show_overview(payload)
+            elif section == "fixed_costs":
+                with trace.span("render_fixed_costs"):
+                    self.fixed_costs_list.set_rows(payload)
+            elif section == "variable_costs":
+                with trace.span("render_variable_costs"):
+                    self.variable_costs_list.set_rows(payload)
+            elif section == "statement":
+                with trace.span("render_statement"):
+                    self.statement_list.set_rows(payload)
+            elif section == "error":
+                self.lbl_status.configure(text=f"Error: {payload}")
+                trace.finish()
+            elif section == "done":
+                save_error = self.saver.last_error
+                self.lbl_status.configure(text=f"Saving failed, retrying: {save_error}" if save_error is not None else "")
+                trace.finish()
+                if self._startup_trace.duration is None:
+                    self._report_startup()
+
+        if (self._display_future is not None and not self._display_future.done()) or not self._display_results.empty():
+            self.after(DISPLAY_POLL_MS, self._poll_display_results)
+        else:
+            self._polling_display_results = False
 
-        # 5. Populate Fixed Costs (Recurring Expenses) Textbox
-        print("Updating fixed_costs_text...")
+    def show_overview(self, summary: dict):
+        # Update overview labels
         try:
-            self.fixed_costs_text.configure(state="normal")
-            self.fixed_costs_text.delete("1.0", "end")
-            fixed_costs_header = f"{'Description':<28} {'Amount (€)':>14} {'Frequency':>14} {'Tags':>20}\n"
-            fixed_costs_header += "-" * (len(fixed_costs_header) -1) + "\n"
-            self.fixed_costs_text.insert("end", fixed_costs_header)
-            for item in self.recurring_expenses:
-                if not isinstance(item.start_date, datetime.date) or not isinstance(end_date, datetime.date):
-                    continue
-                if item.start_date <= end_date:
-                    formatted_tags = ", ".join(item.tags) if item.tags else "None"
-                    self.fixed_costs_text.insert(
-                        "end",
-                        f"{item.description:<28} {'€':>3}{item.amount:>10.2f} {item.frequency:>14} {formatted_tags:>20}\n"
-                    )
-            self.fixed_costs_text.configure(state="disabled")
-            print("fixed_costs_text updated.")
+            total_exp = summary["recurring_expenses"] + summary["occasional_expenses"]
+            self.lbl_total_income.configure(text=f"Total Income: €{summary['income']:.2f}")
+            self.lbl_total_expenses.configure(text=f"Total Expenses: €{total_exp:.2f}")
+            self.lbl_net_balance.configure(text=f"Net Balance: €{summary['net']:.2f}")
         except Exception as e:
-            print(f"ERROR updating fixed_costs_text: {e}")
+            print(f"ERROR updating overview labels: {e}")
             traceback.print_exc()
-            if hasattr(self, 'fixed_costs_text'): self.fixed_costs_text.configure(state="disabled")
 
-        # 6. Populate Variable Costs (Occasional Expenses) Textbox
-        print("Updating variable_costs_text...")
-        try:
-            self.variable_costs_text.configure(state="normal")
-            self.variable_costs_text.delete("1.0", "end")
-            variable_costs_header = f"{'Description':<28} {'Amount (€)':>14} {'Date':>14} {'Tags':>20}\n"
-            variable_costs_header += "-" * (len(variable_costs_header) -1) + "\n"
-            self.variable_costs_text.insert("end", variable_costs_header)
-            for item in self.occasional_expenses:
-                if not all([isinstance(d, datetime.date) for d in [item.date, start_date, end_date]]):
-                    continue
-                if start_date <= item.date <= end_date:
-                    formatted_tags = ", ".join(item.tags) if item.tags else "None"
-                    self.variable_costs_text.insert(
-                        "end",
-                        f"{item.description:<28} {'€':>3}{item.amount:>10.2f} {str(item.date):>14} {formatted_tags:>20}\n"
-                    )
-            self.variable_costs_text.configure(state="disabled")
-            print("variable_costs_text updated.")
-        except Exception as e:
-            print(f"ERROR updating variable_costs_text: {e}")
-            traceback.print_exc()
-            if hasattr(self, 'variable_costs_text'): self.variable_costs_text.configure(state="disabled")
+        # Populate Tag-Based Statistics Textbox
+        tag_spending = summary["tags"]
+        if tag_spending:
+            tag_header = f"{'Tag':<20} {'Total Spent':>15}\n"
+            tag_lines = [tag_header, "-" * (len(tag_header)-1) + "\n"]
+            tag_lines.extend(f"{tag:<20} €{total:>14.2f}\n" for tag, total in sorted(tag_spending.items()))
+            self.show_text(self.tag_stats_text, "".join(tag_lines))
+        else:
+            self.show_text(self.tag_stats_text, "No tagged expenses this month.")
 
-        # 7. Populate Tag-Based Statistics Textbox
-        print("Updating tag_stats_text...")
+    def show_text(self, textbox: ctk.CTkTextbox, text: str):
+        """Replaces a read-only textbox's content with one insert."""
         try:
-            tag_spending = defaultdict(float)
-
-            # Recurring expenses for tag aggregation
-            for item in self.recurring_expenses:
-                if not all([isinstance(d, datetime.date) for d in [item.start_date, start_date, end_date]]):
-                    # print(f"Warning: Skipping tag aggregation for recurring expense '{item.description}' due to None date.")
-                    continue
-
-                current_payment_date = item.start_date
-                while current_payment_date <= end_date:
-                    if current_payment_date >= start_date:
-                        for tag in item.tags:
-                            tag_spending[tag] += item.amount
-
-                    if item.frequency == "weekly": current_payment_date += datetime.timedelta(days=7)
-                    elif item.frequency == "monthly":
-                        next_m, next_y = (current_payment_date.month % 12) + 1, current_payment_date.year + (current_payment_date.month // 12)
-                        try: current_payment_date = current_payment_date.replace(year=next_y, month=next_m)
-                        except ValueError:
-                            last_day = calendar.monthrange(next_y, next_m)[1]
-                            current_payment_date = current_payment_date.replace(year=next_y, month=next_m, day=last_day)
-                    elif item.frequency == "annually":
-                        try: current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1)
-                        except ValueError:
-                            current_payment_date = current_payment_date.replace(year=current_payment_date.year + 1, day=28)
-                    else: break
-                    if current_payment_date > end_date and item.start_date < current_payment_date :
-                         break
-
-            # Occasional expenses for tag aggregation
-            for item in self.occasional_expenses:
-                if not all([isinstance(d, datetime.date) for d in [item.date, start_date, end_date]]):
-                    # print(f"Warning: Skipping tag aggregation for occasional expense '{item.description}' due to None date.")
-                    continue
-                if start_date <= item.date <= end_date:
-                    for tag in item.tags:
-                        tag_spending[tag] += item.amount
-
-            self.tag_stats_text.configure(state="normal")
-            self.tag_stats_text.delete("1.0", "end")
-            if tag_spending:
-                tag_header = f"{'Tag':<20} {'Total Spent':>15}\n"
-                tag_header += "-" * (len(tag_header)-1) + "\n"
-                self.tag_stats_text.insert("end", tag_header)
-                for tag, total in sorted(tag_spending.items()):
-                    self.tag_stats_text.insert("end", f"{tag:<20} €{total:>14.2f}\n")
-                    self.tag_stats_text.insert("end", f"{tag:<20} €{total:>14.2f}\n")
-            else:
-                self.tag_stats_text.insert("end", "No tagged expenses this month.")
-            self.tag_stats_text.configure(state="disabled")
-            print("tag_stats_text updated.")
+            textbox.configure(state="normal")
+            textbox.delete("1.0", "end")
+            textbox.insert("end", text)
         except Exception as e:
-            print(f"ERROR updating tag_stats_text: {e}")
+            print(f"ERROR updating textbox: {e}")
             traceback.print_exc()
-            if hasattr(self, 'tag_stats_text'): self.tag_stats_text.configure(state="disabled")
-
-        print(f"Display updated for {selected_month_str} {selected_year_str} with real data.")
-        print("--- update_display END ---")
-
-    def save_and_refresh(self):
-        """Saves all data and refreshes the main display."""
-        save_data(self.incomes, self.recurring_expenses, self.occasional_expenses)
+        finally:
+            textbox.configure(state="disabled")
+
+    def export_statement(self):
+        """Writes the selected month's statement to a CSV file chosen by the user."""
+        import tkinter.filedialog as filedialog # Only needed when exporting
+        start_date, end_date = month_period(self.current_year, self.current_month)
+        path = filedialog.asksaveasfilename(
+            title="Export statement", defaultextension=".csv", filetypes=[("CSV files", "*.csv")],
+            initialfile=f"statement_{self.current_year}-{self.current_month:02d}.csv",
+        )
+        if not path:
+            return
+        with self.data_lock:
+            item_lists = self._period_items(start_date, end_date)
+        try:
+            with open(path, 'w', newline='') as f:
+                rows = export_timeline_csv(f, *item_lists, start_date, end_date)
+        except OSError as e:
+            self.lbl_status.configure(text=f"Export failed: {e}")
+            return
+        self.lbl_status.configure(text=f"Exported {rows} payments to {path}")
+
+    def search_items(self, filters: dict):
+        """Queues a SearchIndex.search() with the given arguments on the worker thread. The
+        future's result is the formatted result rows and the seconds the search took."""
+        return self._display_executor.submit(self._search_in_background, filters)
+
+    def _search_in_background(self, filters: dict) -> tuple[list[tuple], float]:
+        started = time.perf_counter()
+        self.reload_if_changed()
+        if self.search_index is None:
+            # Built from copies outside the lock (it takes seconds for a large ledger), then made to
+            # follow the lists; items the Tk thread appended meanwhile are indexed by follow()
+            with self.data_lock:
+                item_lists = (self.incomes, self.recurring_expenses, self.occasional_expenses)
+                copies = [list(item_list) for item_list in item_lists]
+            search_index = SearchIndex(*copies)
+            with self.data_lock:
+                search_index.follow(*item_lists)
+                self.search_index = search_index
+        with self.data_lock:
+            results = self.search_index.search(**filters)
+        rows = []
+        for kind, item in results:
+            date_obj = item.start_date if kind == "recurring_expenses" else item.date
+            amount = item.amount if kind == "incomes" else -item.amount
+            description = describe_item(item)
+            formatted_tags = ", ".join(getattr(item, "tags", ())) or "None"
+            rows.append((date_obj, amount, description.lower(),
+                f"{str(date_obj):<12} {timeline_kind(item):<12} {description:<28} {amount:>+12.2f} {getattr(item, 'frequency', ''):>10} {formatted_tags:>20}"))
+        return rows, time.perf_counter() - started
+
+    def reload_if_changed(self):
+        """Reloads the data file only if another process changed it since we last read or wrote it.
+        Called on the worker thread. The file is read without data_lock; the lists are swapped
+        in under it, unless an item was added meanwhile (the reload is retried next time)."""
+        if self.saver.busy():
+            return # Our own write is under way; reloading now could drop items not yet written
+        if self.data_watcher.has_changed():
+            print("Data file changed on disk, reloading...")
+            items_added = self._items_added
+            signature = self.data_watcher.signature() # Changes made while loading count as unseen
+            loaded = load_data()
+            with self.data_lock:
+                if self._items_added != items_added or self.saver.busy():
+                    return # The loaded lists may lack the new item; it is still shown and will be saved
+                self.incomes, self.recurring_expenses, self.occasional_expenses = loaded
+                self.data_watcher.acknowledge(signature)
+                self.summary_cache = MonthlySummaryCache(self.incomes, self.recurring_expenses, self.occasional_expenses)
+                self.search_index = None
+
+    def add_item(self, add_function, list_name: str, *args):
+        """Adds an item through one of the add_*_item functions while the worker is kept out,
+        journals it and refreshes the display."""
+        with self.data_lock:
+            new_item = add_function(getattr(self, list_name), *args)
+            self._items_added += 1
+            # Queued before the lock is released: once the saver is busy, the worker will not
+            # swap in reloaded lists that lack the item
+            self.saver.append(new_item)
         self.update_display()
+        return new_item
+
+    def on_close(self):
+        self._display_generation += 1 # Makes a running computation stop at its next check
+        self._display_executor.shutdown(wait=False, cancel_futures=True)
+        self.saver.close() # Writes whatever is still pending before the window goes
+        self.destroy()
 
     # --- Action methods to open windows ---
     def add_income_window(self):
         # Ensure only one instance of the window is open
         if not hasattr(self, '_add_income_window') or not self._add_income_window.winfo_exists():
+            from gui_dialogs import AddIncomeWindow # Imported on first use to keep startup short
             self._add_income_window = AddIncomeWindow(self)
             self._add_income_window.grab_set() # Make window modal
         else:
@@ -302,287 +717,31 @@ class FinancialTrackerApp(ctk.CTk):
 
     def add_recurring_expense_window(self):
         if not hasattr(self, '_add_recurring_expense_window') or not self._add_recurring_expense_window.winfo_exists():
+            from gui_dialogs import AddRecurringExpenseWindow # Imported on first use to keep startup short
             self._add_recurring_expense_window = AddRecurringExpenseWindow(self)
             self._add_recurring_expense_window.grab_set()
         else:
             self._add_recurring_expense_window.focus()
 
+    def search_window(self):
+        # Not modal: the month view stays usable while searching
+        if not hasattr(self, '_search_window') or not self._search_window.winfo_exists():
+            self._search_window = SearchWindow(self)
+        else:
+            self._search_window.focus()
+
     def add_occasional_expense_window(self):
         if not hasattr(self, '_add_occasional_expense_window') or not self._add_occasional_expense_window.winfo_exists():
+            from gui_dialogs import AddOccasionalExpenseWindow # Imported on first use to keep startup short
             self._add_occasional_expense_window = AddOccasionalExpenseWindow(self)
             self._add_occasional_expense_window.grab_set()
         else:
             self._add_occasional_expense_window.focus()
 
-# --- Data Entry Windows ---
-
-class AddIncomeWindow(ctk.CTkToplevel):
-    def __init__(self, master_app: FinancialTrackerApp):
-        super().__init__(master_app)
-        self.master_app = master_app
-
-        self.title("Add Income")
-        self.geometry("450x350") # Adjusted size
-        self.resizable(False, False)
-
-        # Center on master window (approximately)
-        # master_x = master_app.winfo_x()
-        # master_y = master_app.winfo_y()
-        # master_width = master_app.winfo_width()
-        # master_height = master_app.winfo_height()
-        # self.geometry(f"+{master_x + master_width//2 - 225}+{master_y + master_height//2 - 175}")
-
-
-        main_frame = ctk.CTkFrame(self)
-        main_frame.pack(expand=True, fill="both", padx=20, pady=20)
-
-        ctk.CTkLabel(main_frame, text="Source:").grid(row=0, column=0, padx=5, pady=10, sticky="w")
-        self.source_entry = ctk.CTkEntry(main_frame, width=250)
-        self.source_entry.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
-
-        ctk.CTkLabel(main_frame, text="Amount:").grid(row=1, column=0, padx=5, pady=10, sticky="w")
-        self.amount_entry = ctk.CTkEntry(main_frame, width=250)
-        self.amount_entry.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
-
-        ctk.CTkLabel(main_frame, text="Date (YYYY-MM-DD):").grid(row=2, column=0, padx=5, pady=10, sticky="w")
-        self.date_entry = ctk.CTkEntry(main_frame, width=250)
-        self.date_entry.grid(row=2, column=1, padx=5, pady=10, sticky="ew")
-        self.date_entry.insert(0, datetime.date.today().isoformat()) # Default to today
-
-        ctk.CTkLabel(main_frame, text="Frequency:").grid(row=3, column=0, padx=5, pady=10, sticky="w")
-        self.frequency_var = ctk.StringVar(value="once")
-        frequencies = ["once", "weekly", "monthly", "annually"]
-        ctk.CTkOptionMenu(main_frame, variable=self.frequency_var, values=frequencies).grid(row=3, column=1, padx=5, pady=10, sticky="ew")
-
-        self.error_label = ctk.CTkLabel(main_frame, text="", text_color="red")
-        self.error_label.grid(row=4, column=0, columnspan=2, pady=(0,10))
-
-        button_frame = ctk.CTkFrame(main_frame) # Frame for buttons
-        button_frame.grid(row=5, column=0, columnspan=2, pady=(10,0))
-
-        submit_button = ctk.CTkButton(button_frame, text="Add Income", command=self.submit_income)
-        submit_button.pack(side="left", padx=10)
-
-        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self.destroy, fg_color="gray")
-        cancel_button.pack(side="left", padx=10)
-
-        main_frame.grid_columnconfigure(1, weight=1) # Allow entry widgets to expand
-        self.source_entry.focus() # Set focus to the first entry
-
-    def submit_income(self):
-        source = self.source_entry.get().strip()
-        amount_str = self.amount_entry.get().strip()
-        date_str = self.date_entry.get().strip()
-        frequency = self.frequency_var.get()
-
-        self.error_label.configure(text="") # Clear previous errors
-
-        if not source or not amount_str or not date_str:
-            self.error_label.configure(text="Source, Amount, and Date are required.")
-            return
-
-        try:
-            amount = float(amount_str)
-            if amount <= 0:
-                self.error_label.configure(text="Amount must be positive.")
-                return
-        except ValueError:
-            self.error_label.configure(text="Invalid amount format.")
-            return
-
-        try:
-            income_date = parse_date(date_str) # Use imported parse_date
-        except ValueError:
-            self.error_label.configure(text="Invalid date. Use YYYY-MM-DD.")
-            return
-
-        # print(f"DUMMY SUBMIT Income: Source: {source}, Amount: {amount}, Date: {income_date}, Frequency: {frequency}")
-
-        try:
-            add_income_item(self.master_app.incomes, source, amount, income_date, frequency)
-            self.master_app.save_and_refresh()
-            self.destroy()
-        except Exception as e:
-            self.error_label.configure(text=f"Error adding income: {e}")
-            return
-
-
-class AddRecurringExpenseWindow(ctk.CTkToplevel):
-    def __init__(self, master_app: FinancialTrackerApp):
-        super().__init__(master_app)
-        self.master_app = master_app
-
-        self.title("Add Recurring Expense")
-        self.geometry("450x400") # Slightly taller for tags
-        self.resizable(False, False)
-
-        main_frame = ctk.CTkFrame(self)
-        main_frame.pack(expand=True, fill="both", padx=20, pady=20)
-
-        ctk.CTkLabel(main_frame, text="Description:").grid(row=0, column=0, padx=5, pady=10, sticky="w")
-        self.description_entry = ctk.CTkEntry(main_frame, width=250)
-        self.description_entry.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
-
-        ctk.CTkLabel(main_frame, text="Amount:").grid(row=1, column=0, padx=5, pady=10, sticky="w")
-        self.amount_entry = ctk.CTkEntry(main_frame, width=250)
-        self.amount_entry.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
-
-        ctk.CTkLabel(main_frame, text="Frequency:").grid(row=2, column=0, padx=5, pady=10, sticky="w")
-        self.frequency_var = ctk.StringVar(value="monthly")
-        frequencies = ["weekly", "monthly", "annually"]
-        ctk.CTkOptionMenu(main_frame, variable=self.frequency_var, values=frequencies).grid(row=2, column=1, padx=5, pady=10, sticky="ew")
-
-        ctk.CTkLabel(main_frame, text="Start Date (YYYY-MM-DD):").grid(row=3, column=0, padx=5, pady=10, sticky="w")
-        self.start_date_entry = ctk.CTkEntry(main_frame, width=250)
-        self.start_date_entry.grid(row=3, column=1, padx=5, pady=10, sticky="ew")
-        self.start_date_entry.insert(0, datetime.date.today().isoformat())
-
-        ctk.CTkLabel(main_frame, text="Tags (comma-sep):").grid(row=4, column=0, padx=5, pady=10, sticky="w")
-        self.tags_entry = ctk.CTkEntry(main_frame, width=250)
-        self.tags_entry.grid(row=4, column=1, padx=5, pady=10, sticky="ew")
-
-        self.error_label = ctk.CTkLabel(main_frame, text="", text_color="red")
-        self.error_label.grid(row=5, column=0, columnspan=2, pady=(0,10))
-
-        button_frame = ctk.CTkFrame(main_frame)
-        button_frame.grid(row=6, column=0, columnspan=2, pady=(10,0))
-
-        submit_button = ctk.CTkButton(button_frame, text="Add Expense", command=self.submit_expense)
-        submit_button.pack(side="left", padx=10)
-
-        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self.destroy, fg_color="gray")
-        cancel_button.pack(side="left", padx=10)
-
-        main_frame.grid_columnconfigure(1, weight=1)
-        self.description_entry.focus()
-
-    def submit_expense(self):
-        description = self.description_entry.get().strip()
-        amount_str = self.amount_entry.get().strip()
-        frequency = self.frequency_var.get()
-        start_date_str = self.start_date_entry.get().strip()
-        tags_str = self.tags_entry.get().strip()
-
-        self.error_label.configure(text="")
-
-        if not description or not amount_str or not start_date_str:
-            self.error_label.configure(text="Description, Amount, and Start Date are required.")
-            return
-
-        try:
-            amount = float(amount_str)
-            if amount <= 0:
-                self.error_label.configure(text="Amount must be positive.")
-                return
-        except ValueError:
-            self.error_label.configure(text="Invalid amount format.")
-            return
-
-        try:
-            start_date = parse_date(start_date_str) # Use imported parse_date
-        except ValueError:
-            self.error_label.configure(text="Invalid start date. Use YYYY-MM-DD.")
-            return
-
-        tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()] if tags_str else []
-
-        # print(f"DUMMY SUBMIT Recurring Expense: Desc: {description}, Amount: {amount}, Freq: {frequency}, Start: {start_date}, Tags: {tags}")
-        try:
-            add_recurring_expense_item(self.master_app.recurring_expenses, description, amount, frequency, start_date, tags)
-            self.master_app.save_and_refresh()
-            self.destroy()
-        except Exception as e:
-            self.error_label.configure(text=f"Error adding recurring expense: {e}")
-            return
-
-
-class AddOccasionalExpenseWindow(ctk.CTkToplevel):
-    def __init__(self, master_app: FinancialTrackerApp):
-        super().__init__(master_app)
-        self.master_app = master_app
-
-        self.title("Add Occasional Expense")
-        self.geometry("450x350")
-        self.resizable(False, False)
-
-        main_frame = ctk.CTkFrame(self)
-        main_frame.pack(expand=True, fill="both", padx=20, pady=20)
-
-        ctk.CTkLabel(main_frame, text="Description:").grid(row=0, column=0, padx=5, pady=10, sticky="w")
-        self.description_entry = ctk.CTkEntry(main_frame, width=250)
-        self.description_entry.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
-
-        ctk.CTkLabel(main_frame, text="Amount:").grid(row=1, column=0, padx=5, pady=10, sticky="w")
-        self.amount_entry = ctk.CTkEntry(main_frame, width=250)
-        self.amount_entry.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
-
-        ctk.CTkLabel(main_frame, text="Date (YYYY-MM-DD):").grid(row=2, column=0, padx=5, pady=10, sticky="w")
-        self.date_entry = ctk.CTkEntry(main_frame, width=250)
-        self.date_entry.grid(row=2, column=1, padx=5, pady=10, sticky="ew")
-        self.date_entry.insert(0, datetime.date.today().isoformat())
-
-        ctk.CTkLabel(main_frame, text="Tags (comma-sep):").grid(row=3, column=0, padx=5, pady=10, sticky="w")
-        self.tags_entry = ctk.CTkEntry(main_frame, width=250)
-        self.tags_entry.grid(row=3, column=1, padx=5, pady=10, sticky="ew")
-
-        self.error_label = ctk.CTkLabel(main_frame, text="", text_color="red")
-        self.error_label.grid(row=4, column=0, columnspan=2, pady=(0,10))
-
-        button_frame = ctk.CTkFrame(main_frame)
-        button_frame.grid(row=5, column=0, columnspan=2, pady=(10,0))
-
-        submit_button = ctk.CTkButton(button_frame, text="Add Expense", command=self.submit_expense)
-        submit_button.pack(side="left", padx=10)
-
-        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self.destroy, fg_color="gray")
-        cancel_button.pack(side="left", padx=10)
-
-        main_frame.grid_columnconfigure(1, weight=1)
-        self.description_entry.focus()
-
-    def submit_expense(self):
-        description = self.description_entry.get().strip()
-        amount_str = self.amount_entry.get().strip()
-        date_str = self.date_entry.get().strip()
-        tags_str = self.tags_entry.get().strip()
-
-        self.error_label.configure(text="")
-
-        if not description or not amount_str or not date_str:
-            self.error_label.configure(text="Description, Amount, and Date are required.")
-            return
-
-        try:
-            amount = float(amount_str)
-            if amount <= 0:
-                self.error_label.configure(text="Amount must be positive.")
-                return
-        except ValueError:
-            self.error_label.configure(text="Invalid amount format.")
-            return
-
-        try:
-            expense_date = parse_date(date_str) # Use imported parse_date
-        except ValueError:
-            self.error_label.configure(text="Invalid date. Use YYYY-MM-DD.")
-            return
-
-        tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()] if tags_str else []
-
-        # print(f"DUMMY SUBMIT Occasional Expense: Desc: {description}, Amount: {amount}, Date: {expense_date}, Tags: {tags}")
-        try:
-            add_occasional_expense_item(self.master_app.occasional_expenses, description, amount, expense_date, tags)
-            self.master_app.save_and_refresh()
-            self.destroy()
-        except Exception as e:
-            self.error_label.configure(text=f"Error adding occasional expense: {e}")
-            return
-
-
 if __name__ == "__main__":
+    instrumentation.configure_from_argv(sys.argv[1:]) # --trace[=timings,profile,memory]
     # ctk.set_appearance_mode("dark") # or "light"
     # ctk.set_default_color_theme("blue") # or "green", "dark-blue"
-    app = FinancialTrackerApp()
-    app.after(100, app.update_display) # Call update_display shortly after app starts
+    app = FinancialTrackerApp() # Loads the data in the background and shows the month when done
     app.mainloop()
 
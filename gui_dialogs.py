@@ -0,0 +1,271 @@
+# gui_dialogs.py
+# The data entry windows of the GUI. They are only opened now and then, so gui_app imports
+# this module the first time one of them is needed instead of at startup.
+
+import customtkinter as ctk
+import datetime
+import math
+
+from financial_tracker import (
+    parse_date, # Utility
+    add_income_item, add_recurring_expense_item, add_occasional_expense_item, # Item adders
+)
+
+class AddIncomeWindow(ctk.CTkToplevel):
+    def __init__(self, master_app):
+        super().__init__(master_app)
+        self.master_app = master_app
+
+        self.title("Add Income")
+        self.geometry("450x350") # Adjusted size
+        self.resizable(False, False)
+
+        # Center on master window (approximately)
+        # master_x = master_app.winfo_x()
+        # master_y = master_app.winfo_y()
+        # master_width = master_app.winfo_width()
+        # master_height = master_app.winfo_height()
+        # self.geometry(f"+{master_x + master_width//2 - 225}+{master_y + master_height//2 - 175}")
+
+
+        main_frame = ctk.CTkFrame(self)
+        main_frame.pack(expand=True, fill="both", padx=20, pady=20)
+
+        ctk.CTkLabel(main_frame, text="Source:").grid(row=0, column=0, padx=5, pady=10, sticky="w")
+        self.source_entry = ctk.CTkEntry(main_frame, width=250)
+        self.source_entry.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
+
+        ctk.CTkLabel(main_frame, text="Amount:").grid(row=1, column=0, padx=5, pady=10, sticky="w")
+        self.amount_entry = ctk.CTkEntry(main_frame, width=250)
+        self.amount_entry.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
+
+        ctk.CTkLabel(main_frame, text="Date (YYYY-MM-DD):").grid(row=2, column=0, padx=5, pady=10, sticky="w")
+        self.date_entry = ctk.CTkEntry(main_frame, width=250)
+        self.date_entry.grid(row=2, column=1, padx=5, pady=10, sticky="ew")
+        self.date_entry.insert(0, datetime.date.today().isoformat()) # Default to today
+
+        ctk.CTkLabel(main_frame, text="Frequency:").grid(row=3, column=0, padx=5, pady=10, sticky="w")
+        self.frequency_var = ctk.StringVar(value="once")
+        frequencies = ["once", "weekly", "monthly", "annually"]
+        ctk.CTkOptionMenu(main_frame, variable=self.frequency_var, values=frequencies).grid(row=3, column=1, padx=5, pady=10, sticky="ew")
+
+        self.error_label = ctk.CTkLabel(main_frame, text="", text_color="red")
+        self.error_label.grid(row=4, column=0, columnspan=2, pady=(0,10))
+
+        button_frame = ctk.CTkFrame(main_frame) # Frame for buttons
+        button_frame.grid(row=5, column=0, columnspan=2, pady=(10,0))
+
+        submit_button = ctk.CTkButton(button_frame, text="Add Income", command=self.submit_income)
+        submit_button.pack(side="left", padx=10)
+
+        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self.destroy, fg_color="gray")
+        cancel_button.pack(side="left", padx=10)
+
+        main_frame.grid_columnconfigure(1, weight=1) # Allow entry widgets to expand
+        self.source_entry.focus() # Set focus to the first entry
+
+    def submit_income(self):
+        source = self.source_entry.get().strip()
+        amount_str = self.amount_entry.get().strip()
+        date_str = self.date_entry.get().strip()
+        frequency = self.frequency_var.get()
+
+        self.error_label.configure(text="") # Clear previous errors
+
+        if not source or not amount_str or not date_str:
+            self.error_label.configure(text="Source, Amount, and Date are required.")
+            return
+
+        try:
+            amount = float(amount_str)
+            if not math.isfinite(amount) or amount <= 0:
+                self.error_label.configure(text="Amount must be a positive number.")
+                return
+        except ValueError:
+            self.error_label.configure(text="Invalid amount format.")
+            return
+
+        try:
+            income_date = parse_date(date_str) # Use imported parse_date
+        except ValueError:
+            self.error_label.configure(text="Invalid date. Use YYYY-MM-DD.")
+            return
+
+        # print(f"DUMMY SUBMIT Income: Source: {source}, Amount: {amount}, Date: {income_date}, Frequency: {frequency}")
+
+        try:
+            self.master_app.add_item(add_income_item, "incomes", source, amount, income_date, frequency)
+            self.destroy()
+        except Exception as e:
+            self.error_label.configure(text=f"Error adding income: {e}")
+            return
+
+
+class AddRecurringExpenseWindow(ctk.CTkToplevel):
+    def __init__(self, master_app):
+        super().__init__(master_app)
+        self.master_app = master_app
+
+        self.title("Add Recurring Expense")
+        self.geometry("450x400") # Slightly taller for tags
+        self.resizable(False, False)
+
+        main_frame = ctk.CTkFrame(self)
+        main_frame.pack(expand=True, fill="both", padx=20, pady=20)
+
+        ctk.CTkLabel(main_frame, text="Description:").grid(row=0, column=0, padx=5, pady=10, sticky="w")
+        self.description_entry = ctk.CTkEntry(main_frame, width=250)
+        self.description_entry.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
+
+        ctk.CTkLabel(main_frame, text="Amount:").grid(row=1, column=0, padx=5, pady=10, sticky="w")
+        self.amount_entry = ctk.CTkEntry(main_frame, width=250)
+        self.amount_entry.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
+
+        ctk.CTkLabel(main_frame, text="Frequency:").grid(row=2, column=0, padx=5, pady=10, sticky="w")
+        self.frequency_var = ctk.StringVar(value="monthly")
+        frequencies = ["weekly", "monthly", "annually"]
+        ctk.CTkOptionMenu(main_frame, variable=self.frequency_var, values=frequencies).grid(row=2, column=1, padx=5, pady=10, sticky="ew")
+
+        ctk.CTkLabel(main_frame, text="Start Date (YYYY-MM-DD):").grid(row=3, column=0, padx=5, pady=10, sticky="w")
+        self.start_date_entry = ctk.CTkEntry(main_frame, width=250)
+        self.start_date_entry.grid(row=3, column=1, padx=5, pady=10, sticky="ew")
+        self.start_date_entry.insert(0, datetime.date.today().isoformat())
+
+        ctk.CTkLabel(main_frame, text="Tags (comma-sep):").grid(row=4, column=0, padx=5, pady=10, sticky="w")
+        self.tags_entry = ctk.CTkEntry(main_frame, width=250)
+        self.tags_entry.grid(row=4, column=1, padx=5, pady=10, sticky="ew")
+
+        self.error_label = ctk.CTkLabel(main_frame, text="", text_color="red")
+        self.error_label.grid(row=5, column=0, columnspan=2, pady=(0,10))
+
+        button_frame = ctk.CTkFrame(main_frame)
+        button_frame.grid(row=6, column=0, columnspan=2, pady=(10,0))
+
+        submit_button = ctk.CTkButton(button_frame, text="Add Expense", command=self.submit_expense)
+        submit_button.pack(side="left", padx=10)
+
+        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self.destroy, fg_color="gray")
+        cancel_button.pack(side="left", padx=10)
+
+        main_frame.grid_columnconfigure(1, weight=1)
+        self.description_entry.focus()
+
+    def submit_expense(self):
+        description = self.description_entry.get().strip()
+        amount_str = self.amount_entry.get().strip()
+        frequency = self.frequency_var.get()
+        start_date_str = self.start_date_entry.get().strip()
+        tags_str = self.tags_entry.get().strip()
+
+        self.error_label.configure(text="")
+
+        if not description or not amount_str or not start_date_str:
+            self.error_label.configure(text="Description, Amount, and Start Date are required.")
+            return
+
+        try:
+            amount = float(amount_str)
+            if not math.isfinite(amount) or amount <= 0:
+                self.error_label.configure(text="Amount must be a positive number.")
+                return
+        except ValueError:
+            self.error_label.configure(text="Invalid amount format.")
+            return
+
+        try:
+            start_date = parse_date(start_date_str) # Use imported parse_date
+        except ValueError:
+            self.error_label.configure(text="Invalid start date. Use YYYY-MM-DD.")
+            return
+
+        tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()] if tags_str else []
+
+        # print(f"DUMMY SUBMIT Recurring Expense: Desc: {description}, Amount: {amount}, Freq: {frequency}, Start: {start_date}, Tags: {tags}")
+        try:
+            self.master_app.add_item(add_recurring_expense_item, "recurring_expenses", description, amount, frequency, start_date, tags)
+            self.destroy()
+        except Exception as e:
+            self.error_label.configure(text=f"Error adding recurring expense: {e}")
+            return
+
+
+class AddOccasionalExpenseWindow(ctk.CTkToplevel):
+    def __init__(self, master_app):
+        super().__init__(master_app)
+        self.master_app = master_app
+
+        self.title("Add Occasional Expense")
+        self.geometry("450x350")
+        self.resizable(False, False)
+
+        main_frame = ctk.CTkFrame(self)
+        main_frame.pack(expand=True, fill="both", padx=20, pady=20)
+
+        ctk.CTkLabel(main_frame, text="Description:").grid(row=0, column=0, padx=5, pady=10, sticky="w")
+        self.description_entry = ctk.CTkEntry(main_frame, width=250)
+        self.description_entry.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
+
+        ctk.CTkLabel(main_frame, text="Amount:").grid(row=1, column=0, padx=5, pady=10, sticky="w")
+        self.amount_entry = ctk.CTkEntry(main_frame, width=250)
+        self.amount_entry.grid(row=1, column=1, padx=5, pady=10, sticky="ew")
+
+        ctk.CTkLabel(main_frame, text="Date (YYYY-MM-DD):").grid(row=2, column=0, padx=5, pady=10, sticky="w")
+        self.date_entry = ctk.CTkEntry(main_frame, width=250)
+        self.date_entry.grid(row=2, column=1, padx=5, pady=10, sticky="ew")
+        self.date_entry.insert(0, datetime.date.today().isoformat())
+
+        ctk.CTkLabel(main_frame, text="Tags (comma-sep):").grid(row=3, column=0, padx=5, pady=10, sticky="w")
+        self.tags_entry = ctk.CTkEntry(main_frame, width=250)
+        self.tags_entry.grid(row=3, column=1, padx=5, pady=10, sticky="ew")
+
+        self.error_label = ctk.CTkLabel(main_frame, text="", text_color="red")
+        self.error_label.grid(row=4, column=0, columnspan=2, pady=(0,10))
+
+        button_frame = ctk.CTkFrame(main_frame)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=(10,0))
+
+        submit_button = ctk.CTkButton(button_frame, text="Add Expense", command=self.submit_expense)
+        submit_button.pack(side="left", padx=10)
+
+        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self.destroy, fg_color="gray")
+        cancel_button.pack(side="left", padx=10)
+
+        main_frame.grid_columnconfigure(1, weight=1)
+        self.description_entry.focus()
+
+    def submit_expense(self):
+        description = self.description_entry.get().strip()
+        amount_str = self.amount_entry.get().strip()
+        date_str = self.date_entry.get().strip()
+        tags_str = self.tags_entry.get().strip()
+
+        self.error_label.configure(text="")
+
+        if not description or not amount_str or not date_str:
+            self.error_label.configure(text="Description, Amount, and Date are required.")
+            return
+
+        try:
+            amount = float(amount_str)
+            if not math.isfinite(amount) or amount <= 0:
+                self.error_label.configure(text="Amount must be a positive number.")
+                return
+        except ValueError:
+            self.error_label.configure(text="Invalid amount format.")
+            return
+
+        try:
+            expense_date = parse_date(date_str) # Use imported parse_date
+        except ValueError:
+            self.error_label.configure(text="Invalid date. Use YYYY-MM-DD.")
+            return
+
+        tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()] if tags_str else []
+
+        # print(f"DUMMY SUBMIT Occasional Expense: Desc: {description}, Amount: {amount}, Date: {expense_date}, Tags: {tags}")
+        try:
+            self.master_app.add_item(add_occasional_expense_item, "occasional_expenses", description, amount, expense_date, tags)
+            self.destroy()
+        except Exception as e:
+            self.error_label.configure(text=f"Error adding occasional expense: {e}")
+            return
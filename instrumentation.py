@@ -0,0 +1,274 @@
+# instrumentation.py
+# Named timing spans, counters and optional profiling. A trace covers one unit of work (a GUI
+# refresh, a CLI command); spans and counters recorded while it is active on a thread are
+# attached to it, and every span also feeds process-wide totals. Recording is always on and
+# costs a perf_counter call per span; printing, profiling and memory tracking are opt-in:
+#
+#     SFT_TRACE=timings,profile,memory python gui_app.py
+#     python gui_app.py --trace=timings
+#
+# "timings" prints each trace's breakdown when it finishes (and the process totals on exit),
+# "profile" runs cProfile while a trace is active and prints its busiest functions, and
+# "memory" tracks allocations with tracemalloc and records each trace's peak. Set
+# SFT_TRACE_FILE to also append every finished trace to a JSON lines file.
+
+import atexit
+import collections
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+TRACE_ENV = "SFT_TRACE"
+TRACE_FILE_ENV = "SFT_TRACE_FILE"
+TRACE_OPTIONS = ("timings", "profile", "memory")
+PROFILE_TOP_FUNCTIONS = 15
+RECENT_TRACES = 100
+
+_options: set[str] = set()
+_trace_file: str | None = None
+_local = threading.local()
+_stats_lock = threading.Lock()
+_span_totals: dict[str, list] = {} # name -> [calls, total seconds, longest]
+_counter_totals: collections.Counter = collections.Counter()
+_recent_traces: collections.deque = collections.deque(maxlen=RECENT_TRACES)
+_exit_report_registered = False
+
+
+def configure(options=None, trace_file: str | None = None):
+    """Turns on the given options (a comma-separated string or a list). Without arguments
+    they are read from the SFT_TRACE and SFT_TRACE_FILE environment variables."""
+    global _trace_file, _exit_report_registered
+    if options is None:
+        options = os.environ.get(TRACE_ENV, "")
+    if isinstance(options, str):
+        options = [option.strip() for option in options.split(",") if option.strip()]
+    options = {"timings", "profile", "memory"} if "all" in options or "1" in options else set(options)
+    unknown = options - set(TRACE_OPTIONS)
+    if unknown:
+        print(f"Unknown trace options ignored: {', '.join(sorted(unknown))}")
+    _options.clear()
+    _options.update(options - unknown)
+    _trace_file = trace_file or os.environ.get(TRACE_FILE_ENV) or None
+    if "memory" in _options and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if "timings" in _options and not _exit_report_registered:
+        atexit.register(lambda: print(format_totals()))
+        _exit_report_registered = True
+
+
+def configure_from_argv(argv: list[str]) -> list[str]:
+    """Handles a --trace or --trace=<options> flag (falling back to SFT_TRACE) and returns
+    the remaining arguments."""
+    options, remaining = None, []
+    for argument in argv:
+        if argument == "--trace":
+            options = "timings"
+        elif argument.startswith("--trace="):
+            options = argument.split("=", 1)[1]
+        else:
+            remaining.append(argument)
+    configure(options)
+    return remaining
+
+
+def enabled(option: str) -> bool:
+    return option in _options
+
+
+class Trace:
+    """Spans and counters of one unit of work. Spans may be recorded from several threads,
+    so each keeps its start offset and thread name; the breakdown lists them in start order."""
+
+    def __init__(self, name: str, started: float | None = None):
+        self.name = name
+        self.started = time.perf_counter() if started is None else started
+        self.duration: float | None = None
+        self.spans: list[tuple[str, float, float, str]] = [] # (name, offset, seconds, thread)
+        self.counters: collections.Counter = collections.Counter()
+        self._profile_stats: pstats.Stats | None = None
+        self._lock = threading.Lock()
+        if "memory" in _options:
+            tracemalloc.reset_peak()
+
+    def add_span(self, name: str, started: float, seconds: float):
+        with self._lock:
+            self.spans.append((name, started - self.started, seconds, threading.current_thread().name))
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        """Times a block and records it on this trace, whichever thread runs it."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.add_span(name, started, seconds)
+            _add_to_totals(name, seconds)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this the current trace of the calling thread, so module-level span() and
+        count() calls land on it. Runs the profiler for the duration when profiling is on."""
+        previous = getattr(_local, "trace", None)
+        _local.trace = self
+        profiler = cProfile.Profile() if "profile" in _options and previous is None else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                with self._lock:
+                    if self._profile_stats is None:
+                        self._profile_stats = pstats.Stats(profiler)
+                    else:
+                        self._profile_stats.add(profiler)
+            _local.trace = previous
+
+    def finish(self):
+        """Ends the trace, keeps it among the recent traces and reports it as configured."""
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.started
+        if "memory" in _options and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            self.counters["memory_current_bytes"] = current
+            self.counters["memory_peak_bytes"] = peak
+        _add_to_totals(self.name, self.duration)
+        _recent_traces.append(self)
+        if "timings" in _options:
+            print(self.format())
+        if self._profile_stats is not None:
+            output = io.StringIO()
+            self._profile_stats.stream = output
+            self._profile_stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            print(f"Profile of {self.name}:\n{output.getvalue()}")
+        if _trace_file:
+            with open(_trace_file, 'a') as f:
+                f.write(json.dumps(self.breakdown()) + "\n")
+
+    def breakdown(self) -> dict:
+        """JSON-ready timings: total, spans in start order and counters."""
+        return {
+            "name": self.name,
+            "seconds": self.duration,
+            "spans": [
+                {"name": name, "offset": offset, "seconds": seconds, "thread": thread}
+                for name, offset, seconds, thread in sorted(self.spans, key=lambda span: span[1])
+            ],
+            "counters": dict(self.counters),
+        }
+
+    def format(self) -> str:
+        lines = [f"[{self.name}] {(self.duration or 0.0) * 1000:.2f} ms"]
+        for name, offset, seconds, thread in sorted(self.spans, key=lambda span: span[1]):
+            lines.append(f"  +{offset * 1000:8.2f} ms  {name:<36} {seconds * 1000:9.2f} ms  ({thread})")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name:<48} {value:>12}")
+        return "\n".join(lines)
+
+
+def start_trace(name: str, started: float | None = None) -> Trace:
+    """A new trace, timed from now or from an earlier time.perf_counter() reading."""
+    return Trace(name, started)
+
+
+@contextlib.contextmanager
+def traced(name: str):
+    """Runs a block as a trace of its own, active on the calling thread."""
+    trace = Trace(name)
+    with trace.activate():
+        yield trace
+    trace.finish()
+
+
+def current_trace() -> Trace | None:
+    return getattr(_local, "trace", None)
+
+
+def _add_to_totals(name: str, seconds: float):
+    with _stats_lock:
+        totals = _span_totals.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] = max(totals[2], seconds)
+
+
+@contextlib.contextmanager
+def span(name: str):
+    """Times a block: added to the current trace of this thread (if any) and to the totals."""
+    trace = getattr(_local, "trace", None)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        if trace is not None:
+            trace.add_span(name, started, seconds)
+        _add_to_totals(name, seconds)
+
+
+def timed(function=None, *, name: str | None = None):
+    """Decorator form of span(), named after the function unless a name is given."""
+    def decorate(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate(function) if function is not None else decorate
+
+
+def count(name: str, amount: int = 1):
+    """Adds to a counter on the current trace of this thread (if any) and to the totals."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.count(name, amount)
+    with _stats_lock:
+        _counter_totals[name] += amount
+
+
+def totals() -> dict:
+    """Process-wide span timings ({name: {calls, seconds, longest}}) and counters."""
+    with _stats_lock:
+        return {
+            "spans": {name: {"calls": calls, "seconds": seconds, "longest": longest} for name, (calls, seconds, longest) in _span_totals.items()},
+            "counters": dict(_counter_totals),
+        }
+
+
+def recent_traces() -> list[Trace]:
+    return list(_recent_traces)
+
+
+def export(path: str):
+    """Writes the totals and the recent traces' breakdowns to a JSON file."""
+    with open(path, 'w') as f:
+        json.dump({"totals": totals(), "traces": [trace.breakdown() for trace in recent_traces() if trace.duration is not None]}, f, indent=4)
+
+
+def format_totals() -> str:
+    current = totals()
+    lines = [f"{'Span':<36} {'Calls':>7} {'Total ms':>11} {'Longest ms':>11}"]
+    for name, span_totals in sorted(current["spans"].items(), key=lambda entry: -entry[1]["seconds"]):
+        lines.append(f"{name:<36} {span_totals['calls']:>7} {span_totals['seconds'] * 1000:>11.2f} {span_totals['longest'] * 1000:>11.2f}")
+    for name, value in sorted(current["counters"].items()):
+        lines.append(f"{name:<36} {value:>31}")
+    return "\n".join(lines)
+
+
+configure()
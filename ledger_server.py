@@ -0,0 +1,420 @@
+# ledger_server.py
+# Local HTTP/JSON service over a ledger, for dashboards and scripts that should not start the
+# GUI. Standard library only (asyncio streams and a small HTTP/1.1 reader), bound to localhost
+# by default, so it runs fully offline.
+#
+#     python ledger_server.py --port 8765 --data-file financial_data.json
+#
+# The ledger is loaded once and kept in memory; every request is answered on the event loop
+# from the indexed lists. Adds go through a queue to a single writer task, which journals
+# them in batches (off the loop), applies them to the lists and bumps the data version. The
+# same task reloads the ledger when another process changes the data file. GET responses are
+# cached per path and query until the version changes.
+#
+# Endpoints (dates are YYYY-MM-DD):
+#   GET  /health                                  item counts and data version
+#   GET  /summary?year=2025&month=6               monthly totals, net and spend per tag
+#   GET  /summary?start=...&end=...               totals for any period
+#   GET  /tags?start=...&end=...[&tag=a&tag=b]    spend per tag
+#   GET  /items?kind=...&start=...&end=...[&limit=100&offset=0]
+#                                                 items that count towards the period
+#   POST /items  {"kind": "occasional_expenses", "description": ..., "amount": ..., "date": ..., "tags": [...]}
+#                                                 adds an item (fields as stored in the data file)
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import time
+import urllib.parse
+from collections import OrderedDict
+
+import financial_tracker
+import instrumentation
+from financial_tracker import (
+    ITEM_KINDS, RECURRING_FREQUENCIES, DataFileWatcher, MonthlySummaryCache,
+    load_data, append_items, month_period, parse_date,
+    calculate_period_summaries, calculate_tag_totals, _item_affects_range, _item_kind, _one_off_in_range,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+RESPONSE_CACHE_SIZE = 256 # Cached GET responses, dropped whenever the data changes
+RELOAD_CHECK_SECONDS = 1.0 # How often the writer task looks for changes by other processes
+IDLE_TIMEOUT_SECONDS = 30.0 # Keep-alive connections idle for longer are closed
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 1 << 20
+MAX_WRITE_BATCH = 1000 # Adds journaled together at most
+FREQUENCIES = {"incomes": ("once", *RECURRING_FREQUENCIES), "recurring_expenses": RECURRING_FREQUENCIES} # As offered by the CLI and dialogs
+DEFAULT_ITEM_LIMIT = 100
+MAX_ITEM_LIMIT = 10_000
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """Raised by handlers to answer with an error status and message."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {value!r}")
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, default=_json_default).encode()
+
+
+# --- Query Parameters ---
+def _param(query: dict[str, list[str]], name: str, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _date_param(query: dict, name: str) -> datetime.date:
+    value = _param(query, name)
+    if value is None:
+        raise HttpError(400, f"Missing parameter: {name}")
+    try:
+        return parse_date(value)
+    except ValueError:
+        raise HttpError(400, f"Invalid date for {name}: {value!r}, use YYYY-MM-DD") from None
+
+
+def _int_param(query: dict, name: str, default: int | None = None, minimum: int = 0, maximum: int | None = None) -> int:
+    value = _param(query, name)
+    if value is None:
+        if default is None:
+            raise HttpError(400, f"Missing parameter: {name}")
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HttpError(400, f"Invalid number for {name}: {value!r}") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        raise HttpError(400, f"{name} must be between {minimum} and {maximum if maximum is not None else 'any'}")
+    return number
+
+
+def _period(query: dict) -> tuple[datetime.date, datetime.date]:
+    """[start, end] from year and month, or from start and end."""
+    if "year" in query or "month" in query:
+        year = _int_param(query, "year", minimum=1, maximum=9999)
+        month = _int_param(query, "month", minimum=1, maximum=12)
+        return month_period(year, month)
+    start_date, end_date = _date_param(query, "start"), _date_param(query, "end")
+    if end_date < start_date:
+        raise HttpError(400, "end is before start")
+    return start_date, end_date
+
+
+def _check_field_types(item_class, data: dict):
+    """Checks the raw JSON types of a POSTed item before from_dict converts them, which would
+    e.g. turn "tags": "food" into four one-letter tags."""
+    date_field = "start_date" if item_class is financial_tracker.RecurringExpense else "date"
+    if not isinstance(data.get(date_field), str):
+        raise HttpError(400, f"{date_field} must be a YYYY-MM-DD string")
+    amount = data.get("amount")
+    if not isinstance(amount, (int, float)) or isinstance(amount, bool):
+        raise HttpError(400, "amount must be a positive number")
+    tags = data.get("tags")
+    if item_class is not financial_tracker.Income and tags is not None:
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise HttpError(400, "tags must be a list of strings")
+
+
+class LedgerServer:
+    """The in-memory ledger and the request handlers. All list access happens on the event
+    loop; only the writer task changes the lists."""
+
+    def __init__(self, data_file: str | None = None):
+        self.data_file = data_file or financial_tracker.DATA_FILE
+        self.watcher = DataFileWatcher(self.data_file)
+        self.version = 0
+        self._responses: OrderedDict[tuple, bytes] = OrderedDict()
+        self._writes: asyncio.Queue | None = None
+        self._writer_task: asyncio.Task | None = None
+        self._load()
+
+    def _load(self):
+        signature = self.watcher.signature() # Taken first, so changes made while loading are picked up later
+        self.incomes, self.recurring_expenses, self.occasional_expenses = load_data(self.data_file)
+        self.watcher.acknowledge(signature)
+        self.summary_cache = MonthlySummaryCache(self.incomes, self.recurring_expenses, self.occasional_expenses)
+        self._data_changed()
+
+    def _data_changed(self):
+        self.version += 1
+        self._responses.clear()
+
+    def lists(self) -> dict[str, list]:
+        return {"incomes": self.incomes, "recurring_expenses": self.recurring_expenses, "occasional_expenses": self.occasional_expenses}
+
+    # --- Writer ---
+    async def _write_loop(self):
+        """The single writer: journals queued adds in batches, then applies them. Between
+        batches it reloads the ledger if another process changed the data file. Should it ever
+        stop, the adds still queued fail instead of waiting forever."""
+        try:
+            await self._write_batches()
+        finally:
+            while not self._writes.empty():
+                _, future = self._writes.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("The ledger writer has stopped"))
+
+    async def _write_batches(self):
+        while True:
+            try:
+                first = await asyncio.wait_for(self._writes.get(), RELOAD_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                try:
+                    await self._reload_if_changed()
+                except Exception as e:
+                    # E.g. a bad date written by another process: keep serving the lists we
+                    # have and try again on the next check
+                    print(f"Error reloading {self.data_file}: {e}")
+                continue
+            batch = [first]
+            while len(batch) < MAX_WRITE_BATCH and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            items = [item for item, _ in batch]
+            try:
+                await asyncio.to_thread(self._journal, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            lists = self.lists()
+            for item, future in batch:
+                lists[_item_kind(item)].append(item)
+                if not future.done():
+                    future.set_result(item)
+            self._data_changed()
+
+    def _journal(self, items: list):
+        """Runs off the loop. A change by another process from before this write is still
+        picked up by the next reload check."""
+        with self.watcher.own_write():
+            append_items(items, self.data_file)
+
+    async def _reload_if_changed(self):
+        if not await asyncio.to_thread(self.watcher.has_changed):
+            return
+        print(f"{self.data_file} changed on disk, reloading...")
+        signature = await asyncio.to_thread(self.watcher.signature)
+        incomes, recurring, occasional = await asyncio.to_thread(load_data, self.data_file)
+        self.incomes, self.recurring_expenses, self.occasional_expenses = incomes, recurring, occasional
+        self.watcher.acknowledge(signature)
+        self.summary_cache = MonthlySummaryCache(incomes, recurring, occasional)
+        self._data_changed()
+
+    async def add(self, item):
+        """Queues an item for the writer and waits until it is saved and visible."""
+        if self._writer_task is None or self._writer_task.done():
+            raise RuntimeError("The ledger writer has stopped")
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((item, future))
+        return await future
+
+    # --- Handlers ---
+    def health(self, query: dict) -> dict:
+        return {"status": "ok", "version": self.version, "items": {kind: len(items) for kind, items in self.lists().items()}}
+
+    def summary(self, query: dict) -> dict:
+        if "year" in query or "month" in query:
+            start_date, _ = _period(query)
+            return self.summary_cache.get(start_date.year, start_date.month)
+        start_date, end_date = _period(query)
+        period_summary = calculate_period_summaries(self.incomes, self.recurring_expenses, self.occasional_expenses, [(start_date, end_date)])[0]
+        period_summary["tags"] = calculate_tag_totals(self.recurring_expenses, self.occasional_expenses, start_date, end_date)
+        return period_summary
+
+    def tags(self, query: dict) -> dict:
+        start_date, end_date = _period(query)
+        tags = query.get("tag")
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "tags": calculate_tag_totals(self.recurring_expenses, self.occasional_expenses, start_date, end_date, tags),
+        }
+
+    def items(self, query: dict) -> dict:
+        kind = _param(query, "kind")
+        if kind not in ITEM_KINDS:
+            raise HttpError(400, f"kind must be one of {', '.join(ITEM_KINDS)}")
+        start_date, end_date = _period(query)
+        limit = _int_param(query, "limit", DEFAULT_ITEM_LIMIT, maximum=MAX_ITEM_LIMIT)
+        offset = _int_param(query, "offset", 0)
+        item_list = self.lists()[kind]
+        if kind == "recurring_expenses":
+            matching = [item for item in item_list if _item_affects_range(kind, item, start_date, end_date)]
+        else:
+            # One-offs in date order straight from the date index, then recurring incomes
+            one_off, others = _one_off_in_range(item_list, start_date, end_date)
+            matching = [*one_off, *(item for item in others if _item_affects_range(kind, item, start_date, end_date))]
+        return {
+            "kind": kind,
+            "start_date": start_date,
+            "end_date": end_date,
+            "total": len(matching),
+            "items": [item.to_dict() for item in matching[offset:offset + limit]],
+        }
+
+    async def add_item(self, body: bytes) -> dict:
+        try:
+            data = json.loads(body)
+            kind = data.pop("kind")
+            _check_field_types(ITEM_KINDS[kind], data)
+            item = ITEM_KINDS[kind].from_dict(data)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise HttpError(400, f"Invalid item: {e}") from None
+        if not isinstance(item.amount, (int, float)) or isinstance(item.amount, bool) or not math.isfinite(item.amount) or item.amount <= 0:
+            raise HttpError(400, "amount must be a positive number")
+        for field in ("source", "description", "frequency"):
+            if not isinstance(getattr(item, field, ""), str):
+                raise HttpError(400, f"{field} must be a string")
+        if kind in FREQUENCIES and item.frequency not in FREQUENCIES[kind]:
+            raise HttpError(400, f"frequency must be one of {', '.join(FREQUENCIES[kind])}")
+        saved = await self.add(item)
+        return {"kind": kind, "item": saved.to_dict(), "version": self.version}
+
+    GET_ROUTES = {"/health": "health", "/summary": "summary", "/tags": "tags", "/items": "items"}
+
+    async def respond(self, method: str, target: str, body: bytes) -> tuple[int, bytes]:
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        if method == "POST" and url.path == "/items":
+            with instrumentation.span("server_add_item"):
+                return 201, _encode(await self.add_item(body))
+        handler = self.GET_ROUTES.get(url.path)
+        if handler is None:
+            raise HttpError(404, f"No such endpoint: {url.path}")
+        if method != "GET":
+            raise HttpError(405, f"{method} is not allowed on {url.path}")
+        key = (url.path, tuple(sorted((name, tuple(values)) for name, values in query.items())))
+        cached = self._responses.get(key)
+        if cached is not None:
+            self._responses.move_to_end(key)
+            instrumentation.count("server_cache_hits")
+            return 200, cached
+        with instrumentation.span(f"server_{handler}"):
+            encoded = _encode(getattr(self, handler)(query))
+        self._responses[key] = encoded
+        if len(self._responses) > RESPONSE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+        return 200, encoded
+
+    # --- HTTP ---
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves requests on one connection until the client closes it, asks to, or goes idle."""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    return
+                if not request_line:
+                    return
+                keep_alive = await self._serve_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return
+        finally:
+            writer.close()
+
+    async def _serve_request(self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Reads the rest of one request, writes its response and tells whether to keep the
+        connection open."""
+        started = time.perf_counter()
+        status, keep_alive = 500, False
+        try:
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+                raise HttpError(400, "Malformed request line")
+            method, target, version = parts
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT_SECONDS)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            else:
+                raise HttpError(400, "Too many headers")
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+            try:
+                length = int(headers.get("content-length", "0"))
+            except ValueError:
+                raise HttpError(400, "Invalid Content-Length") from None
+            if length > MAX_BODY_BYTES:
+                keep_alive = False # The unread body would be taken for the next request
+                raise HttpError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+            body = await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT_SECONDS) if length else b""
+            status, payload = await self.respond(method.upper(), target, body)
+        except HttpError as e:
+            status, payload = e.status, _encode({"error": str(e)})
+        except asyncio.TimeoutError:
+            status, payload, keep_alive = 408, _encode({"error": "Request timed out"}), False
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            print(f"Error serving {request_line!r}: {e}")
+            status, payload = 500, _encode({"error": str(e)})
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+        )
+        instrumentation.count("server_requests")
+        if instrumentation.enabled("timings"):
+            print(f"{request_line.decode('latin-1').strip()} -> {status} in {(time.perf_counter() - started) * 1000:.2f} ms")
+        return keep_alive
+
+    def start_writer(self):
+        """Starts the writer task on the running event loop; adds wait for it."""
+        self._writes = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop(), name="ledger-writer")
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.start_writer()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(f"http://{address[0]}:{address[1]}" for address in (socket.getsockname() for socket in server.sockets))
+        print(f"Serving {self.data_file} on {addresses}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._writer_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ledger summaries as JSON over local HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to bind (default {DEFAULT_HOST}, local only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-file", default=financial_tracker.DATA_FILE)
+    parser.add_argument("--trace", action="store_true", help="print the timing of every request")
+    args = parser.parse_args()
+    if args.trace:
+        instrumentation.configure("timings")
+
+    try:
+        asyncio.run(LedgerServer(args.data_file).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# partitioned_storage.py
+# Year-partitioned storage backend, used for data files ending in .ledger (and any data file
+# whose content starts like a partition manifest). The data file itself is a small manifest:
+# it holds the recurring items (recurring expenses and incomes that are not one-off) and the
+# list of partitions. One-off incomes and occasional expenses live in one JSON data file per
+# year, with its own journal, in the "<data file>.partitions" directory next to it.
+#
+# Range reads (iter_items, load_range and with them summarize_ledger and batch reports) only
+# open the partitions whose years overlap the range. A save rewrites only the partitions whose
+# content changed, and appending a one-off item journals it in its year's partition alone, so
+# both the working set and the cost of a save follow the years touched, not the history.
+#
+# Items come back grouped by partition (recurring items first, then one year after another),
+# not in the order they were added; nothing in the tracker depends on that order.
+#
+# Convert an existing ledger with:
+#     python partitioned_storage.py financial_data.json financial_data.ledger
+
+import datetime
+import hashlib
+import json
+import operator
+import os
+import sys
+
+from financial_tracker import (
+    ITEM_KINDS, JsonStorage, StorageError,
+    convert_ledger, journal_path, _item_affects_range, _item_from_dict, _item_kind, _item_to_dict,
+    _journal_lock, _write_atomically,
+)
+
+MANIFEST_VERSION = 1
+PARTITION_KINDS = ("incomes", "occasional_expenses") # Kinds whose one-off items are partitioned by year
+
+
+def _is_one_off(kind: str, item) -> bool:
+    if kind == "occasional_expenses":
+        return True
+    return kind == "incomes" and item.frequency == "once"
+
+
+def _partition_digest(items_by_kind: dict[str, list]) -> str:
+    """Content hash of a partition, to tell whether a save needs to rewrite it. Hashes the repr
+    of each record's fields (exact for floats, dates and strings), which is several times
+    cheaper than encoding the records as JSON."""
+    fields = {kind: operator.attrgetter(*ITEM_KINDS[kind].__slots__) for kind in PARTITION_KINDS}
+    encoded = repr([[fields[kind](item) for item in items_by_kind.get(kind, [])] for kind in PARTITION_KINDS])
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+class PartitionedStorage:
+    """Manifest of recurring items plus one JSON partition per year for one-off items."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.partitions_dir = path + ".partitions"
+
+    def _partition_path(self, year: int | str) -> str:
+        return os.path.join(self.partitions_dir, f"{year}.json")
+
+    # --- Manifest ---
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self.path):
+            return {"partitioned_ledger": MANIFEST_VERSION, "incomes": [], "recurring_expenses": [], "partitions": {}}
+        with open(self.path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("partitioned_ledger") != MANIFEST_VERSION:
+            raise StorageError(f"{self.path} is not a version {MANIFEST_VERSION} partitioned ledger")
+        return manifest
+
+    def _write_manifest(self, manifest: dict):
+        # Not indented: the manifest must start with '{"partitioned_ledger"' to be recognised
+        _write_atomically(self.path, json.dumps(manifest))
+
+    def _recurring_items(self, manifest: dict) -> dict[str, list]:
+        return {kind: [_item_from_dict(kind, item_data) for item_data in manifest.get(kind, [])] for kind in ITEM_KINDS}
+
+    def _years_overlapping(self, manifest: dict, start_date: datetime.date | None, end_date: datetime.date | None) -> list[str]:
+        """Partition years, in order, whose items can fall in [start_date, end_date]."""
+        years = []
+        for year, partition in sorted(manifest["partitions"].items()):
+            if start_date is not None and partition["end"] < start_date.isoformat():
+                continue
+            if end_date is not None and partition["start"] > end_date.isoformat():
+                continue
+            years.append(year)
+        return years
+
+    # --- Reading ---
+    def load(self, progress=None) -> dict[str, list]:
+        """Loads the manifest and every partition. progress(partitions_read, partitions) is called
+        after each one."""
+        return self.load_range(None, None, progress)
+
+    def load_range(self, start_date: datetime.date | None, end_date: datetime.date | None, progress=None) -> dict[str, list]:
+        """Loads the recurring items and the whole partitions of the years overlapping
+        [start_date, end_date] (None for an open end)."""
+        manifest = self._read_manifest()
+        items_by_kind = self._recurring_items(manifest)
+        years = self._years_overlapping(manifest, start_date, end_date)
+        for number, year in enumerate(years, 1):
+            partition_items = JsonStorage(self._partition_path(year)).load()
+            for kind in PARTITION_KINDS:
+                items_by_kind[kind].extend(partition_items[kind])
+            if progress is not None:
+                progress(number, len(years))
+        return items_by_kind
+
+    def iter_items(self, start_date: datetime.date | None = None, end_date: datetime.date | None = None):
+        """Yields (kind, item) pairs that can count towards the range, reading only the
+        partitions of the years that overlap it. Read-only, like JsonStorage.iter_items."""
+        manifest = self._read_manifest()
+        for kind, items in self._recurring_items(manifest).items():
+            for item in items:
+                if _item_affects_range(kind, item, start_date, end_date):
+                    yield kind, item
+        for year in self._years_overlapping(manifest, start_date, end_date):
+            yield from JsonStorage(self._partition_path(year)).iter_items(start_date, end_date)
+
+    # --- Writing ---
+    def save(self, items_by_kind: dict[str, list]):
+        """Replaces the stored items. Partitions whose content is unchanged are left alone."""
+        with _journal_lock:
+            manifest = self._read_manifest() if os.path.exists(self.path) else None
+            old_partitions = manifest["partitions"] if manifest else {}
+            recurring = {kind: [] for kind in ITEM_KINDS}
+            by_year: dict[str, dict[str, list]] = {}
+            for kind, items in items_by_kind.items():
+                for item in items:
+                    if _is_one_off(kind, item):
+                        by_year.setdefault(str(item.date.year), {partition_kind: [] for partition_kind in PARTITION_KINDS})[kind].append(item)
+                    else:
+                        recurring[kind].append(_item_to_dict(item))
+
+            os.makedirs(self.partitions_dir, exist_ok=True)
+            partitions = {}
+            for year, partition_items in sorted(by_year.items()):
+                digest = _partition_digest(partition_items)
+                old = old_partitions.get(year)
+                if old is None or old.get("digest") != digest or not os.path.exists(self._partition_path(year)):
+                    JsonStorage(self._partition_path(year)).save(partition_items)
+                dates = [item.date for items in partition_items.values() for item in items]
+                partitions[year] = {
+                    "start": min(dates).isoformat(),
+                    "end": max(dates).isoformat(),
+                    "items": len(dates),
+                    "digest": digest,
+                }
+            self._write_manifest({"partitioned_ledger": MANIFEST_VERSION, **recurring, "partitions": partitions})
+            # Years that are gone are deleted once the manifest no longer lists them
+            for year in old_partitions.keys() - partitions.keys():
+                for path in (self._partition_path(year), journal_path(self._partition_path(year))):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def append(self, item):
+        self.append_many([item])
+
+    def append_many(self, items: list):
+        """Journals one-off items in their years' partitions and adds recurring items to the
+        manifest, which is then rewritten once."""
+        with _journal_lock:
+            manifest = self._read_manifest()
+            by_year: dict[str, list] = {}
+            for item in items:
+                kind = _item_kind(item)
+                if _is_one_off(kind, item):
+                    by_year.setdefault(str(item.date.year), []).append(item)
+                else:
+                    manifest[kind].append(_item_to_dict(item))
+            if by_year:
+                os.makedirs(self.partitions_dir, exist_ok=True)
+            for year, year_items in by_year.items():
+                JsonStorage(self._partition_path(year)).append_many(year_items)
+                partition = manifest["partitions"].setdefault(year, {"start": "9999-12-31", "end": "0001-01-01", "items": 0})
+                partition["start"] = min(partition["start"], *(item.date.isoformat() for item in year_items))
+                partition["end"] = max(partition["end"], *(item.date.isoformat() for item in year_items))
+                partition["items"] += len(year_items)
+                partition["digest"] = None # Unknown until the next full save
+            self._write_manifest(manifest)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python partitioned_storage.py <source data file> <target data file>")
+        sys.exit(1)
+    convert_ledger(sys.argv[1], sys.argv[2])
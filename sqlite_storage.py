@@ -0,0 +1,315 @@
+# sqlite_storage.py
+# SQLite storage backend, used for data files ending in .db, .sqlite or .sqlite3.
+# Besides the load/save/append interface shared with the JSON backend it can stream a date
+# range only and answer summaries and tag totals with SQL over indexed columns.
+#
+# Migrate an existing JSON ledger with:
+#     python sqlite_storage.py financial_data.json financial_data.db
+
+import contextlib
+import datetime
+import itertools
+import os
+import sqlite3
+import sys
+import urllib.request
+
+from financial_tracker import (
+    Income, RecurringExpense, OccasionalExpense,
+    ITEM_KINDS, INCOME_FREQUENCIES,
+    JsonStorage, StorageError, NotALedgerError,
+    count_occurrences,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS incomes (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    amount REAL NOT NULL,
+    date TEXT NOT NULL,
+    frequency TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS incomes_by_date ON incomes (frequency, date);
+
+CREATE TABLE IF NOT EXISTS recurring_expenses (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    amount REAL NOT NULL,
+    frequency TEXT NOT NULL,
+    start_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recurring_expenses_by_start_date ON recurring_expenses (start_date);
+
+CREATE TABLE IF NOT EXISTS occasional_expenses (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    amount REAL NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS occasional_expenses_by_date ON occasional_expenses (date);
+
+-- One row per (item, tag); position keeps the tags in their original order
+CREATE TABLE IF NOT EXISTS recurring_expense_tags (
+    expense_id INTEGER NOT NULL REFERENCES recurring_expenses (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (expense_id, position)
+);
+CREATE INDEX IF NOT EXISTS recurring_expense_tags_by_tag ON recurring_expense_tags (tag, expense_id);
+
+CREATE TABLE IF NOT EXISTS occasional_expense_tags (
+    expense_id INTEGER NOT NULL REFERENCES occasional_expenses (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (expense_id, position)
+);
+CREATE INDEX IF NOT EXISTS occasional_expense_tags_by_tag ON occasional_expense_tags (tag, expense_id);
+"""
+LEDGER_TABLES = {"incomes", "recurring_expenses", "occasional_expenses", "recurring_expense_tags", "occasional_expense_tags"}
+
+
+class SqliteStorage:
+    """Ledger stored in an SQLite database. Dates are ISO strings, so they sort and compare
+    correctly as text. The database runs in WAL mode, so readers never block the writer.
+    Only writes modify the file; reading a database that is not a ledger raises NotALedgerError."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._schema_ready = False
+
+    @contextlib.contextmanager
+    def _connect(self, write: bool = False):
+        """Yields a connection inside a transaction, committed on success and always closed.
+        Reads open the file read-only and never touch it; the first write creates the schema
+        and switches the database to WAL. A missing or empty file reads as an empty ledger, and
+        a database holding other tables is neither read nor written (NotALedgerError)."""
+        try:
+            connection = self._connect_for_writing() if write else self._connect_read_only()
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+        try:
+            connection.execute("PRAGMA foreign_keys=ON")
+            with connection:
+                yield connection
+        except sqlite3.DatabaseError as e:
+            raise StorageError(str(e)) from e
+        finally:
+            connection.close()
+
+    def _has_ledger_tables(self, connection: sqlite3.Connection) -> bool:
+        """True if the database holds the ledger tables, False if it holds no tables at all.
+        Closes the connection and raises NotALedgerError if it holds other tables."""
+        try:
+            tables = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        except sqlite3.Error:
+            connection.close()
+            raise
+        if tables and not LEDGER_TABLES <= tables:
+            connection.close()
+            raise NotALedgerError(f"{self.path} is an SQLite database without the ledger tables")
+        return bool(tables)
+
+    def _connect_for_writing(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        if not self._schema_ready:
+            if not self._has_ledger_tables(connection):
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+            self._schema_ready = True
+        return connection
+
+    def _connect_read_only(self) -> sqlite3.Connection:
+        if os.path.exists(self.path):
+            connection = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(self.path))}?mode=ro", uri=True)
+            if self._has_ledger_tables(connection):
+                return connection
+            connection.close()
+        # Nothing stored yet: answer from an empty in-memory ledger
+        connection = sqlite3.connect(":memory:")
+        connection.executescript(SCHEMA)
+        return connection
+
+    # --- Reading ---
+    def _read_tags(self, connection, table: str, where: str = "", params: tuple = ()) -> dict[int, list[str]]:
+        tags: dict[int, list[str]] = {}
+        for expense_id, tag in connection.execute(f"SELECT expense_id, tag FROM {table} {where} ORDER BY expense_id, position", params):
+            tags.setdefault(expense_id, []).append(tag)
+        return tags
+
+    def load(self, progress=None) -> dict[str, list]:
+        """Loads every item. progress(tables_read, 3) is called after each table."""
+        with self._connect() as connection:
+            recurring_tags = self._read_tags(connection, "recurring_expense_tags")
+            occasional_tags = self._read_tags(connection, "occasional_expense_tags")
+            items_by_kind = {}
+            items_by_kind["incomes"] = [
+                Income(source, amount, datetime.date.fromisoformat(date), frequency)
+                for source, amount, date, frequency in connection.execute("SELECT source, amount, date, frequency FROM incomes ORDER BY id")
+            ]
+            if progress is not None:
+                progress(1, 3)
+            items_by_kind["recurring_expenses"] = [
+                RecurringExpense(description, amount, frequency, datetime.date.fromisoformat(start_date), recurring_tags.get(expense_id, []))
+                for expense_id, description, amount, frequency, start_date in connection.execute("SELECT id, description, amount, frequency, start_date FROM recurring_expenses ORDER BY id")
+            ]
+            if progress is not None:
+                progress(2, 3)
+            items_by_kind["occasional_expenses"] = [
+                OccasionalExpense(description, amount, datetime.date.fromisoformat(date), occasional_tags.get(expense_id, []))
+                for expense_id, description, amount, date in connection.execute("SELECT id, description, amount, date FROM occasional_expenses ORDER BY id")
+            ]
+            if progress is not None:
+                progress(3, 3)
+            return items_by_kind
+
+    def _iter_tagged(self, connection, sql: str, params: tuple):
+        """Runs a query over an expense table LEFT JOINed to its tag table and ordered by
+        (id, position), yielding each expense row once with its tags gathered into a list."""
+        for _, rows in itertools.groupby(connection.execute(sql, params), key=lambda row: row[0]):
+            rows = list(rows)
+            yield rows[0][1:-1], [row[-1] for row in rows if row[-1] is not None]
+
+    def iter_items(self, start_date: datetime.date | None = None, end_date: datetime.date | None = None):
+        """Yields (kind, item) pairs row by row from the cursors. With a range, only items that
+        can count towards it are read: one-off incomes and occasional expenses dated inside it,
+        and recurring incomes and expenses that start before its end."""
+        start = start_date.isoformat() if start_date is not None else "0000-01-01"
+        end = end_date.isoformat() if end_date is not None else "9999-12-31"
+        with self._connect() as connection:
+            for source, amount, date, frequency in connection.execute(
+                "SELECT source, amount, date, frequency FROM incomes"
+                " WHERE (frequency = 'once' AND date BETWEEN ? AND ?) OR (frequency != 'once' AND date <= ?) ORDER BY id",
+                (start, end, end),
+            ):
+                yield "incomes", Income(source, amount, datetime.date.fromisoformat(date), frequency)
+            for (description, amount, frequency, start_date_text), tags in self._iter_tagged(
+                connection,
+                "SELECT e.id, e.description, e.amount, e.frequency, e.start_date, t.tag FROM recurring_expenses e"
+                " LEFT JOIN recurring_expense_tags t ON t.expense_id = e.id WHERE e.start_date <= ? ORDER BY e.id, t.position",
+                (end,),
+            ):
+                yield "recurring_expenses", RecurringExpense(description, amount, frequency, datetime.date.fromisoformat(start_date_text), tags)
+            for (description, amount, date), tags in self._iter_tagged(
+                connection,
+                "SELECT e.id, e.description, e.amount, e.date, t.tag FROM occasional_expenses e"
+                " LEFT JOIN occasional_expense_tags t ON t.expense_id = e.id WHERE e.date BETWEEN ? AND ? ORDER BY e.id, t.position",
+                (start, end),
+            ):
+                yield "occasional_expenses", OccasionalExpense(description, amount, datetime.date.fromisoformat(date), tags)
+
+    # --- Writing ---
+    def _insert(self, connection, item):
+        if isinstance(item, Income):
+            connection.execute(
+                "INSERT INTO incomes (source, amount, date, frequency) VALUES (?, ?, ?, ?)",
+                (item.source, item.amount, item.date.isoformat(), item.frequency),
+            )
+            return
+        if isinstance(item, RecurringExpense):
+            cursor = connection.execute(
+                "INSERT INTO recurring_expenses (description, amount, frequency, start_date) VALUES (?, ?, ?, ?)",
+                (item.description, item.amount, item.frequency, item.start_date.isoformat()),
+            )
+            tag_table = "recurring_expense_tags"
+        else:
+            cursor = connection.execute(
+                "INSERT INTO occasional_expenses (description, amount, date) VALUES (?, ?, ?)",
+                (item.description, item.amount, item.date.isoformat()),
+            )
+            tag_table = "occasional_expense_tags"
+        connection.executemany(
+            f"INSERT INTO {tag_table} (expense_id, position, tag) VALUES (?, ?, ?)",
+            [(cursor.lastrowid, position, tag) for position, tag in enumerate(item.tags)],
+        )
+
+    def save(self, items_by_kind: dict[str, list]):
+        with self._connect(write=True) as connection:
+            for kind in ITEM_KINDS:
+                connection.execute(f"DELETE FROM {kind}") # Tag rows go with them (ON DELETE CASCADE)
+            for kind in ITEM_KINDS:
+                for item in items_by_kind.get(kind, []):
+                    self._insert(connection, item)
+
+    def append(self, item):
+        self.append_many([item])
+
+    def append_many(self, items: list):
+        """Inserts several items in one transaction."""
+        with self._connect(write=True) as connection:
+            for item in items:
+                self._insert(connection, item)
+
+    # --- Queries ---
+    def _recurring_total(self, rows, start_date: datetime.date, end_date: datetime.date) -> float:
+        total = 0.0
+        for amount, frequency, anchor in rows:
+            total += amount * count_occurrences(datetime.date.fromisoformat(anchor), frequency, start_date, end_date)
+        return total
+
+    def summary(self, start_date: datetime.date, end_date: datetime.date) -> dict:
+        """Same totals as the calculate_total_* functions. One-off sums run in SQL; recurring items
+        starting before end_date are fetched and counted with the recurrence engine."""
+        start, end = start_date.isoformat(), end_date.isoformat()
+        recurring_incomes = tuple(frequency for frequency in INCOME_FREQUENCIES if frequency != "once")
+        with self._connect() as connection:
+            one_off_income = connection.execute(
+                "SELECT COALESCE(SUM(amount), 0) FROM incomes WHERE frequency = 'once' AND date BETWEEN ? AND ?", (start, end),
+            ).fetchone()[0]
+            income_rows = connection.execute(
+                f"SELECT amount, frequency, date FROM incomes WHERE frequency IN ({', '.join('?' * len(recurring_incomes))}) AND date <= ?",
+                (*recurring_incomes, end),
+            ).fetchall()
+            recurring_rows = connection.execute(
+                "SELECT amount, frequency, start_date FROM recurring_expenses WHERE start_date <= ?", (end,),
+            ).fetchall()
+            occasional = connection.execute(
+                "SELECT COALESCE(SUM(amount), 0) FROM occasional_expenses WHERE date BETWEEN ? AND ?", (start, end),
+            ).fetchone()[0]
+        income = one_off_income + self._recurring_total(income_rows, start_date, end_date)
+        recurring = self._recurring_total(recurring_rows, start_date, end_date)
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "income": income,
+            "recurring_expenses": recurring,
+            "occasional_expenses": occasional,
+            "net": income - recurring - occasional,
+        }
+
+    def tag_totals(self, start_date: datetime.date, end_date: datetime.date, tags: list[str] | None = None) -> dict[str, float]:
+        """Spend per tag in [start_date, end_date], optionally restricted to the given tags."""
+        start, end = start_date.isoformat(), end_date.isoformat()
+        tag_filter, tag_params = "", ()
+        if tags is not None:
+            tag_filter, tag_params = f" AND t.tag IN ({', '.join('?' * len(tags))})", tuple(tags)
+        with self._connect() as connection:
+            totals = dict(connection.execute(
+                "SELECT t.tag, SUM(e.amount) FROM occasional_expense_tags t JOIN occasional_expenses e ON e.id = t.expense_id"
+                f" WHERE e.date BETWEEN ? AND ?{tag_filter} GROUP BY t.tag",
+                (start, end, *tag_params),
+            ))
+            recurring_rows = connection.execute(
+                "SELECT t.tag, e.amount, e.frequency, e.start_date FROM recurring_expense_tags t JOIN recurring_expenses e ON e.id = t.expense_id"
+                f" WHERE e.start_date <= ?{tag_filter}",
+                (end, *tag_params),
+            ).fetchall()
+        for tag, amount, frequency, anchor in recurring_rows:
+            occurrences = count_occurrences(datetime.date.fromisoformat(anchor), frequency, start_date, end_date)
+            if occurrences:
+                totals[tag] = totals.get(tag, 0.0) + amount * occurrences
+        return totals
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str):
+    """Copies a JSON ledger (snapshot and journal) into an SQLite database, replacing its contents."""
+    items_by_kind = JsonStorage(json_path).load()
+    SqliteStorage(db_path).save(items_by_kind)
+    counts = ", ".join(f"{len(items)} {kind.replace('_', ' ')}" for kind, items in items_by_kind.items())
+    print(f"Migrated {counts} from {json_path} to {db_path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python sqlite_storage.py <source.json> <target.db>")
+        sys.exit(1)
+    migrate_json_to_sqlite(sys.argv[1], sys.argv[2])
@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+from financial_tracker import (
+    Income, RecurringExpense, OccasionalExpense, JsonStorage, StorageError, open_storage,
+)
+from binary_storage import BinaryStorage
+
+
+def sample_items() -> dict[str, list]:
+    return {
+        "incomes": [
+            Income("Job", 1200.0, datetime.date(2025, 1, 31), "monthly"),
+            Income("Gift", 50.0, datetime.date(2025, 3, 14)),
+            Income("Prize", 20.0, datetime.date(2024, 12, 1)),
+        ],
+        "recurring_expenses": [
+            RecurringExpense("Rent", 500.0, "monthly", datetime.date(2024, 9, 1), ["home"]),
+            RecurringExpense("Gym", 30.0, "weekly", datetime.date(2025, 2, 3), []),
+        ],
+        "occasional_expenses": [
+            OccasionalExpense(f"Café {number}", 2.5 + number, datetime.date(2025, 1 + number % 6, 1 + number % 28), ["food", "fun"][: number % 3])
+            for number in range(40)
+        ],
+    }
+
+
+def as_dicts(items_by_kind: dict[str, list]) -> dict[str, list]:
+    return {kind: [item.to_dict() for item in items] for kind, items in items_by_kind.items()}
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "ledger.sftb")
+    open_storage(path).save(sample_items())
+    assert isinstance(open_storage(path), BinaryStorage)
+    assert as_dicts(open_storage(path).load()) == as_dicts(sample_items())
+
+
+def test_journaled_adds_are_replayed(tmp_path):
+    path = str(tmp_path / "ledger.sftb")
+    open_storage(path).save(sample_items())
+    added = OccasionalExpense("Book", 12.0, datetime.date(2025, 3, 3), ["study"])
+    open_storage(path).append(added)
+    loaded = open_storage(path).load()
+    assert loaded["occasional_expenses"][-1].to_dict() == added.to_dict()
+
+
+def test_iter_items_matches_json(tmp_path):
+    binary_path, json_path = str(tmp_path / "ledger.sftb"), str(tmp_path / "ledger.json")
+    open_storage(binary_path).save(sample_items())
+    JsonStorage(json_path).save(sample_items())
+    for start_date, end_date in ((datetime.date(2025, 3, 1), datetime.date(2025, 3, 31)), (None, None), (None, datetime.date(2025, 1, 15))):
+        from_binary = sorted((kind, repr(item.to_dict())) for kind, item in open_storage(binary_path).iter_items(start_date, end_date))
+        from_json = sorted((kind, repr(item.to_dict())) for kind, item in JsonStorage(json_path).iter_items(start_date, end_date))
+        assert from_binary == from_json
+
+
+def test_truncated_snapshot_raises_storage_error(tmp_path):
+    path = tmp_path / "ledger.sftb"
+    open_storage(str(path)).save(sample_items())
+    data = path.read_bytes()
+    truncated = tmp_path / "truncated.sftb"
+    # Every cut that loses more than the zero padding after the string data
+    for length in range(len(data.rstrip(b"\0"))):
+        truncated.write_bytes(data[:length])
+        with pytest.raises(StorageError):
+            BinaryStorage(str(truncated)).load()
+
+
+def test_wrong_signature_raises_storage_error(tmp_path):
+    path = tmp_path / "ledger.sftb"
+    path.write_bytes(b"SFTX" + bytes(200))
+    with pytest.raises(StorageError):
+        BinaryStorage(str(path)).load()
@@ -0,0 +1,125 @@
+import datetime
+import random
+
+import pytest
+
+from financial_tracker import (
+    DateIndex, IndexedItemList, OccasionalExpense, SearchIndex, month_period,
+    calculate_period_summaries, calculate_tag_totals,
+)
+from benchmarks.ledger_generator import generate_ledger
+from benchmarks.reference import (
+    reference_total_income, reference_total_recurring_expenses, reference_total_occasional_expenses,
+    reference_tag_totals, reference_search,
+)
+
+START = datetime.date(2024, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def ledger():
+    incomes, recurring, occasional = generate_ledger(incomes=40, recurring=25, occasional=1500, years=2, tags=8, seed=7)
+    return IndexedItemList(incomes), IndexedItemList(recurring), IndexedItemList(occasional)
+
+
+def random_period(rng: random.Random) -> tuple[datetime.date, datetime.date]:
+    start_date = START + datetime.timedelta(days=rng.randrange(-60, 800))
+    return start_date, start_date + datetime.timedelta(days=rng.randrange(0, 120))
+
+
+def test_date_index_matches_brute_force():
+    rng = random.Random(1)
+    index, entries = DateIndex(), []
+    for number in range(600):
+        # The first date is the base; later ones fall on both sides of it
+        date_obj = START + datetime.timedelta(days=rng.randrange(-400, 400))
+        entry = (date_obj, round(rng.uniform(1, 100), 2), f"item {number}")
+        index.add(*entry)
+        entries.append(entry)
+        if rng.random() < 0.2:
+            removed = entries.pop(rng.randrange(len(entries)))
+            index.remove(*removed)
+    assert len(index) == len(entries)
+    for _ in range(200):
+        start_date, end_date = random_period(rng)
+        inside = [entry for entry in entries if start_date <= entry[0] <= end_date]
+        # Removals leave rounding residue in the trees, hence the absolute tolerance
+        assert index.total(start_date, end_date) == pytest.approx(sum(amount for _, amount, _ in inside), abs=1e-6)
+        found = list(index.items_between(start_date, end_date))
+        assert sorted(found) == sorted(item for _, _, item in inside)
+        dates = {item: date_obj for date_obj, _, item in entries}
+        assert [dates[item] for item in found] == sorted(dates[item] for item in found)
+    assert index.total(START, START - datetime.timedelta(days=1)) == 0.0
+
+
+def test_summaries_match_reference(ledger):
+    incomes, recurring, occasional = ledger
+    periods = [month_period(year, month) for year in (2024, 2025) for month in range(1, 13)]
+    for (start_date, end_date), summary in zip(periods, calculate_period_summaries(incomes, recurring, occasional, periods)):
+        assert summary["income"] == pytest.approx(reference_total_income(incomes, start_date, end_date))
+        assert summary["recurring_expenses"] == pytest.approx(reference_total_recurring_expenses(recurring, start_date, end_date))
+        assert summary["occasional_expenses"] == pytest.approx(reference_total_occasional_expenses(occasional, start_date, end_date))
+        expected_tags = reference_tag_totals(recurring, occasional, start_date, end_date)
+        tag_totals = calculate_tag_totals(recurring, occasional, start_date, end_date)
+        assert tag_totals.keys() == expected_tags.keys()
+        for tag, total in expected_tags.items():
+            assert tag_totals[tag] == pytest.approx(total)
+
+
+def search_queries(ledger, rng: random.Random):
+    incomes, recurring, occasional = ledger
+    for _ in range(60):
+        sample = rng.choice(occasional)
+        start_date, end_date = random_period(rng)
+        tags = list(sample.tags[:2])
+        word = rng.choice(["expense", "recurring 1", "income", "xpen", str(rng.randrange(100))])
+        yield from (
+            {"start_date": start_date, "end_date": end_date},
+            {"min_amount": 10, "max_amount": 20, "start_date": start_date, "end_date": end_date},
+            {"tags": tags, "min_amount": 45, "max_amount": 60},
+            {"tags": tags, "all_tags": False, "end_date": end_date},
+            {"text": word, "tags": tags[:1], "start_date": start_date},
+            {"text": word[:3], "prefix": True, "max_amount": 50, "end_date": end_date},
+            {"text": word},
+            {"kinds": ["incomes"], "tags": tags[:1]},
+            {"kinds": ["incomes", "recurring_expenses"], "start_date": start_date, "end_date": end_date},
+        )
+
+
+def assert_search_matches_reference(search_index: SearchIndex, ledger, query: dict):
+    found = [id(item) for _, item in search_index.search(**query)]
+    expected = {id(item) for item in reference_search(*ledger, **query)}
+    assert len(found) == len(set(found))
+    assert set(found) == expected, query
+
+
+def test_search_index_matches_reference(ledger):
+    search_index = SearchIndex(*ledger)
+    for query in search_queries(ledger, random.Random(2)):
+        assert_search_matches_reference(search_index, ledger, query)
+
+
+def test_search_index_follows_list_changes(ledger):
+    incomes, recurring, occasional = (IndexedItemList(items) for items in ledger)
+    lists = (incomes, recurring, occasional)
+    search_index = SearchIndex(*lists)
+    rng = random.Random(3)
+    for number in range(50):
+        occasional.append(OccasionalExpense(f"Added expense {number}", round(rng.uniform(1, 100), 2), START + datetime.timedelta(days=rng.randrange(700)), ["tag1"]))
+    for _ in range(50):
+        occasional.remove(rng.choice(occasional))
+    recurring.pop(0)
+    for query in search_queries(lists, random.Random(4)):
+        assert_search_matches_reference(search_index, lists, query)
+
+
+def test_search_index_built_from_copies_catches_up(ledger):
+    lists = tuple(IndexedItemList(items) for items in ledger)
+    search_index = SearchIndex(*(list(items) for items in lists))
+    added = OccasionalExpense("Late arrival", 12.0, START, ["tag2"])
+    lists[2].append(added) # Appended while the index was being built
+    search_index.follow(*lists)
+    lists[2].append(OccasionalExpense("Later still", 13.0, START, ["tag2"]))
+    assert sorted(item.description for _, item in search_index.search(text="late")) == ["Late arrival", "Later still"]
+    for query in search_queries(lists, random.Random(5)):
+        assert_search_matches_reference(search_index, lists, query)
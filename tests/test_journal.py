@@ -0,0 +1,70 @@
+import datetime
+import json
+
+from financial_tracker import (
+    OccasionalExpense, append_items, journal_path, load_data, save_data, wait_for_compaction,
+)
+
+
+def expense(description: str, day: int = 1) -> OccasionalExpense:
+    return OccasionalExpense(description, 5.0, datetime.date(2025, 3, day), ["food"])
+
+
+def descriptions(items) -> list[str]:
+    return [item.description for item in items]
+
+
+def test_adds_are_journaled_and_replayed(tmp_path):
+    data_file = str(tmp_path / "ledger.json")
+    save_data([], [], [expense("Rent")], data_file)
+    append_items([expense("Coffee"), expense("Tea")], data_file)
+    _, _, occasional = load_data(data_file)
+    assert descriptions(occasional) == ["Rent", "Coffee", "Tea"]
+
+
+def test_torn_record_is_dropped_and_cut_off(tmp_path):
+    data_file = str(tmp_path / "ledger.json")
+    append_items([expense("Coffee")], data_file)
+    with open(journal_path(data_file), "a") as f:
+        f.write('{"kind": "occasional_expenses", "item": {"descr') # A write cut short by a crash
+    _, _, occasional = load_data(data_file)
+    assert descriptions(occasional) == ["Coffee"]
+
+    # The torn tail was cut off, so the next add starts on a line of its own
+    append_items([expense("Tea")], data_file)
+    _, _, occasional = load_data(data_file)
+    assert descriptions(occasional) == ["Coffee", "Tea"]
+
+
+def test_stale_journal_is_not_replayed(tmp_path):
+    data_file = str(tmp_path / "ledger.json")
+    save_data([], [], [], data_file)
+    append_items([expense("Coffee")], data_file)
+    with open(journal_path(data_file)) as f:
+        old_journal = f.read()
+
+    # A snapshot that already holds the journaled item, written by a process that died before it
+    # could reset the journal: the old journal names the previous snapshot's id
+    save_data([], [], [expense("Coffee")], data_file)
+    with open(journal_path(data_file), "w") as f:
+        f.write(old_journal)
+
+    _, _, occasional = load_data(data_file)
+    assert descriptions(occasional) == ["Coffee"]
+    with open(data_file) as f:
+        snapshot_id = json.load(f)["journal_id"]
+    with open(journal_path(data_file)) as f:
+        assert f.read() == json.dumps({"journal_id": snapshot_id}) + "\n"
+
+
+def test_compaction_keeps_every_item(tmp_path, monkeypatch):
+    import financial_tracker
+    monkeypatch.setattr(financial_tracker, "JOURNAL_COMPACTION_THRESHOLD", 10)
+    data_file = str(tmp_path / "ledger.json")
+    for number in range(25):
+        append_items([expense(f"Item {number}", number % 28 + 1)], data_file)
+    wait_for_compaction()
+    _, _, occasional = load_data(data_file)
+    assert descriptions(occasional) == [f"Item {number}" for number in range(25)]
+    with open(journal_path(data_file)) as f:
+        assert len(f.readlines()) < 11 # Header plus the records since the last compaction
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import pytest
+
+from financial_tracker import load_data
+from ledger_server import HttpError, LedgerServer
+
+VALID_EXPENSE = {"kind": "occasional_expenses", "description": "Coffee", "amount": 3.5, "date": "2025-03-01", "tags": ["food"]}
+
+
+def post_items(data_file: str, *bodies: dict) -> list:
+    """POSTs each body to /items on a fresh server. Returns (status, payload) per body. The
+    writer task is cancelled by asyncio.run on the way out."""
+    async def run():
+        server = LedgerServer(data_file)
+        server.start_writer()
+        results = []
+        for body in bodies:
+            try:
+                status, payload = await asyncio.wait_for(server.respond("POST", "/items", json.dumps(body).encode()), 5)
+            except HttpError as e:
+                status, payload = e.status, str(e).encode()
+            results.append((status, json.loads(payload) if status == 201 else payload.decode()))
+        return results
+    return asyncio.run(run())
+
+
+def test_valid_item_is_saved(tmp_path):
+    data_file = str(tmp_path / "ledger.json")
+    [(status, payload)] = post_items(data_file, VALID_EXPENSE)
+    assert status == 201
+    assert payload["item"] == {key: value for key, value in VALID_EXPENSE.items() if key != "kind"}
+    _, _, occasional = load_data(data_file)
+    assert [item.to_dict() for item in occasional] == [payload["item"]]
+
+
+def test_recurring_and_income_items_are_saved(tmp_path):
+    data_file = str(tmp_path / "ledger.json")
+    results = post_items(
+        data_file,
+        {"kind": "incomes", "source": "Job", "amount": 900, "date": "2025-01-31", "frequency": "monthly"},
+        {"kind": "recurring_expenses", "description": "Rent", "amount": 450.0, "frequency": "monthly", "start_date": "2025-01-01", "tags": []},
+    )
+    assert [status for status, _ in results] == [201, 201]
+    incomes, recurring, _ = load_data(data_file)
+    assert len(incomes) == 1 and len(recurring) == 1
+
+
+@pytest.mark.parametrize("change", [
+    {"tags": "food"},
+    {"tags": {"a": 1}},
+    {"tags": ["food", 1]},
+    {"date": 20250301},
+    {"date": "2025-13-01"},
+    {"amount": "3.5"},
+    {"amount": True},
+    {"amount": 0},
+    {"amount": -2},
+    {"amount": float("nan")},
+    {"amount": float("inf")},
+    {"description": 7},
+    {"kind": "loans"},
+])
+def test_invalid_item_is_rejected(tmp_path, change):
+    data_file = str(tmp_path / "ledger.json")
+    [(status, _)] = post_items(data_file, {**VALID_EXPENSE, **change})
+    assert status == 400
+    assert load_data(data_file) == ([], [], [])
+
+
+@pytest.mark.parametrize("body", [
+    {"kind": "incomes", "source": "Job", "amount": 900, "date": "2025-01-31", "frequency": "fortnightly"},
+    {"kind": "recurring_expenses", "description": "Rent", "amount": 450.0, "frequency": "once", "start_date": "2025-01-01"},
+    {"kind": "occasional_expenses", "amount": 3.5, "date": "2025-03-01"},
+])
+def test_invalid_frequency_or_missing_field_is_rejected(tmp_path, body):
+    [(status, _)] = post_items(str(tmp_path / "ledger.json"), body)
+    assert status == 400
+
+
+def test_malformed_json_is_rejected(tmp_path):
+    async def run():
+        server = LedgerServer(str(tmp_path / "ledger.json"))
+        server.start_writer()
+        with pytest.raises(HttpError) as error:
+            await server.respond("POST", "/items", b'{"kind": ')
+        return error.value.status
+    assert asyncio.run(run()) == 400
@@ -0,0 +1,32 @@
+# timeline_export.py
+# Streams every payment of a date range (recurring occurrences included) to a CSV file in date
+# order, with a running balance. Rows are written as they are generated, so exporting decades
+# needs no more memory than exporting a month.
+#
+#     python timeline_export.py statement.csv --start 2025-01-01 --end 2034-12-31
+
+import argparse
+import datetime
+
+import financial_tracker
+from financial_tracker import load_data, export_timeline_csv, parse_date
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the payment timeline of a date range as CSV.")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--start", type=parse_date, default=datetime.date.today().replace(month=1, day=1), help="first day (YYYY-MM-DD), default 1 January this year")
+    parser.add_argument("--end", type=parse_date, help="last day (YYYY-MM-DD), default 31 December of the start year")
+    parser.add_argument("--starting-balance", type=float, default=0.0)
+    parser.add_argument("--data-file", default=financial_tracker.DATA_FILE)
+    args = parser.parse_args()
+
+    end_date = args.end or args.start.replace(month=12, day=31)
+    incomes, recurring_expenses, occasional_expenses = load_data(args.data_file)
+    with open(args.output, 'w', newline='') as f:
+        rows = export_timeline_csv(f, incomes, recurring_expenses, occasional_expenses, args.start, end_date, args.starting_balance)
+    print(f"Exported {rows} payments from {args.start} to {end_date} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()